@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from utils.logging_config import setup_logging
 import logging
 import os
@@ -13,9 +14,25 @@ logger.info("Starting Chatbot API application")
 # Import services explicitly to initialize them at startup
 logger.info("Importing service modules...")
 from routes.chat import router as chat_router
+from routes.metrics import router as metrics_router
 from services import entity_service, intent_service, langchain_service
+from services.cache_warmer import cache_warmer, register_default_targets
+from services.preference_service import flush_preference_store
+from config import CACHE_WARMING_ENABLED
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # Keep the default location and news categories hot in the background
+    if CACHE_WARMING_ENABLED:
+        register_default_targets(cache_warmer)
+        cache_warmer.start()
+    else:
+        logger.info("Cache warming disabled")
+    yield
+    await cache_warmer.stop()
+    flush_preference_store()
+
+app = FastAPI(lifespan=lifespan)
 
 # Get allowed origins from environment variable or use defaults
 allowed_origins = os.environ.get(
@@ -40,6 +57,9 @@ logger.info("CORS middleware configured")
 app.include_router(chat_router)
 logger.info("Chat router registered")
 
+app.include_router(metrics_router)
+logger.info("Metrics router registered")
+
 # Root endpoint
 @app.get("/")
 def home():
@@ -0,0 +1,125 @@
+"""
+Compare the gazetteer PhraseMatcher pipeline component with the string scans it replaced.
+
+The legacy path ran NER, then moved PERSON entities found in the city list to GPE and,
+if no GPE was left, scanned the text after "in/for/at/near" for a known name. The new
+path tags known places inside the spaCy pipeline. Both are measured end to end (spaCy
+call plus post-processing) on the entity_service test messages and on a generated
+corpus built from every gazetteer name.
+
+Usage:
+    python benchmarks/location_matching.py
+"""
+import os
+import sys
+import random
+import statistics
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.entity_service import nlp, extract_entities, LOCATION_INDICATORS
+from services.city_index import get_gazetteer
+
+# Weather messages from entity_service.test_entity_extraction and the places they name
+TEST_MESSAGES = [
+    ("What's the weather in Phoenix?", {"phoenix"}),
+    ("What's the weather in Mesa?", {"mesa"}),
+    ("What's the weather in Chandler?", {"chandler"}),
+    ("What's the weather in Gilbert today?", {"gilbert"}),
+    ("What is the temperature in London?", {"london"}),
+    ("What's the weather tomorrow in Phoenix?", {"phoenix"}),
+    ("What's the weather for the week in Seattle?", {"seattle"}),
+    ("What's the weather on Monday in Chicago?", {"chicago"}),
+]
+
+TEMPLATES = [
+    ("What's the weather in {title}?", True),
+    ("how hot is it in {lower} right now", True),
+    ("Forecast for {title} tomorrow", True),
+    ("will it rain near {lower} this week", True),
+    ("{title} weather today", True),
+    ("is it cold at {title} tonight?", True),
+]
+
+# Weather messages that mention no place, several containing words that are also town names
+NEGATIVES = [
+    "what's the weather like today",
+    "any surprise storms coming this week?",
+    "should I page someone if it snows",
+    "is the globe getting warmer this year",
+    "weather for the weekend please",
+    "will it be a good day for a show low key outside",
+    "is parker going to need an umbrella",
+    "forecast for tomorrow morning",
+]
+
+def build_corpus(seed=7):
+    """Return (message, expected place set) pairs: test messages, templated places and negatives."""
+    corpus = list(TEST_MESSAGES)
+    for name in get_gazetteer().names():
+        for template, _ in TEMPLATES:
+            corpus.append((template.format(title=name, lower=name.lower()), {name.lower()}))
+    corpus += [(message, set()) for message in NEGATIVES]
+    random.Random(seed).shuffle(corpus)
+    return corpus
+
+def legacy_places(message):
+    """The post-NER string scans used before the known_places component."""
+    gazetteer = get_gazetteer()
+    with nlp.select_pipes(disable=["known_places"]):
+        doc = nlp(message)
+    gpe = [ent.text for ent in doc.ents if ent.label_ == "GPE"]
+    gpe += [ent.text for ent in doc.ents if ent.label_ == "PERSON" and ent.text in gazetteer]
+    if not gpe:
+        words = [word.strip(".,!?;:'\"") for word in message.lower().split()]
+        for i, word in enumerate(words[:-1]):
+            if word not in LOCATION_INDICATORS:
+                continue
+            for length in range(min(4, len(words) - i - 1), 0, -1):
+                place = gazetteer.get(" ".join(words[i + 1:i + 1 + length]))
+                if place:
+                    gpe.append(place)
+                    break
+            if gpe:
+                break
+    return gpe
+
+def pipeline_places(message):
+    """Places found by extract_entities with the known_places component."""
+    return extract_entities(message, intent="weather")["GPE"]
+
+def evaluate(method, corpus):
+    latencies = []
+    exact = true_pos = false_pos = false_neg = 0
+    for message, expected in corpus:
+        start = time.perf_counter()
+        found = {place.lower() for place in method(message)}
+        latencies.append((time.perf_counter() - start) * 1000)
+        exact += found == expected
+        true_pos += len(found & expected)
+        false_pos += len(found - expected)
+        false_neg += len(expected - found)
+    latencies.sort()
+    return {
+        "accuracy": exact / len(corpus),
+        "precision": true_pos / (true_pos + false_pos) if true_pos + false_pos else 1.0,
+        "recall": true_pos / (true_pos + false_neg) if true_pos + false_neg else 1.0,
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+    }
+
+def main():
+    print(f"spaCy pipeline: {nlp.pipe_names}, gazetteer: {len(get_gazetteer())} names")
+    for label, corpus in [("test_entity_extraction messages", TEST_MESSAGES), ("generated corpus", build_corpus())]:
+        # Warm up both paths so one-off initialization is not timed
+        legacy_places(corpus[0][0])
+        pipeline_places(corpus[0][0])
+        print(f"\n{label} ({len(corpus)} messages)")
+        for name, method in [("legacy scans", legacy_places), ("known_places", pipeline_places)]:
+            result = evaluate(method, corpus)
+            print(f"  {name:13} accuracy {result['accuracy']:.3f}  precision {result['precision']:.3f}  "
+                  f"recall {result['recall']:.3f}  mean {result['mean_ms']:.3f} ms  p95 {result['p95_ms']:.3f} ms")
+
+if __name__ == "__main__":
+    main()
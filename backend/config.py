@@ -10,3 +10,188 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 # Default location for weather requests when no location is specified
 DEFAULT_WEATHER_LOCATION = os.getenv("DEFAULT_WEATHER_LOCATION", "Phoenix")
+
+# Lifetimes (seconds) of cached upstream responses
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+FORECAST_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", "1800"))
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "300"))
+
+# Background cache warming for popular weather locations and news categories
+CACHE_WARMING_ENABLED = os.getenv("CACHE_WARMING_ENABLED", "true").lower() == "true"
+CACHE_WARMING_CALLS_PER_MINUTE = int(os.getenv("CACHE_WARMING_CALLS_PER_MINUTE", "30"))
+CACHE_WARMING_TOP_N = int(os.getenv("CACHE_WARMING_TOP_N", "25"))
+CACHE_WARMING_LEAD_SECONDS = int(os.getenv("CACHE_WARMING_LEAD_SECONDS", "60"))
+CACHE_WARMING_INTERVAL_SECONDS = int(os.getenv("CACHE_WARMING_INTERVAL_SECONDS", "15"))
+# Longest wait before retrying a key whose refresh keeps failing
+CACHE_WARMING_MAX_BACKOFF_SECONDS = int(os.getenv("CACHE_WARMING_MAX_BACKOFF_SECONDS", "3600"))
+# Fraction of NEWSAPI_CALLS_PER_DAY news warming may spend, spread evenly over the day (0 disables it)
+CACHE_WARMING_NEWS_DAILY_SHARE = float(os.getenv("CACHE_WARMING_NEWS_DAILY_SHARE", "0.1"))
+
+# Upstream quota budgets (token buckets per minute and per day)
+OPENWEATHER_CALLS_PER_MINUTE = int(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60"))
+OPENWEATHER_CALLS_PER_DAY = int(os.getenv("OPENWEATHER_CALLS_PER_DAY", "30000"))
+NEWSAPI_CALLS_PER_MINUTE = int(os.getenv("NEWSAPI_CALLS_PER_MINUTE", "30"))
+NEWSAPI_CALLS_PER_DAY = int(os.getenv("NEWSAPI_CALLS_PER_DAY", "100"))
+# Fraction of each budget background refreshes may not touch
+UPSTREAM_BACKGROUND_RESERVE = float(os.getenv("UPSTREAM_BACKGROUND_RESERVE", "0.25"))
+# Fraction of budget below which expired cache entries are served instead of calling upstream
+UPSTREAM_LOW_WATER = float(os.getenv("UPSTREAM_LOW_WATER", "0.1"))
+# How long (seconds) past expiry cached data may be served when degraded
+UPSTREAM_MAX_STALE = int(os.getenv("UPSTREAM_MAX_STALE", "3600"))
+
+# Upstream resilience: circuit breaker, retries with jittered backoff, hedged requests
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+UPSTREAM_RETRY_ATTEMPTS = int(os.getenv("UPSTREAM_RETRY_ATTEMPTS", "2"))
+UPSTREAM_RETRY_BASE_DELAY = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.2"))
+UPSTREAM_RETRY_MAX_DELAY = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "1.0"))
+# Send a duplicate request if the first is slower than this many seconds (0 disables hedging)
+UPSTREAM_HEDGE_AFTER_SECONDS = float(os.getenv("UPSTREAM_HEDGE_AFTER_SECONDS", "0"))
+# Per-request timeout (seconds) for upstream HTTP calls
+UPSTREAM_TIMEOUT_SECONDS = float(os.getenv("UPSTREAM_TIMEOUT_SECONDS", "5"))
+
+# City resolution
+# How long (seconds) a city the weather API reported as unknown is answered locally
+NEGATIVE_CITY_CACHE_TTL = int(os.getenv("NEGATIVE_CITY_CACHE_TTL", "3600"))
+# Memory-mapped gazetteer compiled from data/cities.txt (rebuilt automatically when the list changes)
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.bin"))
+
+# Offline IP geolocation: a CSV of IP ranges (e.g. a downloaded city-level database) is compiled
+# into a memory-mapped table next to it; ipinfo.io is only used when the table has no answer
+GEOIP_CSV_PATH = os.getenv("GEOIP_CSV_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "geoip.csv"))
+GEOIP_TABLE_PATH = os.getenv("GEOIP_TABLE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "geoip.bin"))
+IPINFO_FALLBACK_ENABLED = os.getenv("IPINFO_FALLBACK_ENABLED", "true").lower() == "true"
+# Per-client geolocation cache; with aggregation, clients in the same /24 (IPv4) or /48 (IPv6) share an entry
+GEOLOCATION_CACHE_TTL = int(os.getenv("GEOLOCATION_CACHE_TTL", "86400"))
+GEOLOCATION_CACHE_SIZE = int(os.getenv("GEOLOCATION_CACHE_SIZE", "10000"))
+GEOLOCATION_NEGATIVE_TTL = int(os.getenv("GEOLOCATION_NEGATIVE_TTL", "300"))
+GEOLOCATION_AGGREGATE_SUBNETS = os.getenv("GEOLOCATION_AGGREGATE_SUBNETS", "true").lower() == "true"
+
+# News cache size and eviction policy ("lru", "lfu" or "ttl")
+NEWS_CACHE_MAXSIZE = int(os.getenv("NEWS_CACHE_MAXSIZE", "256"))
+NEWS_CACHE_EVICTION = os.getenv("NEWS_CACHE_EVICTION", "lru")
+
+# Local BM25 index over fetched headlines, used to answer news searches without calling NewsAPI
+NEWS_INDEX_ENABLED = os.getenv("NEWS_INDEX_ENABLED", "true").lower() == "true"
+NEWS_INDEX_MAX_ARTICLES = int(os.getenv("NEWS_INDEX_MAX_ARTICLES", "2000"))
+# Only articles fetched within this many seconds answer a search
+NEWS_INDEX_MAX_AGE = int(os.getenv("NEWS_INDEX_MAX_AGE", "900"))
+# Matching articles needed before a search is answered locally
+NEWS_INDEX_MIN_HITS = int(os.getenv("NEWS_INDEX_MIN_HITS", "2"))
+
+# Multi-category / multi-topic news requests
+NEWS_FANOUT_MAX_PARALLEL = int(os.getenv("NEWS_FANOUT_MAX_PARALLEL", "4"))
+# Headlines at least this similar (0-1) are treated as the same story
+NEWS_DEDUP_TITLE_SIMILARITY = float(os.getenv("NEWS_DEDUP_TITLE_SIMILARITY", "0.85"))
+# Headlines listed in a combined response
+NEWS_COMBINED_LIMIT = int(os.getenv("NEWS_COMBINED_LIMIT", "8"))
+
+# Multi-location weather requests
+WEATHER_FANOUT_MAX_PARALLEL = int(os.getenv("WEATHER_FANOUT_MAX_PARALLEL", "4"))
+# Current weather for cities with a known OpenWeather id is fetched in one group call (max 20 ids)
+WEATHER_GROUP_ENABLED = os.getenv("WEATHER_GROUP_ENABLED", "true").lower() == "true"
+# How long (seconds) a learned city name -> OpenWeather city id mapping is kept
+WEATHER_CITY_ID_TTL = int(os.getenv("WEATHER_CITY_ID_TTL", "604800"))
+
+# Messages with several requests ("weather in Phoenix and any tech news?") run their handlers concurrently
+MULTI_INTENT_ENABLED = os.getenv("MULTI_INTENT_ENABLED", "true").lower() == "true"
+MULTI_INTENT_MAX_PARALLEL = int(os.getenv("MULTI_INTENT_MAX_PARALLEL", "4"))
+# Seconds a weather/news/stocks branch may take before it is left out of the answer
+MULTI_INTENT_TASK_TIMEOUT = float(os.getenv("MULTI_INTENT_TASK_TIMEOUT", "8"))
+# Seconds the LLM branch may take before it is left out of the answer
+MULTI_INTENT_LLM_TIMEOUT = float(os.getenv("MULTI_INTENT_LLM_TIMEOUT", "30"))
+
+# Stock quotes
+# Bundled ticker symbols and company names used to resolve "Apple" to AAPL locally
+STOCK_SYMBOLS_PATH = os.getenv("STOCK_SYMBOLS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbols.csv"))
+# Quote provider: "fmp" (Financial Modeling Prep) or "fake" (deterministic local quotes, no network)
+STOCK_QUOTE_PROVIDER = os.getenv("STOCK_QUOTE_PROVIDER", "fmp")
+# How long (seconds) a quote is served from cache
+STOCK_QUOTE_CACHE_TTL = int(os.getenv("STOCK_QUOTE_CACHE_TTL", "15"))
+# Symbols requested within this many seconds of each other share one upstream call
+STOCK_BATCH_WINDOW_SECONDS = float(os.getenv("STOCK_BATCH_WINDOW_SECONDS", "0.02"))
+STOCK_BATCH_MAX_SYMBOLS = int(os.getenv("STOCK_BATCH_MAX_SYMBOLS", "50"))
+STOCK_CALLS_PER_MINUTE = int(os.getenv("STOCK_CALLS_PER_MINUTE", "30"))
+STOCK_CALLS_PER_DAY = int(os.getenv("STOCK_CALLS_PER_DAY", "250"))
+
+# Sessions: per-conversation state keyed by the client's session id (or IP when none is sent)
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+# Exchanges of a session's conversation sent to the LLM; older ones are dropped
+SESSION_HISTORY_TURNS = int(os.getenv("SESSION_HISTORY_TURNS", "20"))
+
+# Casual replies (greetings, "who are you", jokes) come from templates instead of the LLM
+ASSISTANT_NAME = os.getenv("ASSISTANT_NAME", "Chatbot Assistant")
+# Pick among several phrasings instead of always the first
+CASUAL_RESPONSE_VARIATION = os.getenv("CASUAL_RESPONSE_VARIATION", "true").lower() == "true"
+
+# Semantic cache for general LLM answers (opt-in): near-duplicate questions reuse a stored answer
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Minimum cosine similarity between prompts for a cached answer to be reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+# Prompts sent after this many earlier turns are assumed to rely on the conversation
+SEMANTIC_CACHE_MAX_HISTORY_TURNS = int(os.getenv("SEMANTIC_CACHE_MAX_HISTORY_TURNS", "10"))
+
+# Follow-ups like "what about tomorrow?" reuse the previous request's slots for this many seconds
+DIALOGUE_FOLLOW_UP_WINDOW = int(os.getenv("DIALOGUE_FOLLOW_UP_WINDOW", "600"))
+
+# Per-session preferences (home location, unit, favourite news categories) learned from earlier turns
+PREFERENCES_ENABLED = os.getenv("PREFERENCES_ENABLED", "true").lower() == "true"
+PREFERENCES_DB_PATH = os.getenv("PREFERENCES_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "preferences.db"))
+# Times a place must be asked about before it replaces the home location
+PREFERENCES_HOME_MIN_REQUESTS = int(os.getenv("PREFERENCES_HOME_MIN_REQUESTS", "3"))
+# Favourite news categories used for a plain "show me the news"
+PREFERENCES_MAX_CATEGORIES = int(os.getenv("PREFERENCES_MAX_CATEGORIES", "3"))
+# Seconds updates are batched before being written to the database (0 writes each one at once)
+PREFERENCES_FLUSH_INTERVAL = float(os.getenv("PREFERENCES_FLUSH_INTERVAL", "5"))
+# Preferences of recently active sessions kept in memory
+PREFERENCES_CACHE_TTL = int(os.getenv("PREFERENCES_CACHE_TTL", "3600"))
+PREFERENCES_CACHE_MAX = int(os.getenv("PREFERENCES_CACHE_MAX", "10000"))
+
+# Routed answers (weather, news, stocks) are given to the LLM as compact tool results on later turns
+TOOL_CONTEXT_ENABLED = os.getenv("TOOL_CONTEXT_ENABLED", "true").lower() == "true"
+# Tokens kept of each result, and of all results given to the LLM together
+TOOL_RESULT_MAX_TOKENS = int(os.getenv("TOOL_RESULT_MAX_TOKENS", "150"))
+TOOL_CONTEXT_MAX_TOKENS = int(os.getenv("TOOL_CONTEXT_MAX_TOKENS", "600"))
+# Results older than this many seconds are left out (weather and prices go stale)
+TOOL_CONTEXT_MAX_AGE = int(os.getenv("TOOL_CONTEXT_MAX_AGE", "1800"))
+# Most results kept per session
+TOOL_CONTEXT_MAX_RESULTS = int(os.getenv("TOOL_CONTEXT_MAX_RESULTS", "10"))
+
+# LLM tiering (opt-in): short, simple general prompts go to a cheaper, faster model
+LLM_TIERING_ENABLED = os.getenv("LLM_TIERING_ENABLED", "false").lower() == "true"
+LLM_STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gpt-4")
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+# Largest requests the fast model is trusted with
+LLM_FAST_MAX_PROMPT_TOKENS = int(os.getenv("LLM_FAST_MAX_PROMPT_TOKENS", "80"))
+LLM_FAST_MAX_CONTEXT_TOKENS = int(os.getenv("LLM_FAST_MAX_CONTEXT_TOKENS", "1500"))
+LLM_FAST_MAX_COMPLEXITY = int(os.getenv("LLM_FAST_MAX_COMPLEXITY", "1"))
+# Default per-session latency target in seconds (0 = none); a tier slower than this is skipped if a cheaper one meets it
+LLM_LATENCY_SLO_SECONDS = float(os.getenv("LLM_LATENCY_SLO_SECONDS", "0"))
+
+# Speculative LLM calls (opt-in): for messages no keyword matches, the LLM answer is streamed while the
+# intent classifier runs, and cancelled if the message turns out to be a weather/news/stocks request
+SPECULATIVE_LLM_ENABLED = os.getenv("SPECULATIVE_LLM_ENABLED", "false").lower() == "true"
+# Guardrails on the extra spend: largest prompt (with history) speculated on, concurrent and total speculative calls
+SPECULATIVE_MAX_TOKENS = int(os.getenv("SPECULATIVE_MAX_TOKENS", "2000"))
+SPECULATIVE_MAX_IN_FLIGHT = int(os.getenv("SPECULATIVE_MAX_IN_FLIGHT", "4"))
+SPECULATIVE_CALLS_PER_MINUTE = int(os.getenv("SPECULATIVE_CALLS_PER_MINUTE", "30"))
+SPECULATIVE_CALLS_PER_DAY = int(os.getenv("SPECULATIVE_CALLS_PER_DAY", "2000"))
+
+# LLM admission control: calls beyond LLM_MAX_IN_FLIGHT wait in a queue of LLM_MAX_QUEUE for up to
+# LLM_QUEUE_TIMEOUT seconds; anything more gets a 503 with Retry-After. The in-flight limit adapts
+# between LLM_MIN_IN_FLIGHT and LLM_MAX_IN_FLIGHT from OpenAI's rate-limit headers. Keep the in-flight
+# and queue sizes well below the server's threadpool (40 by default) so routed intents always find a thread.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+LLM_MIN_IN_FLIGHT = int(os.getenv("LLM_MIN_IN_FLIGHT", "1"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+# Request scheduling: requests expected to be cheap (routed intents, templates, cache hits) and those expected
+# to need the LLM run in separate thread lanes, each refusing new requests (503) once its queue is full
+SCHEDULER_CHEAP_WORKERS = int(os.getenv("SCHEDULER_CHEAP_WORKERS", "16"))
+SCHEDULER_CHEAP_QUEUE = int(os.getenv("SCHEDULER_CHEAP_QUEUE", "200"))
+SCHEDULER_EXPENSIVE_WORKERS = int(os.getenv("SCHEDULER_EXPENSIVE_WORKERS", "24"))
+SCHEDULER_EXPENSIVE_QUEUE = int(os.getenv("SCHEDULER_EXPENSIVE_QUEUE", "8"))
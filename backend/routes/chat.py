@@ -1,17 +1,36 @@
 from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from services.langchain_service import chat_with_memory
+from services.langchain_service import chat_with_memory, plan_request, CHEAP, EXPENSIVE
+from utils.admission import OverloadedError
+from utils.scheduler import Lane, PriorityScheduler
 from utils.logging_config import get_logger
 import os
+import math
+from config import SCHEDULER_CHEAP_WORKERS, SCHEDULER_CHEAP_QUEUE, SCHEDULER_EXPENSIVE_WORKERS, SCHEDULER_EXPENSIVE_QUEUE
 
 # Get logger for this module
 logger = get_logger(__name__)
 
 router = APIRouter()
 
+# Cheap requests get their own threads, so a burst of LLM requests cannot hold them up
+scheduler = PriorityScheduler([
+    Lane(CHEAP, SCHEDULER_CHEAP_WORKERS, SCHEDULER_CHEAP_QUEUE),
+    Lane(EXPENSIVE, SCHEDULER_EXPENSIVE_WORKERS, SCHEDULER_EXPENSIVE_QUEUE),
+], default=EXPENSIVE)
+
+def plan_and_answer_cheap(message, client_ip, **session):
+    """Plan a request and, if it is cheap, answer it on the same cheap-lane thread."""
+    plan = plan_request(message, client_ip=client_ip, **session)
+    if plan.cost != CHEAP:
+        return plan, None
+    return plan, chat_with_memory(message, client_ip=client_ip, plan=plan, **session)
+
 class ChatRequest(BaseModel):
     message: str
     test_ip: str = None  # Optional field to override IP for testing
+    session_id: str = None  # Optional conversation id; the client IP is used when omitted
 
 @router.post("/chat")
 async def chat_endpoint(request: ChatRequest, req: Request):
@@ -22,9 +41,26 @@ async def chat_endpoint(request: ChatRequest, req: Request):
     logger.debug(f"Using IP: {client_ip}")
 
     try:
-        response = chat_with_memory(request.message, client_ip=client_ip)
+        # Without a session id, chat_with_memory keys the session on the client IP
+        session = {"session_id": request.session_id} if request.session_id else {}
+        # Run the blocking handler in the lane for its expected cost so concurrent
+        # requests can overlap (and identical upstream lookups can be coalesced).
+        # Cheap requests are answered where they are planned; the rest move to their own lane.
+        plan, response = await scheduler.run(CHEAP, plan_and_answer_cheap, request.message, client_ip, **session)
+        if plan.cost != CHEAP:
+            response = await scheduler.run(
+                plan.cost, chat_with_memory, request.message, client_ip=client_ip, plan=plan, **session
+            )
         logger.info(f"OpenAI Response: {response}")
         return {"response": response}
+    except OverloadedError as e:
+        # Shed load quickly instead of letting requests pile up behind a saturated LLM
+        logger.warning(f"Chat request shed: {str(e)}")
+        return JSONResponse(
+            status_code=503,
+            content={"error": "The assistant is busy, please try again shortly"},
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}", exc_info=True)
         return {"error": "Internal Server Error"}
\ No newline at end of file
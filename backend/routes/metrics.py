@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from utils.metrics import metrics
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+@router.get("/metrics")
+def metrics_endpoint():
+    """Expose in-process counters and gauges (upstream budgets, etc.) as JSON."""
+    logger.debug("Metrics endpoint accessed")
+    return metrics.snapshot()
@@ -0,0 +1,248 @@
+import os
+import sys
+import asyncio
+import time
+from collections import deque
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from utils.rate_limiter import QuotaExceededError, BACKGROUND
+from config import (
+    DEFAULT_WEATHER_LOCATION,
+    CACHE_WARMING_CALLS_PER_MINUTE,
+    CACHE_WARMING_TOP_N,
+    CACHE_WARMING_LEAD_SECONDS,
+    CACHE_WARMING_INTERVAL_SECONDS,
+    CACHE_WARMING_MAX_BACKOFF_SECONDS,
+    CACHE_WARMING_NEWS_DAILY_SHARE,
+    NEWSAPI_CALLS_PER_DAY,
+)
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Seconds in the day a daily call allowance is spread over
+DAY_SECONDS = 24 * 60 * 60
+
+class WarmTarget:
+    """A cache the warmer keeps hot, with the function used to reload one key"""
+
+    def __init__(self, name, cache, refresh, pinned=(), calls_per_day=None, skip=None):
+        self.name = name
+        self.cache = cache
+        self.refresh = refresh
+        self.pinned = list(pinned)
+        # Refreshes are spaced evenly so the target never spends more than calls_per_day
+        self.spacing = DAY_SECONDS / calls_per_day if calls_per_day else 0
+        self.skip = skip or (lambda key: False)
+        self.next_call_at = 0.0
+
+class CacheWarmer:
+    """
+    Keeps popular cache entries hot by reloading them shortly before expiry.
+
+    Popularity comes from each cache's recent request counts; pinned keys (the
+    default weather location, the top headlines) are always kept warm. Upstream
+    refreshes are capped by a per-minute call budget shared by all targets, and
+    a target with a daily allowance is refreshed no more often than it allows.
+    Keys whose refresh keeps failing are retried with exponential backoff.
+    """
+
+    def __init__(self, calls_per_minute=CACHE_WARMING_CALLS_PER_MINUTE, top_n=CACHE_WARMING_TOP_N,
+                 lead_seconds=CACHE_WARMING_LEAD_SECONDS, interval=CACHE_WARMING_INTERVAL_SECONDS,
+                 max_backoff=CACHE_WARMING_MAX_BACKOFF_SECONDS):
+        self.calls_per_minute = calls_per_minute
+        self.top_n = top_n
+        self.lead_seconds = lead_seconds
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.targets = {}
+        self._recent_calls = deque()
+        # (target name, key) -> (consecutive failures, time before which the key is not retried)
+        self._failures = {}
+        self._task = None
+        self.refreshed = 0
+        self.failed = 0
+        self.deferred = 0
+
+    def register(self, name, cache, refresh, pinned=(), calls_per_day=None, skip=None):
+        """
+        Register a cache to keep warm.
+
+        Args:
+            name (str): Target name used in logs
+            cache (TTLCache): The cache to keep warm
+            refresh (callable): Takes a cache key and returns the fresh value
+            pinned (iterable): Keys warmed regardless of observed popularity
+            calls_per_day (int, optional): Most refreshes of this target per day
+            skip (callable, optional): Takes a cache key and returns True if it should not be warmed
+        """
+        self.targets[name] = WarmTarget(name, cache, refresh, pinned, calls_per_day, skip)
+        logger.info(f"Registered cache warming target '{name}' with {len(self.targets[name].pinned)} pinned key(s)")
+
+    def _budget_available(self, now):
+        while self._recent_calls and now - self._recent_calls[0] >= 60:
+            self._recent_calls.popleft()
+        return len(self._recent_calls) < self.calls_per_minute
+
+    def due_keys(self, now=None):
+        """
+        List (target, key) pairs that are missing or expire within the lead time.
+
+        Pinned keys come first, then keys in order of recent popularity. Keys
+        the target skips and keys backing off after failures are left out.
+
+        Returns:
+            list: (WarmTarget, key) tuples, most important first
+        """
+        now = now if now is not None else time.time()
+        due = []
+        for target in self.targets.values():
+            candidates = list(target.pinned)
+            for key in target.cache.popular_keys(self.top_n):
+                if key not in candidates:
+                    candidates.append(key)
+            for key in candidates:
+                failures = self._failures.get((target.name, key))
+                if (failures and now < failures[1]) or target.skip(key):
+                    continue
+                entry = target.cache.get_entry(key)
+                if entry is None or entry.expires_at - now <= self.lead_seconds:
+                    due.append((target, key))
+        return due
+
+    def run_once(self):
+        """
+        Refresh due entries until the per-minute budget is spent.
+
+        Returns:
+            int: Number of entries refreshed
+        """
+        refreshed = 0
+        for target, key in self.due_keys():
+            now = time.time()
+            if now < target.next_call_at:
+                continue
+            if not self._budget_available(now):
+                logger.debug("Cache warming budget exhausted for this minute")
+                break
+            self._recent_calls.append(now)
+            target.next_call_at = now + target.spacing
+            try:
+                target.cache.refresh(key, lambda: target.refresh(key))
+                refreshed += 1
+                self.refreshed += 1
+                self._failures.pop((target.name, key), None)
+                logger.debug(f"Warmed {target.name} entry {key!r}")
+            except QuotaExceededError:
+                # Upstream budget is reserved for user-facing requests
+                self.deferred += 1
+                logger.debug(f"Deferred warming {target.name} entry {key!r}: upstream budget reserved")
+            except Exception as e:
+                self.failed += 1
+                backoff = self._record_failure(target, key, now)
+                logger.warning(f"Failed to warm {target.name} entry {key!r}, retrying in {backoff:.0f}s: {str(e)}")
+        if refreshed:
+            logger.info(f"Cache warmer refreshed {refreshed} entr{'y' if refreshed == 1 else 'ies'}")
+        return refreshed
+
+    def _record_failure(self, target, key, now):
+        """Back a failing key off exponentially from one interval up to max_backoff; returns the delay."""
+        count = self._failures.get((target.name, key), (0, 0))[0] + 1
+        backoff = min(self.max_backoff, self.interval * 2 ** count)
+        self._failures[(target.name, key)] = (count, now + backoff)
+        return backoff
+
+    async def run(self):
+        """Refresh due entries forever, off the event loop, every `interval` seconds."""
+        logger.info(f"Cache warmer started (budget: {self.calls_per_minute} calls/min, interval: {self.interval}s)")
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logger.error(f"Cache warming pass failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Schedule the warming loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        """Cancel the warming loop and wait for it to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Cache warmer stopped")
+
+def _refresh_headlines(key):
+    """Reload one headlines entry, raising so failed refreshes are not counted as warm."""
+    from services.news_service import NewsService
+
+    country, category, query, page_size = key
+    data = NewsService.get_top_headlines(
+        country=country, category=category, query=query, page_size=page_size, priority=BACKGROUND
+    )
+    if "error" in data:
+        raise RuntimeError(data["error"])
+    return data
+
+def _unknown_city(key):
+    """True for weather keys whose city OpenWeather recently answered 404 for."""
+    from services.weather_service import unknown_city_cache
+
+    entry = unknown_city_cache.get_entry(key[0])
+    return entry is not None and entry.is_fresh()
+
+def register_default_targets(warmer):
+    """
+    Register the weather and news caches with their pinned keys.
+    Upstreams without a configured API key are skipped.
+
+    NewsAPI's daily quota is small, so news warming gets only
+    CACHE_WARMING_NEWS_DAILY_SHARE of it, spread over the day, and pins
+    just the top headlines.
+
+    Args:
+        warmer (CacheWarmer): The warmer to configure
+    """
+    from services import weather_service, news_service
+
+    if weather_service.WEATHER_API_KEY:
+        weather_pins = []
+        if DEFAULT_WEATHER_LOCATION:
+            weather_pins.append(weather_service._weather_key(DEFAULT_WEATHER_LOCATION, "imperial"))
+        warmer.register(
+            "weather.current", weather_service.current_weather_cache,
+            lambda key: weather_service.fetch_current_weather_data(*key, priority=BACKGROUND),
+            pinned=weather_pins, skip=_unknown_city
+        )
+        warmer.register(
+            "weather.forecast", weather_service.forecast_cache,
+            lambda key: weather_service.fetch_forecast_weather_data(*key, priority=BACKGROUND),
+            pinned=weather_pins, skip=_unknown_city
+        )
+    else:
+        logger.warning("WEATHER_API_KEY not set, weather cache warming disabled")
+
+    news_calls_per_day = int(NEWSAPI_CALLS_PER_DAY * CACHE_WARMING_NEWS_DAILY_SHARE)
+    if not news_service.NEWS_API_KEY:
+        logger.warning("NEWS_API_KEY not set, news cache warming disabled")
+    elif news_calls_per_day < 1:
+        logger.info("No NewsAPI calls set aside for warming, news cache warming disabled")
+    else:
+        warmer.register(
+            "news.headlines", news_service.headlines_cache, _refresh_headlines,
+            pinned=[news_service._headlines_key()], calls_per_day=news_calls_per_day
+        )
+
+# Shared warmer instance started by the application
+cache_warmer = CacheWarmer()
@@ -0,0 +1,190 @@
+import os
+import re
+import sys
+import random
+from string import Template
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from config import ASSISTANT_NAME, CASUAL_RESPONSE_VARIATION
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Kinds of casual message and the phrases that identify them, in the order they are tried
+# ("call me" only counts as an introduction at the end of the message: "call me Sam", not "call me later")
+CASUAL_PATTERNS = [
+    ("introduction", r"\b(?:my name is|my name's)\s+(?P<name>[a-z][a-z'-]{0,30})"
+                     r"|\bcall me\s+(?P<called>[a-z][a-z'-]{0,30})(?=[\s.!]*$)"),
+    ("greeting", r"\b(?:hello|hi|hey|howdy|greetings|good (?:morning|afternoon|evening))\b"),
+    ("how_are_you", r"\bhow are you\b|\bhow's it going\b|\bhow are things\b"),
+    ("identity", r"\bwho are you\b|\bwhat are you\b"),
+    ("assistant_name", r"\byour name\b"),
+    ("thanks", r"\bthanks\b|\bthank you\b|\bcheers\b"),
+    ("goodbye", r"\b(?:good ?bye|bye|see you)\b"),
+    ("joke", r"\bjokes?\b"),
+]
+
+# One alternation with a named group per kind, so a message is scanned once
+CASUAL_REGEX = re.compile(
+    "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in CASUAL_PATTERNS), re.IGNORECASE
+)
+
+# Words that follow "my name is" or "call me" without being a name
+NOT_NAMES = frozenset({
+    "not", "no", "none", "nothing", "unknown", "important", "irrelevant", "secret", "private", "whatever",
+    "later", "soon", "now", "back", "anytime", "tomorrow", "today", "tonight", "maybe", "please",
+    "a", "an", "the", "just", "also", "actually", "really", "still", "going", "here", "there",
+    "and", "or", "but", "so", "if", "when", "what", "is", "was", "in", "on", "at", "too", "different",
+})
+
+# Words that may surround casual phrases without asking anything more ("thanks so much", "hi there")
+FILLER_WORDS = frozenset({
+    "a", "again", "all", "also", "am", "and", "buddy", "doing", "everyone", "folks", "for", "friend",
+    "guys", "i", "is", "it", "it's", "me", "much", "oh", "ok", "okay", "please", "really", "so", "tell",
+    "the", "there", "today", "too", "up", "very", "well", "what", "what's", "you", "yours",
+} | set(ASSISTANT_NAME.lower().split()))
+
+# Reply templates per kind; $name_suffix is ", Sam" once the user's name is known
+CASUAL_TEMPLATES = {
+    "greeting": [
+        "Hello$name_suffix! How can I help you today?",
+        "Hi$name_suffix! What can I do for you?",
+        "Hey$name_suffix! Ask me about the weather, the news or stocks.",
+    ],
+    # Used when the greeting is followed by something else to answer
+    "greeting_short": ["Hello$name_suffix!", "Hi$name_suffix!", "Hey$name_suffix!"],
+    "greeting_again": [
+        "Welcome back$name_suffix! What can I help with?",
+        "Hello again$name_suffix! What would you like to know?",
+    ],
+    "introduction": ["Nice to meet you, $name!", "Great to meet you, $name!"],
+    "how_are_you": [
+        "I'm doing well, thanks for asking! How can I help?",
+        "All good here, thanks! What can I do for you?",
+    ],
+    "identity": [
+        "I'm $assistant, a chatbot that can check the weather, the latest news and stock prices, or just chat.",
+    ],
+    "assistant_name": ["My name is $assistant."],
+    "thanks": ["You're welcome$name_suffix!", "Happy to help$name_suffix!", "Any time$name_suffix!"],
+    "goodbye": ["Goodbye$name_suffix! Come back any time.", "See you later$name_suffix!"],
+    "joke": [
+        "Why don't scientists trust atoms? Because they make up everything.",
+        "I told my computer I needed a break, and it said: \"No problem, I'll go to sleep.\"",
+        "Why did the weather report break up with the forecast? It needed more space to clear its head.",
+        "Why do programmers prefer dark mode? Because light attracts bugs.",
+    ],
+}
+
+# Templates are parsed once at import
+COMPILED_TEMPLATES = {kind: [Template(text) for text in texts] for kind, texts in CASUAL_TEMPLATES.items()}
+
+_random = random.Random()
+
+def match_casual(user_message):
+    """
+    Find the casual kinds of a message made only of casual phrases, in the order they appear.
+
+    Anything beyond the phrases, filler words and punctuation is a question
+    for the LLM ("hi, what is the capital of France?"), so such messages match
+    nothing. A name is only taken from an introduction when it looks like one.
+
+    Args:
+        user_message (str): The user's input message
+
+    Returns:
+        tuple: (list of kinds without duplicates, name the user introduced or None);
+               no kinds unless the casual phrases cover the whole message
+    """
+    kinds, name, rest = [], None, []
+    position = 0
+    for match in CASUAL_REGEX.finditer(user_message):
+        kind = "introduction" if match.lastgroup in ("name", "called") else match.lastgroup
+        if kind == "introduction":
+            given = match.group("name") or match.group("called")
+            if given.lower() in NOT_NAMES:
+                continue
+            name = given.capitalize()
+        rest.append(user_message[position:match.start()])
+        position = match.end()
+        if kind not in kinds:
+            kinds.append(kind)
+    rest.append(user_message[position:])
+    words = re.findall(r"[a-z0-9'+*/=-]+", " ".join(rest).lower())
+    if any(word not in FILLER_WORDS for word in words):
+        return [], None
+    return kinds, name
+
+def _choose(kind, session):
+    """Pick a template for a kind, avoiding the one this session got last time."""
+    templates = COMPILED_TEMPLATES[kind]
+    if not CASUAL_RESPONSE_VARIATION or len(templates) == 1:
+        return templates[0]
+    last = session.profile.get("last_casual", {}).get(kind) if session else None
+    index = _random.choice([i for i in range(len(templates)) if i != last])
+    if session:
+        session.profile.setdefault("last_casual", {})[kind] = index
+    return templates[index]
+
+def respond_casual(user_message, session=None):
+    """
+    Answer a casual message from the template table, without calling the LLM.
+
+    Greetings, "who are you", thanks, jokes and the like each have a handful of
+    templates; several in one message are answered in order. With a session,
+    a name the user gives ("my name is Sam") is remembered and used in later
+    replies, and repeat greetings are answered as such.
+
+    Args:
+        user_message (str): The user's input message
+        session (Session, optional): The conversation's session
+
+    Returns:
+        str or None: The reply, or None unless the message is only casual phrases
+    """
+    kinds, name = match_casual(user_message)
+    if not kinds:
+        return None
+
+    profile = session.profile if session else {}
+    if name:
+        profile["name"] = name
+    # An introduction already greets by name
+    if "introduction" in kinds and "greeting" in kinds:
+        kinds.remove("greeting")
+    if "greeting" in kinds:
+        if len(kinds) > 1:
+            kinds[kinds.index("greeting")] = "greeting_short"
+        elif profile.get("greetings"):
+            kinds[0] = "greeting_again"
+        profile["greetings"] = profile.get("greetings", 0) + 1
+
+    known_name = profile.get("name")
+    values = {
+        "name": known_name or "",
+        "name_suffix": f", {known_name}" if known_name else "",
+        "assistant": ASSISTANT_NAME,
+    }
+    response = " ".join(_choose(kind, session).safe_substitute(values) for kind in kinds)
+    logger.debug(f"Answered casual message from templates: {kinds}")
+    return response
+
+# --- TEST FUNCTION ---
+def test_casual_service():
+    from services.session_service import get_session
+    logger.info("Starting casual service test")
+    session = get_session("casual-test")
+    for message in ["Hello!", "My name is Sam", "Who are you?", "Tell me a joke", "Hi again", "Thanks, bye"]:
+        logger.info(f"{message} -> {respond_casual(message, session)}")
+    logger.info("Casual service test completed")
+
+if __name__ == "__main__":
+    # Import and setup logging when running this file directly
+    from utils.logging_config import setup_logging
+    import logging
+    setup_logging(logging.DEBUG)
+    test_casual_service()
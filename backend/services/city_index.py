@@ -0,0 +1,218 @@
+import os
+import sys
+import threading
+from collections import defaultdict
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from utils.gazetteer import Gazetteer, build_gazetteer, normalize_name
+from config import GAZETTEER_PATH
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Bundled list of place names, one per line; compiled into the gazetteer
+CITY_LIST_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "cities.txt")
+
+# Place names in the city list that are also everyday words ("Nice weather", "Surprise me");
+# they only count as places after a location indicator such as "in" or "for"
+AMBIGUOUS_PLACE_NAMES = frozenset({"nice", "mobile", "page", "surprise", "globe"})
+
+def normalize_city(name):
+    """
+    Normalize a city name for lookups: lowercase, single spaces, no surrounding punctuation.
+
+    Args:
+        name (str): Raw city name
+
+    Returns:
+        str: Normalized name
+    """
+    return normalize_name(name)
+
+def _trigrams(name):
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit=None):
+    """
+    Edit distance between two strings, counting an adjacent transposition as one edit.
+
+    Args:
+        a (str): First string
+        b (str): Second string
+        limit (int, optional): Stop early and return limit + 1 once the distance exceeds it
+
+    Returns:
+        int: Number of single-character edits
+    """
+    if a == b:
+        return 0
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+class CityIndex:
+    """
+    In-memory index of known city names with fuzzy lookup.
+
+    Exact matches are a dict lookup. Near-misses are found by trigram overlap
+    to pick a short candidate list, then ranked by edit distance.
+    """
+
+    def __init__(self, names):
+        self._canonical = {}
+        self._by_trigram = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        """Add a city name (display form) to the index."""
+        key = normalize_city(name)
+        if not key or key in self._canonical:
+            return
+        self._canonical[key] = name if name != key else name.title()
+        for gram in _trigrams(key):
+            self._by_trigram[gram].add(key)
+
+    def __contains__(self, name):
+        return normalize_city(name) in self._canonical
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def canonical(self, name):
+        """Return the display form of an exactly-known city, or None."""
+        return self._canonical.get(normalize_city(name))
+
+    def closest(self, name, max_candidates=20):
+        """
+        Find the known city closest to name within an edit-distance budget.
+
+        One edit is allowed for names of 4+ characters and two for 10+; shorter
+        names must match exactly. Ties are treated as ambiguous and return None.
+
+        Args:
+            name (str): Possibly misspelled city name
+            max_candidates (int): Trigram candidates to score with edit distance
+
+        Returns:
+            str or None: Display form of the best match
+        """
+        key = normalize_city(name)
+        if key in self._canonical:
+            return self._canonical[key]
+
+        allowed = 2 if len(key) >= 10 else 1 if len(key) >= 4 else 0
+        if not allowed:
+            return None
+
+        overlap = defaultdict(int)
+        for gram in _trigrams(key):
+            for candidate in self._by_trigram.get(gram, ()):
+                overlap[candidate] += 1
+        candidates = sorted(overlap, key=overlap.get, reverse=True)[:max_candidates]
+
+        scored = sorted((edit_distance(key, c, allowed), c) for c in candidates)
+        scored = [(d, c) for d, c in scored if d <= allowed]
+        if not scored or (len(scored) > 1 and scored[0][0] == scored[1][0]):
+            return None
+        return self._canonical[scored[0][1]]
+
+def load_city_names(path=CITY_LIST_PATH):
+    """
+    Read the bundled city list, skipping blank lines and comments.
+
+    Args:
+        path (str): Path to the city list
+
+    Returns:
+        list: City names
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except OSError as e:
+        logger.error(f"Failed to load city list from {path}: {str(e)}")
+        return []
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer(path=GAZETTEER_PATH, source=CITY_LIST_PATH):
+    """
+    Return the shared memory-mapped gazetteer, compiling it first if the file
+    is missing or older than the bundled city list.
+
+    Args:
+        path (str): Compiled gazetteer file
+        source (str): Plain-text city list it is built from
+
+    Returns:
+        Gazetteer: The opened gazetteer
+    """
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                stale = not os.path.exists(path) or (
+                    os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(path)
+                )
+                if stale:
+                    logger.info(f"Compiling gazetteer {path} from {source}")
+                    build_gazetteer(load_city_names(source), path)
+                _gazetteer = Gazetteer(path)
+                logger.info(f"Opened gazetteer {path} with {len(_gazetteer)} names")
+    return _gazetteer
+
+_city_index = None
+
+def get_city_index():
+    """Return the shared fuzzy CityIndex over the gazetteer names, building it on first use."""
+    global _city_index
+    if _city_index is None:
+        _city_index = CityIndex(get_gazetteer().names())
+        logger.info(f"Built city index with {len(_city_index)} names")
+    return _city_index
+
+def resolve_city(name):
+    """
+    Resolve a user-supplied city name against the local index.
+
+    Unambiguous near-misses are returned in their canonical spelling; known
+    and unknown names are returned unchanged, so the weather API can still be
+    asked about places missing from the bundled list.
+
+    Args:
+        name (str): City name as typed or extracted
+
+    Returns:
+        str: The corrected or original name
+    """
+    # Exact names are answered by the gazetteer without building the fuzzy index
+    if get_gazetteer().get(name):
+        return name
+    match = get_city_index().closest(name)
+    if match and normalize_city(match) != normalize_city(name):
+        logger.info(f"Corrected city name '{name}' to '{match}'")
+        return match
+    return name
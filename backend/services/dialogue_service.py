@@ -0,0 +1,189 @@
+import os
+import re
+import sys
+import time
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from utils.gazetteer import normalize_name
+from services.intent_service import (
+    match_intent_keywords, detect_time_period, detect_temperature_unit, detect_news_categories, NEWS_CATEGORIES
+)
+from services.city_index import get_gazetteer, AMBIGUOUS_PLACE_NAMES
+from services.response_cache import REFERENCE_WORDS
+from config import DIALOGUE_FOLLOW_UP_WINDOW
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Intents whose slots are kept for follow-ups
+FOLLOW_UP_INTENTS = ("weather", "news")
+
+# Openings of an elliptical follow-up: "what about tomorrow?", "and in Denver?", "ok, how about celsius"
+FOLLOW_UP_OPENING = re.compile(
+    r"^(?:(?:ok|okay|and|so)\s*,?\s+)?(?:what about|how about|what of|same for|and)\b[\s,]*", re.IGNORECASE
+)
+
+# Follow-ups without an opening ("tomorrow?", "in celsius") are this short
+MAX_FOLLOW_UP_WORDS = 4
+
+# Longest place name, in words, looked up in the gazetteer
+MAX_PLACE_WORDS = 4
+
+# Words that introduce a place, so lowercase names after them still count ("in mesa")
+PLACE_INDICATORS = {"in", "for", "at", "near"}
+
+# Leftover words that are not part of a place or news topic
+FILLER_WORDS = {"in", "for", "at", "near", "the", "on", "about", "then", "instead", "please", "there"}
+
+# Words a bare weather follow-up ("this evening in celsius") may consist of besides places and days
+WEATHER_SLOT_WORDS = {
+    "this", "next", "later", "today", "tonight", "tomorrow", "evening", "week", "day", "days", "now",
+    "celsius", "fahrenheit", "centigrade", "degrees", "c", "f", "and",
+}
+
+# Words that cannot be a news topic on their own: "and you?", "what about it", "and tomorrow?"
+NOT_TOPIC_WORDS = REFERENCE_WORDS | {
+    "you", "your", "yours", "yourself", "me", "my", "mine", "i", "we", "us", "our", "what", "why", "how",
+    "everything", "anything", "something", "nothing", "one", "ones", "all", "ok", "okay", "yes", "no",
+    "today", "tonight", "tomorrow", "yesterday", "week", "weekend", "morning", "afternoon", "evening",
+    "now", "later", "next", "last", "this", "monday", "tuesday", "wednesday", "thursday", "friday",
+    "saturday", "sunday",
+}
+
+def remember_dialogue(session, intent, **slots):
+    """
+    Record the intent and slots of the request just answered, for follow-ups.
+
+    Args:
+        session (Session or None): The conversation's session
+        intent (str): Intent answered
+        **slots: Values used to answer, e.g. locations, unit, time_period
+    """
+    if session is None:
+        return
+    with session.lock:
+        session.dialogue = {"intent": intent, "slots": dict(slots), "updated_at": time.time()}
+
+def _find_place(text, opening):
+    """
+    Find a place name in a follow-up without running NLP.
+
+    Known places come from the gazetteer, longest first; like the entity
+    matcher, a lowercase name or one that is also an everyday word only
+    counts after "in", "for"... After an
+    explicit opening ("what about Paris?"), a run of capitalized words is
+    taken as a place even if it is not in the gazetteer.
+    """
+    tokens = re.findall(r"[A-Za-z][A-Za-z.'-]*", text)
+    gazetteer = get_gazetteer()
+    for i, token in enumerate(tokens):
+        indicated = i > 0 and tokens[i - 1].lower() in PLACE_INDICATORS
+        if not (token[0].isupper() or indicated):
+            continue
+        for length in range(min(MAX_PLACE_WORDS, len(tokens) - i), 0, -1):
+            name = " ".join(tokens[i:i + length])
+            # "Nice" or "Page" only name a place after "in", "for"...
+            if not indicated and normalize_name(name) in AMBIGUOUS_PLACE_NAMES:
+                continue
+            place = gazetteer.get(name)
+            if place:
+                return place
+    if opening:
+        capitalized = re.search(r"\b[A-Z][A-Za-z.'-]*(?:\s+[A-Z][A-Za-z.'-]*)*", text)
+        if capitalized:
+            return capitalized.group(0)
+    return None
+
+def _weather_slots(text, opening, slots):
+    """Weather slots after applying what a follow-up changes, or None if it changes nothing."""
+    changed = {}
+    time_period, _ = detect_time_period(text)
+    if time_period:
+        changed["time_period"] = time_period
+    unit = detect_temperature_unit(f" {text} ")
+    if unit:
+        changed["unit"] = unit
+    # "what about Monday" names a day, not a place
+    place = _find_place(text, opening and not changed)
+    if place:
+        changed["locations"] = [place]
+    if not changed:
+        return None
+    if not opening:
+        # Without "what about..." the message must be nothing but slot values ("tomorrow in celsius"),
+        # so "tell me about Paris" is not mistaken for a weather follow-up
+        place_words = set(normalize_name(place).split()) if place else set()
+        leftover = [
+            word for word in re.findall(r"[a-z']+", text.lower())
+            if word not in place_words and word not in WEATHER_SLOT_WORDS and word not in FILLER_WORDS
+            and word != time_period
+        ]
+        if leftover:
+            return None
+    return {**slots, **changed}
+
+def _news_slots(text, opening, slots):
+    """News slots after applying what a follow-up changes, or None if it changes nothing."""
+    categories = detect_news_categories(text)
+    if categories and not opening:
+        # Without "what about..." only bare categories count ("tech?", "and sports"), not "I love sports"
+        keywords = {word for category in categories for keyword in NEWS_CATEGORIES[category] for word in keyword.split()}
+        words = re.findall(r"[a-z&']+", text.lower())
+        if any(word not in keywords and word[:-1] not in keywords and word not in FILLER_WORDS | {"and", "news"}
+               for word in words):
+            return None
+    if categories:
+        return {**slots, "categories": categories, "queries": []}
+    if opening:
+        words = [word.lower() for word in re.findall(r"[\w'&-]+", text) if word.lower() not in FILLER_WORDS]
+        # Pronouns and time words leave the conversation to casual or general handling
+        if words and not all(word in NOT_TOPIC_WORDS for word in words):
+            return {**slots, "queries": [" ".join(words)]}
+    return None
+
+def resolve_follow_up(user_message, session):
+    """
+    Resolve an elliptical follow-up ("what about tomorrow?") against the last request.
+
+    Only the slots the message mentions are replaced (time period, unit,
+    place for weather; category or topic for news); the rest carry over.
+    Messages naming another intent, long messages without a follow-up
+    opening and follow-ups to requests older than DIALOGUE_FOLLOW_UP_WINDOW
+    are not treated as follow-ups.
+
+    Args:
+        user_message (str): The user's input message
+        session (Session or None): The conversation's session
+
+    Returns:
+        tuple or None: (intent, slots) to answer with, or None if this is not a follow-up
+    """
+    if session is None:
+        return None
+    with session.lock:
+        state = session.dialogue
+    if not state or state["intent"] not in FOLLOW_UP_INTENTS:
+        return None
+    if time.time() - state["updated_at"] > DIALOGUE_FOLLOW_UP_WINDOW:
+        return None
+
+    text = user_message.strip().rstrip("?!. ")
+    opening = FOLLOW_UP_OPENING.match(text)
+    remainder = text[opening.end():] if opening else text
+    if not remainder or (not opening and len(remainder.split()) > MAX_FOLLOW_UP_WORDS):
+        return None
+    if match_intent_keywords(remainder) not in (None, state["intent"]):
+        return None
+
+    if state["intent"] == "weather":
+        slots = _weather_slots(remainder, bool(opening), state["slots"])
+    else:
+        slots = _news_slots(remainder, bool(opening), state["slots"])
+    if slots is None:
+        return None
+    logger.info(f"Resolved follow-up to {state['intent']} with slots {slots}")
+    return state["intent"], slots
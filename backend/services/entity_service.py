@@ -8,7 +8,12 @@ if __name__ == "__main__":
 # Now import modules that depend on the 'backend' package
 import spacy
 import logging
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Span
+from spacy.util import filter_spans
 from utils.logging_config import get_logger
+from services.city_index import get_gazetteer, AMBIGUOUS_PLACE_NAMES
 
 # Get logger for this module
 logger = get_logger(__name__)
@@ -20,18 +25,70 @@ try:
 except Exception as e:
     logger.error(f"Failed to load spaCy model: {str(e)}")
     raise
-# Common city names that might be misclassified as PERSON
-COMMON_CITY_NAMES = [
-    "mesa", "chandler", "gilbert", "tempe", "scottsdale", "glendale", 
-    "peoria", "surprise", "avondale", "goodyear", "buckeye", "casa grande",
-    "flagstaff", "prescott", "kingman", "bullhead city", "lake havasu city",
-    "yuma", "sierra vista", "sedona", "paradise valley", "fountain hills",
-    "oro valley", "marana", "sahuarita", "queen creek", "apache junction",
-    "maricopa", "eloy", "coolidge", "florence", "globe", "miami", "payson",
-    "show low", "snowflake", "winslow", "holbrook", "page", "williams",
-    "cottonwood", "camp verde", "wickenburg", "parker", "bisbee", "douglas",
-    "nogales", "safford", "thatcher", "clifton", "willcox", "benson", "tombstone"
-]
+
+# Words that introduce a location, e.g. "in Phoenix", "for Casa Grande"
+LOCATION_INDICATORS = {"in", "for", "at", "near"}
+
+# Span group holding the known places found in a message
+KNOWN_PLACES_KEY = "known_places"
+
+class KnownPlacesMatcher:
+    """
+    Pipeline component tagging places from the gazetteer in the same pass as NER.
+
+    A PhraseMatcher compiled once from the gazetteer finds every known place name;
+    lowercase matches only count after a location indicator ("in mesa"), so everyday
+    words that double as town names ("page", "surprise") are not picked up. At the
+    start of a sentence capitalization says nothing, so a match there also needs the
+    tagger to read it as a proper noun ("Mesa weather" but not "Nice weather"), and
+    names in AMBIGUOUS_PLACE_NAMES always need an indicator ("weather in Nice"). Matches
+    are stored in doc.spans["known_places"], and when called with tag_entities=True
+    they also become GPE entities, replacing overlapping NER labels such as PERSON.
+    """
+
+    def __init__(self, nlp, gazetteer):
+        """
+        Args:
+            nlp (Language): The pipeline whose vocab and tokenizer are used
+            gazetteer (Gazetteer): Known place names
+        """
+        self.gazetteer = gazetteer
+        self.matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        self.matcher.add("GPE", list(nlp.tokenizer.pipe(gazetteer.names())))
+
+    def __call__(self, doc, tag_entities=False):
+        places = []
+        for _, start, end in self.matcher(doc):
+            if self._is_place(doc, start, end):
+                # kb_id carries the gazetteer spelling, e.g. "casa grande" -> "Casa Grande"
+                canonical = self.gazetteer.get(doc[start:end].text) or ""
+                places.append(Span(doc, start, end, label="GPE", kb_id=canonical))
+        # Longest match wins, e.g. "Lake Havasu City" over a shorter overlapping name
+        places = filter_spans(places)
+        doc.spans[KNOWN_PLACES_KEY] = places
+        if tag_entities and places:
+            # Known places are listed first so they win ties against NER spans of the same length
+            doc.ents = filter_spans(places + list(doc.ents))
+        return doc
+
+    @staticmethod
+    def _is_place(doc, start, end):
+        """Whether a gazetteer match is used as a place name rather than an everyday word."""
+        first = doc[start]
+        if start > 0 and doc[start - 1].lower_ in LOCATION_INDICATORS:
+            return True
+        if doc[start:end].text.lower() in AMBIGUOUS_PLACE_NAMES:
+            return False
+        if not (first.is_title or first.is_upper):
+            return False
+        # Without a tagger (pos_ unset) capitalization is all there is to go on
+        return not first.is_sent_start or first.pos_ in ("PROPN", "")
+
+@Language.factory("known_places")
+def create_known_places(nlp, name):
+    return KnownPlacesMatcher(nlp, get_gazetteer())
+
+nlp.add_pipe("known_places", last=True)
 
 def extract_entities(user_message, intent=None):
     """
@@ -50,7 +107,8 @@ def extract_entities(user_message, intent=None):
     if intent:
         logger.debug(f"Using provided intent for context-aware entity extraction: {intent}")
     
-    doc = nlp(user_message)
+    # Known places are only promoted to GPE entities for weather messages
+    doc = nlp(user_message, component_cfg={"known_places": {"tag_entities": intent == "weather"}})
     
     entities = {
         "GPE": [],  # Location (City, Country, etc.)
@@ -63,39 +121,11 @@ def extract_entities(user_message, intent=None):
     # First, collect all entities as normal
     for ent in doc.ents:
         if ent.label_ in entities:
-            entities[ent.label_].append(ent.text)  # Store all occurrences
+            entities[ent.label_].append(ent.kb_id_ or ent.text)  # Store all occurrences
             logger.debug(f"Found entity: {ent.text} ({ent.label_})")
     
     # For weather intent, perform additional entity extraction
     if intent == "weather":
-        # Check if we have any PERSON entities that might actually be cities
-        person_entities = entities["PERSON"].copy()  # Create a copy to avoid modification during iteration
-        for person in person_entities:
-            if person.lower() in COMMON_CITY_NAMES:
-                logger.info(f"Reclassifying '{person}' from PERSON to GPE based on common city names list")
-                entities["GPE"].append(person)
-                # Remove from PERSON list
-                entities["PERSON"].remove(person)
-        
-        # If still no GPE, look for city names in the message text
-        if not entities["GPE"]:
-            message_lower = user_message.lower()
-            
-            # Look for patterns like "in X", "for X", "at X" where X might be a city
-            location_indicators = ["in ", "for ", "at ", "near "]
-            for indicator in location_indicators:
-                if indicator in message_lower:
-                    parts = message_lower.split(indicator, 1)
-                    if len(parts) > 1:
-                        potential_location = parts[1].strip().split()[0]  # Get first word after indicator
-                        
-                        # Check if it's in our common city names list
-                        for city in COMMON_CITY_NAMES:
-                            if city.startswith(potential_location) or potential_location.startswith(city):
-                                logger.info(f"Found potential city '{city}' in message text")
-                                entities["GPE"].append(city.title())  # Add with proper capitalization
-                                break
-        
         # Simple time period detection for common phrases
         message_lower = user_message.lower()
         
@@ -1,5 +1,7 @@
 import os
 import sys
+import ipaddress
+import threading
 import requests
 
 # Add the project root directory to Python path when running directly
@@ -7,13 +9,83 @@ if __name__ == "__main__":
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.logging_config import get_logger
+from utils.singleflight import coalesce
+from utils.ttl_cache import TTLCache
+from utils.ip_ranges import IPRangeTable, build_ip_table
+from config import (
+    GEOIP_CSV_PATH, GEOIP_TABLE_PATH, IPINFO_FALLBACK_ENABLED,
+    GEOLOCATION_CACHE_TTL, GEOLOCATION_CACHE_SIZE, GEOLOCATION_NEGATIVE_TTL,
+    GEOLOCATION_AGGREGATE_SUBNETS
+)
 
 # Get logger for this module
 logger = get_logger(__name__)
 
-def get_location_from_ip(ip_address):
+# Locations keyed by client address (or its /24 or /48 subnet); an empty dict marks a failed lookup
+geolocation_cache = TTLCache("geolocation", ttl=GEOLOCATION_CACHE_TTL, maxsize=GEOLOCATION_CACHE_SIZE)
+
+_ip_table = None
+_ip_table_loaded = False
+_ip_table_lock = threading.Lock()
+
+def get_ip_table(path=GEOIP_TABLE_PATH, source=GEOIP_CSV_PATH):
+    """
+    Return the shared offline IP range table, or None if no database is installed.
+
+    The table is compiled from the CSV the first time it is needed and again
+    whenever the CSV is newer than the compiled file.
+
+    Args:
+        path (str): Compiled table file
+        source (str): Geolocation CSV it is built from
+
+    Returns:
+        IPRangeTable or None
     """
-    Get location information from an IP address using ipinfo.io
+    global _ip_table, _ip_table_loaded
+    if not _ip_table_loaded:
+        with _ip_table_lock:
+            if not _ip_table_loaded:
+                try:
+                    if os.path.exists(source) and (
+                        not os.path.exists(path) or os.path.getmtime(source) > os.path.getmtime(path)
+                    ):
+                        logger.info(f"Compiling IP geolocation table {path} from {source}")
+                        build_ip_table(source, path)
+                    if os.path.exists(path):
+                        _ip_table = IPRangeTable(path)
+                        logger.info(f"Opened IP geolocation table {path} with {len(_ip_table)} ranges")
+                    else:
+                        logger.info("No offline IP geolocation database installed")
+                except (OSError, ValueError) as e:
+                    logger.error(f"Failed to load IP geolocation table: {str(e)}")
+                _ip_table_loaded = True
+    return _ip_table
+
+def lookup_local(ip_address):
+    """
+    Look up an IP address in the offline range table.
+
+    Args:
+        ip_address (str): The IP address to lookup
+
+    Returns:
+        dict: Location information, or None if unknown, invalid or no table is installed
+    """
+    table = get_ip_table()
+    if table is None:
+        return None
+    try:
+        return table.lookup(ip_address)
+    except ValueError:
+        logger.warning(f"Invalid IP address: {ip_address}")
+        return None
+
+@coalesce(name="ipinfo", key=lambda ip_address: ip_address)
+def lookup_ipinfo(ip_address):
+    """
+    Get location information from an IP address using ipinfo.io.
+    Concurrent lookups for the same IP share a single upstream request.
     
     Args:
         ip_address (str): The IP address to lookup
@@ -21,8 +93,6 @@ def get_location_from_ip(ip_address):
     Returns:
         dict: Location information including city, country, etc. or None if failed
     """
-    logger.info(f"Attempting to get location from IP: {ip_address}")
-    
     try:
         # Using ipinfo.io as a free geolocation service
         response = requests.get(f"https://ipinfo.io/{ip_address}/json", timeout=5)
@@ -40,6 +110,65 @@ def get_location_from_ip(ip_address):
         logger.error(f"Error getting location from IP: {str(e)}")
         return None
 
+def _is_reserved(address):
+    """True for addresses no geolocation source can place (private, loopback, link-local, ...)."""
+    return (address.is_private or address.is_loopback or address.is_link_local or address.is_reserved
+            or address.is_multicast or address.is_unspecified)
+
+def _cache_key(address):
+    """Cache key for an address: the address itself, or its /24 (IPv4) or /48 (IPv6) subnet."""
+    if not GEOLOCATION_AGGREGATE_SUBNETS:
+        return str(address)
+    prefix = 24 if address.version == 4 else 48
+    return str(ipaddress.ip_network(f"{address}/{prefix}", strict=False))
+
+def get_location_from_ip(ip_address):
+    """
+    Get location information from an IP address.
+
+    Invalid, private and reserved addresses are answered locally without a
+    lookup. Otherwise results are cached per client (or subnet); the offline
+    range table is consulted first and ipinfo.io is only called when the table
+    has no answer and the fallback is enabled. Failed lookups are cached for a
+    short time so a client is not looked up again on every message.
+
+    Args:
+        ip_address (str): The IP address to lookup
+
+    Returns:
+        dict: Location information including city, country, etc. or None if failed
+    """
+    logger.info(f"Attempting to get location from IP: {ip_address}")
+
+    try:
+        address = ipaddress.ip_address(ip_address.split("%", 1)[0])
+    except (ValueError, AttributeError):
+        logger.warning(f"Invalid IP address: {ip_address}")
+        return None
+    if _is_reserved(address):
+        logger.info(f"IP {ip_address} is a private or reserved address, skipping geolocation")
+        return None
+
+    key = _cache_key(address)
+    cached = geolocation_cache.get(key)
+    if cached is not None:
+        logger.debug(f"Geolocation cache hit for {key}")
+        return cached or None
+
+    location = lookup_local(ip_address)
+    if location is not None:
+        logger.info(f"Resolved location for IP {ip_address} from the offline database")
+    elif IPINFO_FALLBACK_ENABLED:
+        location = lookup_ipinfo(ip_address)
+    else:
+        logger.info(f"No offline location for IP {ip_address} and ipinfo fallback is disabled")
+
+    if location is None:
+        geolocation_cache.set(key, {}, ttl=GEOLOCATION_NEGATIVE_TTL)
+    else:
+        geolocation_cache.set(key, location)
+    return location
+
 # --- TEST FUNCTION ---
 def test_geolocation_service():
     """
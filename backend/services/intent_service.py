@@ -1,4 +1,5 @@
 import os
+import re
 import sys
 
 # Add the project root directory to Python path when running directly
@@ -25,8 +26,11 @@ except Exception as e:
 INTENT_LABELS = {
     "weather": ["weather", "temperature", "forecast", "rain", "sunny", "humidity"],  # Removed "climate"
     "news": ["news", "headlines", "latest", "update", "current events", "breaking", "article", "report", "show me"],
-    "casual": ["joke", "who are you", "hello", "hi", "how are you", "your name"],
-    "stocks": ["stock", "market", "investment", "share", "price", "ticker", "nasdaq", "dow", "s&p"]
+    "casual": [
+        "joke", "who are you", "hello", "hi", "hey", "how are you", "your name", "my name is",
+        "thanks", "thank you", "bye", "goodbye"
+    ],
+    "stocks": ["stock", "stocks", "market", "investment", "share", "shares", "price", "ticker", "nasdaq", "dow", "s&p"]
 }
 
 # News categories for more specific news intent detection
@@ -42,7 +46,64 @@ NEWS_CATEGORIES = {
 logger.debug(f"Configured intent labels: {INTENT_LABELS}")
 logger.debug(f"Configured news categories: {NEWS_CATEGORIES}")
 
-__all__ = ['detect_intent', 'detect_news_category', 'extract_news_query', 'detect_temperature_unit', 'detect_time_period']
+# Sentence ends and the joiners ("and", "also", "plus", commas) that separate requests within a sentence
+SENTENCE_BOUNDARY = re.compile(r"[.?!;]+(?:\s+|$)")
+CLAUSE_BOUNDARY = re.compile(r"\s*,\s*(?:and\s+|also\s+|plus\s+)*|\s+(?:and also|and|also|plus)\s+", re.IGNORECASE)
+
+__all__ = [
+    'detect_intent', 'detect_intents', 'match_intent_keywords', 'detect_news_category', 'detect_news_categories', 'extract_news_query',
+    'split_news_query', 'detect_temperature_unit', 'detect_time_period'
+]
+
+def match_intent_keywords(user_message):
+    """
+    Matches a message against the intent keywords without consulting the model.
+    
+    Args:
+        user_message (str): The user's input message
+        
+    Returns:
+        str or None: Matched intent, or None if no keyword applies
+    """
+    # Convert message to lowercase for case-insensitive matching
+    message_lower = user_message.lower()
+    
+    # Special case for stock market indices - check this first
+    if any(index in message_lower for index in ["nasdaq", "dow", "s&p"]):
+        logger.info(f"Detected intent 'stocks' based on market index keywords")
+        return "stocks"
+    
+    # Check for news intent if "news" is in the message
+    if "news" in message_lower:
+        logger.info(f"Detected intent 'news' based on keyword 'news'")
+        return "news"
+    
+    # Check for simple weather phrases
+    simple_weather_phrases = [
+        "what's the weather", "what is the weather", 
+        "how's the weather", "how is the weather",
+        "weather today", "current weather", "weather now",
+        "temperature today", "current temperature"
+    ]
+    
+    for phrase in simple_weather_phrases:
+        if phrase in message_lower:
+            logger.info(f"Detected intent 'weather' based on simple phrase '{phrase}'")
+            return "weather"
+    
+    # Check for intent keywords in the message
+    for intent, keywords in INTENT_LABELS.items():
+        for keyword in keywords:
+            # For multi-word keywords (phrases)
+            if " " in keyword and keyword in message_lower:
+                logger.info(f"Detected intent '{intent}' based on phrase '{keyword}'")
+                return intent
+            # For single-word keywords, use simpler contains check
+            elif keyword in message_lower.split():
+                logger.info(f"Detected intent '{intent}' based on keyword '{keyword}'")
+                return intent
+    
+    return None
 
 def detect_intent(user_message):
     """
@@ -57,43 +118,9 @@ def detect_intent(user_message):
     logger.debug(f"Detecting intent for message: '{user_message}'")
     
     try:
-        # Convert message to lowercase for case-insensitive matching
-        message_lower = user_message.lower()
-        
-        # Special case for stock market indices - check this first
-        if any(index in message_lower for index in ["nasdaq", "dow", "s&p"]):
-            logger.info(f"Detected intent 'stocks' based on market index keywords")
-            return "stocks"
-        
-        # Check for news intent if "news" is in the message
-        if "news" in message_lower:
-            logger.info(f"Detected intent 'news' based on keyword 'news'")
-            return "news"
-        
-        # Check for simple weather phrases
-        simple_weather_phrases = [
-            "what's the weather", "what is the weather", 
-            "how's the weather", "how is the weather",
-            "weather today", "current weather", "weather now",
-            "temperature today", "current temperature"
-        ]
-        
-        for phrase in simple_weather_phrases:
-            if phrase in message_lower:
-                logger.info(f"Detected intent 'weather' based on simple phrase '{phrase}'")
-                return "weather"
-        
-        # Check for intent keywords in the message
-        for intent, keywords in INTENT_LABELS.items():
-            for keyword in keywords:
-                # For multi-word keywords (phrases)
-                if " " in keyword and keyword in message_lower:
-                    logger.info(f"Detected intent '{intent}' based on phrase '{keyword}'")
-                    return intent
-                # For single-word keywords, use simpler contains check
-                elif keyword in message_lower.split():
-                    logger.info(f"Detected intent '{intent}' based on keyword '{keyword}'")
-                    return intent
+        intent = match_intent_keywords(user_message)
+        if intent:
+            return intent
         
         # If no intent was matched, use the transformer model
         prediction = intent_classifier(user_message)[0]
@@ -110,6 +137,68 @@ def detect_intent(user_message):
         logger.warning("Falling back to 'general' intent due to error")
         return "general"  # Default in case of error
 
+def _segments(text, boundary, start=0, end=None):
+    """(start, end) offsets of the non-empty pieces of text[start:end] between boundary matches."""
+    end = len(text) if end is None else end
+    pieces, position = [], start
+    for match in boundary.finditer(text, start, end):
+        if text[position:match.start()].strip():
+            pieces.append((position, match.start()))
+        position = match.end()
+    if text[position:end].strip():
+        pieces.append((position, end))
+    return pieces
+
+def _merge_adjacent(spans):
+    """Join neighbouring (intent, start, end) spans that share an intent."""
+    merged = []
+    for intent, start, end in spans:
+        if merged and merged[-1][0] == intent:
+            merged[-1] = (intent, merged[-1][1], end)
+        else:
+            merged.append((intent, start, end))
+    return merged
+
+def detect_intents(user_message):
+    """
+    Splits a message into the separate requests it contains, each with its intent.
+    
+    The message is cut into sentences and each sentence into clauses at "and",
+    "also", "plus" and commas; every clause is matched with the intent keywords.
+    Clauses without a keyword belong to the request next to them, so
+    "tech and business news" or "Phoenix and Seattle weather" stay whole, while
+    "What's the weather in Phoenix and any tech news?" becomes a weather and a
+    news request. Sentences with no keyword at all are "general" requests.
+    
+    Args:
+        user_message (str): The user's input message
+        
+    Returns:
+        list: (intent, text) pairs in message order; a single pair when the
+              message holds one request (its intent is then None if no keyword matched)
+    """
+    spans = []
+    for sentence_start, sentence_end in _segments(user_message, SENTENCE_BOUNDARY):
+        clauses = [
+            (match_intent_keywords(user_message[start:end]), start, end)
+            for start, end in _segments(user_message, CLAUSE_BOUNDARY, sentence_start, sentence_end)
+        ]
+        if not any(intent for intent, _, _ in clauses):
+            spans.append(("general", sentence_start, sentence_end))
+            continue
+        # Clauses without a keyword join the request before them (or after, at the start of a sentence)
+        previous = next(intent for intent, _, _ in clauses if intent)
+        for intent, start, end in clauses:
+            previous = intent or previous
+            spans.append((previous, start, end))
+    spans = _merge_adjacent(spans)
+    if len(spans) < 2:
+        return [(spans[0][0] if spans and spans[0][0] != "general" else None, user_message.strip())]
+    
+    requests = [(intent, user_message[start:end].strip()) for intent, start, end in spans]
+    logger.info(f"Detected {len(requests)} requests in message: {requests}")
+    return requests
+
 def detect_news_category(user_message):
     """
     Detects specific news category from user message
@@ -130,6 +219,26 @@ def detect_news_category(user_message):
     logger.info("No specific news category detected")
     return None
 
+def detect_news_categories(user_message):
+    """
+    Detects every news category mentioned in a user message, in NEWS_CATEGORIES order.
+    Keywords must match whole words (plurals allowed), so "tech and business news"
+    yields both categories while "said" does not count as "ai".
+    
+    Args:
+        user_message (str): The user's input message
+        
+    Returns:
+        list: Detected news categories, empty if none
+    """
+    message_lower = user_message.lower()
+    categories = [
+        category for category, keywords in NEWS_CATEGORIES.items()
+        if any(re.search(rf"\b{re.escape(keyword)}s?\b", message_lower) for keyword in keywords)
+    ]
+    logger.info(f"Detected news categories: {categories}")
+    return categories
+
 def extract_news_query(user_message):
     """
     Extracts potential search query from news request
@@ -160,6 +269,21 @@ def extract_news_query(user_message):
     logger.info("No specific news query detected")
     return None
 
+def split_news_query(query):
+    """
+    Splits an extracted news query into separate topics on commas, "and" and "or",
+    e.g. "climate change and the elections" -> ["climate change", "the elections"].
+    
+    Args:
+        query (str or None): Query returned by extract_news_query
+        
+    Returns:
+        list: Non-empty topics, empty if there is no query
+    """
+    if not query:
+        return []
+    return [part.strip() for part in re.split(r",|\band\b|\bor\b", query) if part.strip()]
+
 def detect_temperature_unit(user_message):
     """
     Detects if the user has specified a temperature unit preference.
@@ -1,21 +1,48 @@
 import os
 import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the project root directory to Python path when running directly
 if __name__ == "__main__":
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from dotenv import load_dotenv
+from openai import RateLimitError
 from langchain_openai import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage, AIMessage
+from langchain.schema import SystemMessage, HumanMessage
 from utils.logging_config import get_logger
+from utils.task_graph import TaskGraph, TaskTimeout
+from utils.handler_registry import HandlerRegistry
+from utils.rate_limiter import UpstreamBudget, parse_retry_after
+from utils.admission import AdmissionController, OverloadedError
+from utils.speculation import Speculation
+from utils.tokens import count_tokens
 
-from services.intent_service import detect_intent, detect_news_category, extract_news_query, detect_temperature_unit
+from services.intent_service import (
+    detect_intent, detect_intents, match_intent_keywords, detect_news_category, detect_news_categories, extract_news_query,
+    split_news_query, detect_temperature_unit, detect_time_period
+)
 from services.entity_service import extract_entities
-from services.news_service import get_news
-from services.weather_service import get_weather
+from services.news_service import get_news, get_combined_news
+from services.weather_service import get_weather, get_weather_for_cities
 from services.geolocation_service import get_location_from_ip
-from config import DEFAULT_WEATHER_LOCATION
+from services.stock_service import get_stock_quotes, find_stock_symbols
+from services.casual_service import respond_casual, match_casual
+from services.session_service import get_session, conversation, add_exchange
+from services.response_cache import get_cached_answer, cache_answer, predict_cache_hit
+from services.dialogue_service import remember_dialogue, resolve_follow_up
+from services.tool_context import record_tool_result, fresh_tool_results, with_tool_context
+from services.llm_router import LLMRouter, ModelTier
+from services.preference_service import get_preferences, learn_weather_preferences, learn_news_preferences
+from config import (
+    DEFAULT_WEATHER_LOCATION, LLM_TIERING_ENABLED, LLM_STRONG_MODEL, LLM_FAST_MODEL, LLM_FAST_MAX_PROMPT_TOKENS,
+    LLM_FAST_MAX_CONTEXT_TOKENS, LLM_FAST_MAX_COMPLEXITY, SPECULATIVE_LLM_ENABLED, SPECULATIVE_MAX_TOKENS,
+    SPECULATIVE_MAX_IN_FLIGHT, SPECULATIVE_CALLS_PER_MINUTE, SPECULATIVE_CALLS_PER_DAY,
+    LLM_MAX_IN_FLIGHT, LLM_MIN_IN_FLIGHT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT, MULTI_INTENT_ENABLED, MULTI_INTENT_MAX_PARALLEL,
+    MULTI_INTENT_TASK_TIMEOUT, MULTI_INTENT_LLM_TIMEOUT
+)
 
 # Get logger for this module
 logger = get_logger(__name__)
@@ -25,61 +52,200 @@ load_dotenv()
 
 # Initialize LangChain OpenAI model
 llm = ChatOpenAI(
-    model_name="gpt-4",
-    openai_api_key=os.getenv("OPENAI_API_KEY")
+    model_name=LLM_STRONG_MODEL,
+    openai_api_key=os.getenv("OPENAI_API_KEY"),
+    include_response_headers=True
 )
 
 logger.info("Initialized LangChain OpenAI model")
 
-# Memory store for conversation context (this will be improved in future phases)
-conversation_history = []
+# With tiering enabled, short and simple prompts go to a cheaper model; llm stays the strongest tier
+llm_router = LLMRouter([
+    ModelTier(
+        "fast", ChatOpenAI(
+            model_name=LLM_FAST_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"), include_response_headers=True
+        ),
+        max_prompt_tokens=LLM_FAST_MAX_PROMPT_TOKENS, max_context_tokens=LLM_FAST_MAX_CONTEXT_TOKENS,
+        max_complexity=LLM_FAST_MAX_COMPLEXITY
+    ),
+    ModelTier("strong", llm),
+])
+
+# Every LLM call goes through admission control; routed intents never touch it, so they never queue behind the LLM
+llm_admission = AdmissionController(
+    "llm", LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT, min_in_flight=LLM_MIN_IN_FLIGHT
+)
+
+def select_llm(messages, session=None):
+    """
+    Returns the chat model invoke_llm would answer messages with.
+    
+    Returns:
+        tuple: (chat model, RoutingDecision or None when tiering is off)
+    """
+    if LLM_TIERING_ENABLED:
+        decision = llm_router.choose(messages, session)
+        return llm_router.tier(decision.tier).llm, decision
+    return llm, None
+
+def stream_llm(model, messages, decision=None):
+    """
+    Streams an answer like invoke_llm answers one: once the stream completes,
+    the routing decision is recorded with its latency and the rate-limit
+    headers are given to llm_admission; a rate limit pauses admission.
+    
+    The caller holds the llm_admission slot. A stream closed early records nothing.
+    
+    Args:
+        model: Chat model with a stream(messages) method
+        messages (list): Messages ending with the user's prompt
+        decision (RoutingDecision, optional): select_llm's decision, when tiering is on
+        
+    Yields:
+        Message chunks
+    """
+    start = time.perf_counter()
+    headers = iterator = None
+    try:
+        iterator = model.stream(messages)
+        for chunk in iterator:
+            headers = (getattr(chunk, "response_metadata", None) or {}).get("headers") or headers
+            yield chunk
+    except RateLimitError as e:
+        llm_admission.rate_limited(parse_retry_after(e.response.headers))
+        raise
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+    if decision is not None:
+        decision.latency = time.perf_counter() - start
+        llm_router.record(decision)
+    llm_admission.observe_headers(headers)
+
+def invoke_llm(messages, session=None):
+    """
+    Sends messages to the LLM, through the tiering router when it is enabled.
+    
+    The call waits for an llm_admission slot first, and the response's
+    rate-limit headers adjust how many calls may run at once.
+    
+    Args:
+        messages (list): Messages ending with the user's prompt
+        session (Session, optional): The conversation's session, for its latency SLO
+        
+    Returns:
+        AIMessage: The model's response
+        
+    Raises:
+        OverloadedError: If no slot frees up in time or OpenAI rate limits the call
+    """
+    with llm_admission.admit():
+        try:
+            if LLM_TIERING_ENABLED:
+                response = llm_router.invoke(messages, session)
+            else:
+                response = llm.invoke(messages)
+        except RateLimitError as e:
+            retry_after = parse_retry_after(e.response.headers)
+            llm_admission.rate_limited(retry_after)
+            raise OverloadedError("OpenAI rate limit reached", retry_after) from e
+    llm_admission.observe_headers(getattr(response, "response_metadata", {}).get("headers"))
+    return response
+
+# Threads the requests of a multi-request message run on
+_intent_executor = ThreadPoolExecutor(max_workers=MULTI_INTENT_MAX_PARALLEL, thread_name_prefix="intent")
 
-def handle_weather_request(entities, user_message, client_ip=None):
+# Speculative LLM answers stream here while the intent classifier runs; the semaphore
+# and budget cap how much is spent on answers that may be thrown away
+_speculation_executor = ThreadPoolExecutor(max_workers=SPECULATIVE_MAX_IN_FLIGHT, thread_name_prefix="speculative-llm")
+_speculation_slots = threading.BoundedSemaphore(SPECULATIVE_MAX_IN_FLIGHT)
+speculation_budget = UpstreamBudget(
+    "llm.speculative", SPECULATIVE_CALLS_PER_MINUTE, SPECULATIVE_CALLS_PER_DAY, background_reserve=0, low_water=0
+)
+
+# Routed intents whose answers are kept as tool results for later LLM turns
+# (casual and general handlers keep the conversation history themselves)
+RECORDED_INTENTS = ("weather", "news", "stocks")
+
+# How each kind of request is named when its answer has to be left out
+REQUEST_LABELS = {
+    "weather": "weather", "news": "news", "stocks": "stock information", "casual": "reply", "general": "answer"
+}
+
+def resolve_weather_locations(entities, client_ip=None, preferences=None):
     """
-    Handles weather-related queries by extracting location entities and temperature unit preference.
+    Picks the locations a weather request is about.
+    
+    Uses the GPE entities, then the user's home location, then the default
+    location, then the client's IP.
     
     Args:
         entities (dict): Extracted entities from the message
-        user_message (str): The original user message
         client_ip (str, optional): Client IP address for geolocation if no location provided
+        preferences (dict, optional): The session's preferences
         
     Returns:
-        str: Weather response
+        list or None: Location names, or None if no location could be determined
     """
     location = entities.get("GPE")
+    if location:
+        return location
+    
+    # A returning user's home location needs no default or geolocation lookup
+    if preferences and preferences.get("home_location"):
+        logger.info(f"No location provided, using home location: {preferences['home_location']}")
+        return [preferences["home_location"]]
     
     # If no location is provided, try to use the default location
-    if not location:
-        if DEFAULT_WEATHER_LOCATION:
-            location = [DEFAULT_WEATHER_LOCATION]
-            logger.info(f"No location provided, using default location: {DEFAULT_WEATHER_LOCATION}")
-        # If no default location, try to get it from the client's IP
-        elif client_ip:
-            logger.info(f"No location provided, attempting to use client IP: {client_ip}")
-            geo_data = get_location_from_ip(client_ip)
-            
-            if geo_data and geo_data.get("city"):
-                location = [geo_data.get("city")]
-                logger.info(f"Using geolocation from IP: {location[0]}")
-            else:
-                logger.warning("Could not determine location from IP")
-                return "I need a location to fetch weather details. Please specify a city or region."
-        else:
-            logger.warning("Weather request received but no location entity found, no default location set, and no IP provided")
-            return "I need a location to fetch weather details. Please specify a city or region."
+    if DEFAULT_WEATHER_LOCATION:
+        logger.info(f"No location provided, using default location: {DEFAULT_WEATHER_LOCATION}")
+        return [DEFAULT_WEATHER_LOCATION]
     
-    location_str = location[0] if location else "unknown location"
-    logger.info(f"Weather request for location: {location_str}")
+    # If no default location, try to get it from the client's IP
+    if client_ip:
+        logger.info(f"No location provided, attempting to use client IP: {client_ip}")
+        geo_data = get_location_from_ip(client_ip)
+        
+        if geo_data and geo_data.get("city"):
+            logger.info(f"Using geolocation from IP: {geo_data.get('city')}")
+            return [geo_data.get("city")]
+        logger.warning("Could not determine location from IP")
+        return None
     
-    # Detect temperature unit preference (defaults to imperial/Fahrenheit if not specified)
-    unit_preference = detect_temperature_unit(user_message)
+    logger.warning("Weather request received but no location entity found, no default location set, and no IP provided")
+    return None
+
+def resolve_temperature_unit(user_message, preferences=None):
+    """
+    Returns the temperature unit asked for, then the user's preferred unit, defaulting to imperial/Fahrenheit.
+    
+    Args:
+        user_message (str): The original user message
+        preferences (dict, optional): The session's preferences
+        
+    Returns:
+        str: "metric" or "imperial"
+    """
+    unit_preference = detect_temperature_unit(user_message) or (preferences or {}).get("unit")
     unit = unit_preference if unit_preference else "imperial"
     
     # Log the unit being used
     unit_name = "Celsius" if unit == "metric" else "Fahrenheit"
     logger.info(f"Using temperature unit: {unit_name}")
+    return unit
 
-    # Detect time period from entities or from the message directly
+def resolve_time_period(entities, user_message):
+    """
+    Detects the forecast time period from DATE/TIME entities or from the message directly.
+    
+    Args:
+        entities (dict): Extracted entities from the message
+        user_message (str): The original user message
+        
+    Returns:
+        str or None: Time period such as "tomorrow" or "week", None for current weather
+    """
     time_period = None
     
     # First check DATE entities
@@ -101,33 +267,81 @@ def handle_weather_request(entities, user_message, client_ip=None):
         logger.info(f"Using time period from TIME entity: {time_period}")
     # Finally, try to detect from the message
     else:
-        from services.intent_service import detect_time_period
         time_period, _ = detect_time_period(user_message)
         if time_period:
             logger.info(f"Using time period detected from message: {time_period}")
+    return time_period
+
+def handle_weather_request(locations, unit, time_period, preferences=None, asked_locations=None, session=None):
+    """
+    Handles weather-related queries from the message's analyzed location, unit and time period.
     
+    Args:
+        locations (list or None): Places to answer for (see resolve_weather_locations)
+        unit (str): "metric" or "imperial" (see resolve_temperature_unit)
+        time_period (str or None): Forecast period, None for current weather (see resolve_time_period)
+        preferences (dict, optional): The session's preferences
+        asked_locations (list, optional): Places named in the message, as opposed to fallbacks
+        session (Session, optional): The conversation's session, which keeps the slots for follow-ups
+            and the user's preferences
+        
+    Returns:
+        str: Weather response
+    """
+    if not locations:
+        return "I need a location to fetch weather details. Please specify a city or region."
+    
+    logger.info(f"Weather request for location: {locations[0]}")
+    
+    # A unit differing from what would be used anyway can only have been named in the message
+    asked_unit = unit if unit != ((preferences or {}).get("unit") or "imperial") else None
+    learn_weather_preferences(session, asked_locations, asked_unit, locations)
+    remember_dialogue(session, "weather", locations=locations, unit=unit, time_period=time_period)
+    
+    # "Phoenix vs Seattle vs Denver" is answered in one combined response
+    if len(locations) > 1:
+        logger.info(f"Weather request for {len(locations)} locations: {locations}")
+        weather_response = get_weather_for_cities(locations, unit, time_period)
+        logger.info(f"Weather response: {weather_response}")
+        return weather_response
+
     # Fetch weather data using the weather service with the specified unit and time period
-    weather_response = get_weather(location_str, unit, time_period)
+    weather_response = get_weather(locations[0], unit, time_period)
     logger.info(f"Weather response: {weather_response}")
     return weather_response
 
-def handle_news_request(user_message):
+def handle_news_request(user_message, category, query, session=None):
     """
-    Handles news-related queries by detecting category and query.
+    Handles news-related queries for the message's analyzed category and query.
     
     Args:
         user_message (str): The user's input message
+        category (str or None): News category (see detect_news_category)
+        query (str or None): Search terms (see extract_news_query)
+        session (Session, optional): The conversation's session, which keeps the slots for follow-ups
+            and the user's favourite categories
         
     Returns:
         str: News response
     """
-    logger.info("News request received")
+    logger.info(f"News request with category: {category}, query: {query}")
     
-    # Extract category and query from the message
-    category = detect_news_category(user_message)
-    query = extract_news_query(user_message)
+    # "tech and business news" or "news on taxes and the elections" fan out into one combined answer
+    categories = detect_news_categories(user_message)
+    queries = split_news_query(query)
+    learn_news_preferences(session, categories)
     
-    logger.info(f"News request with category: {category}, query: {query}")
+    # A plain "show me the news" gets the user's favourite categories
+    if not category and not query:
+        favourites = get_preferences(session).get("news_categories") or []
+        if favourites:
+            logger.info(f"No category or query given, using favourite categories: {favourites}")
+            category, categories = favourites[0], favourites
+    
+    remember_dialogue(session, "news", categories=categories or ([category] if category else []), queries=queries)
+    if len(categories) > 1 or len(queries) > 1:
+        logger.info(f"Combined news request for categories: {categories}, queries: {queries}")
+        return get_combined_news(categories=categories, queries=queries)
     
     # Get news based on category and query
     news_response = get_news(category=category, query=query)
@@ -135,57 +349,385 @@ def handle_news_request(user_message):
     # Return the news response
     return news_response
 
-def handle_stocks_request(entities):
+def handle_follow_up(intent, slots, session=None):
     """
-    Placeholder for future stocks-related queries.
+    Answers an elliptical follow-up ("what about tomorrow?") from the slots carried over
+    from the previous request, without intent detection or entity extraction.
+    
+    Weather follow-ups usually hit the forecast cache filled by the previous answer.
+    
+    Args:
+        intent (str): "weather" or "news"
+        slots (dict): Slots from resolve_follow_up
+        session (Session, optional): The conversation's session
+        
+    Returns:
+        str: Response
     """
-    logger.info("Stocks request received - functionality not yet implemented")
-    return "I'll be able to provide stock information in a future update."
+    remember_dialogue(session, intent, **slots)
+    if intent == "weather":
+        locations, unit, time_period = slots["locations"], slots["unit"], slots.get("time_period")
+        if len(locations) > 1:
+            return get_weather_for_cities(locations, unit, time_period)
+        return get_weather(locations[0], unit, time_period)
+    
+    categories, queries = slots.get("categories") or [], slots.get("queries") or []
+    if len(categories) > 1 or len(queries) > 1:
+        return get_combined_news(categories=categories, queries=queries)
+    return get_news(category=categories[0] if categories else None, query=queries[0] if queries else None)
+
+def remember_routed_answer(intent, user_message, response, session=None):
+    """Keeps a routed (non-LLM) answer as a compact tool result, so later LLM turns can refer to it."""
+    record_tool_result(session, intent, user_message, response)
 
-def chat_with_memory(user_message, client_ip=None):
+def handle_stocks_request(user_message):
     """
-    Handles conversation with memory, integrates intent detection and entity extraction,
-    and routes specific intents to appropriate handlers.
+    Handles stock queries by resolving company names and tickers in the message locally.
     
     Args:
         user_message (str): The user's input message
-        client_ip (str, optional): Client IP address for geolocation
+        
+    Returns:
+        str: Stock quote response
     """
-    logger.debug(f"Processing user message: '{user_message}'")
+    logger.info("Stocks request received")
     
-    # Extract intent and entities
-    intent = detect_intent(user_message)
-    entities = extract_entities(user_message, intent=intent)
+    # "Apple", "$aapl" and "AAPL" all resolve to AAPL without NLP or a network call;
+    # questions about the whole market get the major indices
+    symbols = find_stock_symbols(user_message)
+    if not symbols:
+        logger.info("No ticker or company name found in stocks request")
+        return "Which company or ticker would you like a quote for? For example, \"How is Apple doing?\" or \"MSFT\"."
+    
+    logger.info(f"Stocks request for symbols: {symbols}")
+    return get_stock_quotes(symbols)
+
+def count_history_turns(session, tool_results):
+    """
+    Counts the earlier turns of a session a new message could refer back to.
+    
+    Tool results count as turns: "is that warmer?" after a weather answer depends on it.
+    
+    Args:
+        session (Session or None): The conversation's session
+        tool_results (list): The session's fresh tool results
+        
+    Returns:
+        int: Earlier turns (0 without a session)
+    """
+    return (session.turns if session is not None else 0) + len(tool_results)
 
-    # Log extracted details
-    logger.info(f"Detected intent: {intent}, Extracted entities: {entities}")
+def start_speculative_answer(user_message, session=None):
+    """
+    Starts streaming the LLM answer to a message before its intent is known.
+    
+    The messages are the ones handle_general_request would send. Nothing is
+    started when the prompt is over SPECULATIVE_MAX_TOKENS, when
+    SPECULATIVE_MAX_IN_FLIGHT speculative answers are already streaming, when
+    no LLM admission slot is free or when the speculative call budget is spent.
+    
+    Args:
+        user_message (str): The user's input message
+        session (Session, optional): The conversation's session
+        
+    Returns:
+        Speculation or None: The streaming answer, or None if a guardrail refused it
+    """
+    messages = with_tool_context(
+        conversation(session) + [HumanMessage(content=user_message)], fresh_tool_results(session)
+    )
+    if sum(count_tokens(message.content) for message in messages) > SPECULATIVE_MAX_TOKENS:
+        logger.debug("Prompt too long to answer speculatively")
+        return None
+    if not _speculation_slots.acquire(blocking=False):
+        logger.debug("Too many speculative answers in flight")
+        return None
+    # Speculation never queues for the LLM: it only runs if a slot is free right now
+    if not llm_admission.try_acquire():
+        _speculation_slots.release()
+        logger.debug("No free LLM slot for a speculative answer")
+        return None
+    if not speculation_budget.try_acquire():
+        _speculation_slots.release()
+        llm_admission.release()
+        return None
+    
+    model, decision = select_llm(messages, session)
+    speculation = Speculation("llm", lambda: stream_llm(model, messages, decision), _speculation_executor)
+    speculation.add_done_callback(lambda _: (_speculation_slots.release(), llm_admission.release()))
+    logger.info("Started speculative LLM answer while the intent is classified")
+    return speculation
 
-    # Intent-based routing to avoid unnecessary OpenAI calls
-    if intent == "weather":
-        logger.debug("Routing to weather handler")
-        return handle_weather_request(entities, user_message, client_ip=client_ip)
+def handle_general_request(user_message, session=None, speculation=None):
+    """
+    Answers with the LLM, keeping the exchange in the session's conversation history.
+    
+    Recent weather, news and stock answers are given to the LLM as compact
+    tool results, so follow-ups about them need no new fetch. When the
+    semantic cache is enabled, a question equivalent to one already answered
+    (and not relying on the conversation) reuses that answer.
+    
+    Args:
+        user_message (str): The user's input message
+        session (Session, optional): The conversation's session, holding recent tool results
+        speculation (Speculation, optional): Answer already streaming from start_speculative_answer
+        
+    Returns:
+        str: LLM response
+    """
+    history = conversation(session)
+    tool_results = fresh_tool_results(session)
+    history_turns = count_history_turns(session, tool_results)
+    answer = get_cached_answer(user_message, history_turns)
+    if answer is not None and speculation is not None:
+        speculation.cancel()
+
+    if answer is None and speculation is not None:
+        try:
+            answer = speculation.result()
+            logger.debug("Using the speculative LLM answer")
+        except Exception as e:
+            logger.warning(f"Speculative LLM answer failed, asking again: {str(e)}")
+
+    if answer is None:
+        # Generate AI response using OpenAI only when necessary
+        logger.debug("Generating AI response using LangChain")
+        messages = history + [HumanMessage(content=user_message)]
+        answer = invoke_llm(with_tool_context(messages, tool_results), session).content
+    cache_answer(user_message, history_turns, answer)
+
+    # The message and its answer are stored together, so concurrent requests never split them
+    add_exchange(session, user_message, answer)
+    logger.debug("Added exchange to conversation history")
+
+    return answer
+
+def handle_casual_request(user_message, session=None):
+    """
+    Answers greetings, "who are you" and the like from templates, falling back to the LLM.
     
-    if intent == "news":
-        logger.debug("Routing to news handler")
-        return handle_news_request(user_message)
+    Templated turns are still kept in the conversation history so later LLM
+    answers have the context.
+    
+    Args:
+        user_message (str): The user's input message
+        session (Session, optional): The conversation's session, for personalized replies
         
-    if intent == "stocks":
-        logger.debug("Routing to stocks handler")
-        return handle_stocks_request(entities)
+    Returns:
+        str: Response
+    """
+    response = respond_casual(user_message, session)
+    if response is None:
+        logger.info("No casual template matched, using the LLM")
+        return handle_general_request(user_message, session=session)
+    
+    add_exchange(session, user_message, response)
+    return response
+
+# Message analysis outputs handlers can declare; each is computed only when a handler reads it
+ANALYZERS = {
+    "entities": lambda analysis: extract_entities(analysis.user_message, intent=analysis.intent),
+    "preferences": lambda analysis: get_preferences(analysis.session),
+    "location": lambda analysis: resolve_weather_locations(analysis.entities, analysis.client_ip, analysis.preferences),
+    "unit": lambda analysis: resolve_temperature_unit(analysis.user_message, analysis.preferences),
+    "time_period": lambda analysis: resolve_time_period(analysis.entities, analysis.user_message),
+    "category": lambda analysis: detect_news_category(analysis.user_message),
+    "query": lambda analysis: extract_news_query(analysis.user_message),
+}
+
+# Intent -> handler; intents without a handler of their own go to the LLM
+handlers = HandlerRegistry(ANALYZERS, default_intent="general")
 
-    # Append user message to conversation history
-    conversation_history.append(HumanMessage(content=user_message))
-    logger.debug("Added user message to conversation history")
+# Weather also reads the entities for the places the message named, which preference learning counts;
+# they are extracted for the location anyway
+@handlers.register("weather", needs=("location", "unit", "time_period", "preferences", "entities"))
+def _route_weather(analysis):
+    return handle_weather_request(
+        analysis.location, analysis.unit, analysis.time_period, preferences=analysis.preferences,
+        asked_locations=analysis.entities.get("GPE"), session=analysis.session
+    )
 
-    # Generate AI response using OpenAI only when necessary
-    logger.debug("Generating AI response using LangChain")
-    response = llm.invoke(conversation_history)
+@handlers.register("news", needs=("category", "query"))
+def _route_news(analysis):
+    return handle_news_request(analysis.user_message, analysis.category, analysis.query, session=analysis.session)
 
-    # Store AI response
-    conversation_history.append(AIMessage(content=response.content))
-    logger.debug("Added AI response to conversation history")
+@handlers.register("stocks")
+def _route_stocks(analysis):
+    return handle_stocks_request(analysis.user_message)
 
-    return response.content
+@handlers.register("casual")
+def _route_casual(analysis):
+    return handle_casual_request(analysis.user_message, session=analysis.session)
+
+@handlers.register("general")
+def _route_general(analysis):
+    return handle_general_request(analysis.user_message, session=analysis.session, speculation=analysis.speculation)
+
+def handle_multi_intent_request(requests, client_ip=None, session=None):
+    """
+    Answers a message holding several requests by running their handlers concurrently.
+    
+    Each request becomes one task with its own timeout; general requests
+    share a single LLM task. The answer lists the results in message
+    order, and a task that fails or times out is replaced by a short apology
+    instead of holding up the others.
+    
+    Args:
+        requests (list): (intent, text) pairs from detect_intents
+        client_ip (str, optional): Client IP address for geolocation
+        session (Session, optional): The conversation's session
+        
+    Returns:
+        str: Combined response
+    """
+    graph = TaskGraph("chat")
+    tasks = []
+    tool_results = fresh_tool_results(session)
+    llm_texts = [text for intent, text in requests if handlers.handler_for(intent).intent == "general"]
+    for intent, text in requests:
+        if handlers.handler_for(intent).intent != "general":
+            analysis = handlers.analyze(
+                user_message=text, intent=intent, client_ip=client_ip, session=session, speculation=None
+            )
+            func = lambda intent=intent, analysis=analysis: handlers.dispatch(intent, analysis)
+        else:
+            # Every general request goes to the LLM in one call, placed at the first of them.
+            # History is only updated once the answer arrives in time (see below).
+            if any(kind == "general" for _, kind, _ in tasks):
+                continue
+            intent, text = "general", " ".join(llm_texts)
+            func = lambda text=text: invoke_llm(
+                with_tool_context(conversation(session) + [HumanMessage(content=text)], tool_results), session
+            ).content
+        name = f"{len(tasks)}:{intent}"
+        timeout = MULTI_INTENT_LLM_TIMEOUT if intent == "general" else MULTI_INTENT_TASK_TIMEOUT
+        graph.add(name, func, timeout=timeout)
+        tasks.append((name, intent, text))
+    
+    logger.info(f"Running {len(tasks)} requests concurrently: {[name for name, _, _ in tasks]}")
+    results = graph.run(_intent_executor)
+    
+    responses = []
+    for name, intent, text in tasks:
+        result = results[name]
+        label = REQUEST_LABELS.get(intent, intent)
+        if isinstance(result, TaskTimeout):
+            responses.append(f"Sorry, getting the {label} took too long, so I left it out.")
+        elif isinstance(result, Exception):
+            responses.append(f"Sorry, I couldn't get the {label} right now.")
+        else:
+            responses.append(result)
+            if intent == "general":
+                add_exchange(session, text, result)
+            elif intent in RECORDED_INTENTS:
+                remember_routed_answer(intent, text, result, session=session)
+    return "\n\n".join(responses)
+
+# Expected cost of a request, used to pick its scheduling lane
+CHEAP = "cheap"
+EXPENSIVE = "expensive"
+
+class RequestPlan:
+    """What the keyword pass found in a message, worked out once for scheduling and answering."""
+
+    __slots__ = ("session", "follow_up", "requests", "cost")
+
+    def __init__(self, session, follow_up, requests, cost):
+        self.session = session
+        self.follow_up = follow_up
+        self.requests = requests
+        self.cost = cost
+
+def _predict_cost(user_message, session, requests):
+    """CHEAP unless some request in the message is expected to need the LLM."""
+    if all(intent is not None and handlers.handler_for(intent).intent != "general" for intent, _ in requests):
+        # Casual messages without a template fall back to the LLM
+        if all(intent != "casual" or match_casual(text)[0] for intent, text in requests):
+            return CHEAP
+        return EXPENSIVE
+    if len(requests) == 1 and predict_cache_hit(user_message, count_history_turns(session, fresh_tool_results(session))):
+        return CHEAP
+    return EXPENSIVE
+
+def plan_request(user_message, client_ip=None, session_id=None):
+    """
+    Runs the keyword pass over a message and guesses whether it will need the LLM.
+    
+    Follow-ups, weather/news/stocks requests, casual messages with a
+    template and questions the semantic cache will answer are cheap. So is
+    a multi-intent message only when none of its parts needs the LLM.
+    Messages no keyword matches are expected to end up with the LLM.
+    
+    Args:
+        user_message (str): The user's input message
+        client_ip (str, optional): Client IP address, keying the session when there is no session id
+        session_id (str, optional): Conversation id
+        
+    Returns:
+        RequestPlan: The session, follow-up slots, keyword requests and cost (CHEAP or EXPENSIVE)
+    """
+    session = get_session(session_id or client_ip, persistent=bool(session_id))
+    follow_up = resolve_follow_up(user_message, session)
+    if follow_up:
+        return RequestPlan(session, follow_up, None, CHEAP)
+    
+    if MULTI_INTENT_ENABLED:
+        requests = detect_intents(user_message)
+    else:
+        requests = [(match_intent_keywords(user_message), user_message)]
+    return RequestPlan(session, None, requests, _predict_cost(user_message, session, requests))
+
+def chat_with_memory(user_message, client_ip=None, session_id=None, plan=None):
+    """
+    Handles conversation with memory, integrates intent detection and entity extraction,
+    and routes specific intents to appropriate handlers.
+    
+    Entities and other analysis outputs are only computed when the chosen
+    handler declares it needs them (see ANALYZERS and handlers).
+    
+    Args:
+        user_message (str): The user's input message
+        client_ip (str, optional): Client IP address for geolocation
+        session_id (str, optional): Conversation id; the client IP identifies the session when omitted
+        plan (RequestPlan, optional): plan_request's result for this message, so the keyword pass is not repeated
+    """
+    logger.debug(f"Processing user message: '{user_message}'")
+    plan = plan or plan_request(user_message, client_ip=client_ip, session_id=session_id)
+    session = plan.session
+    
+    # "What about tomorrow?" after a weather answer reuses its slots, skipping intent detection and NLP
+    if plan.follow_up:
+        intent, slots = plan.follow_up
+        response = handle_follow_up(intent, slots, session=session)
+        remember_routed_answer(intent, user_message, response, session=session)
+        return response
+    
+    # "What's the weather in Phoenix and any tech news?" is answered in one turn
+    if len(plan.requests) > 1:
+        return handle_multi_intent_request(plan.requests, client_ip=client_ip, session=session)
+    
+    # Messages no keyword matches wait for the classifier; meanwhile start the LLM answer they will likely need
+    speculation = None
+    if SPECULATIVE_LLM_ENABLED and plan.requests[0][0] is None:
+        speculation = start_speculative_answer(user_message, session)
+    
+    # Detect intent; the handler decides what else needs extracting
+    intent = detect_intent(user_message)
+    logger.info(f"Detected intent: {intent}")
+    if speculation is not None and handlers.handler_for(intent).intent != "general":
+        logger.info(f"Intent '{intent}' is routed, cancelling the speculative LLM answer")
+        speculation.cancel()
+        speculation = None
+
+    # Intent-based routing to avoid unnecessary OpenAI calls
+    analysis = handlers.analyze(
+        user_message=user_message, intent=intent, client_ip=client_ip, session=session, speculation=speculation
+    )
+    response = handlers.dispatch(intent, analysis)
+    if intent in RECORDED_INTENTS:
+        remember_routed_answer(intent, user_message, response, session=session)
+    logger.debug(f"Analysis outputs computed for '{intent}': {sorted(analysis.computed())}")
+    return response
 
 def test_weather_handling():
     """
@@ -218,7 +760,10 @@ def test_weather_handling():
             assert any(test["expected_location"] in loc for loc in locations), f"Expected location {test['expected_location']} not found in {locations}"
         
         # Test weather handling
-        response = handle_weather_request(entities, test["message"])
+        response = handlers.dispatch(intent, handlers.analyze(
+            user_message=test["message"], intent=intent, client_ip=None, session=None, speculation=None,
+            entities=entities
+        ))
         logger.info(f"Response: {response}")
         
         # Basic validation of response
@@ -249,7 +794,9 @@ def test_news_handling():
         assert intent == test["expected_intent"], f"Expected intent {test['expected_intent']}, got {intent}"
         
         # Test news handling
-        response = handle_news_request(test["message"])
+        response = handlers.dispatch(intent, handlers.analyze(
+            user_message=test["message"], intent=intent, client_ip=None, session=None, speculation=None
+        ))
         logger.info(f"Response: {response}")
         
         # Basic validation of response
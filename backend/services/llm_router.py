@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import time
+import threading
+from collections import deque
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from openai import RateLimitError
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+from utils.tokens import count_tokens
+from config import LLM_LATENCY_SLO_SECONDS
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Phrases suggesting a prompt needs reasoning rather than a quick reply (regular expressions,
+# matched as whole words so "plan" does not fire on "planet" nor "code" on "barcode")
+COMPLEX_MARKERS = (
+    r"explain(?:s|ed|ing)?", r"why", r"compar(?:e|es|ed|ing|ison)", r"difference between",
+    r"analy(?:se|ze|sis|ses|sing|zing)", r"step by step", r"reason(?:s|ing)?", r"prove", r"derive",
+    r"design", r"write a", r"code", r"function", r"debug", r"calculate", r"summari[sz]e", r"pros and cons",
+    r"plan", r"strategy", r"evaluate", r"translate",
+)
+COMPLEX_PATTERN = re.compile(r"\b(?:" + "|".join(f"(?:{marker})" for marker in COMPLEX_MARKERS) + r")\b")
+
+# Code or arithmetic in a prompt
+TECHNICAL_PATTERN = re.compile(r"```|[{};]|\b\w+\(|\d+\s*[-+*/^=]\s*\d+")
+
+# Prompts longer than this count as more complex, whatever they say
+LONG_PROMPT_TOKENS = 60
+
+# Weight of the newest call in a tier's latency average
+LATENCY_SMOOTHING = 0.2
+
+def estimate_complexity(text):
+    """
+    Score how demanding a prompt looks, from 0 (chit-chat) upwards.
+
+    Args:
+        text (str): The user's prompt
+
+    Returns:
+        int: Complexity score
+    """
+    lowered = text.lower()
+    score = 2 * len(set(COMPLEX_PATTERN.findall(lowered)))
+    if TECHNICAL_PATTERN.search(text):
+        score += 1
+    score += max(text.count("?") - 1, 0)
+    if count_tokens(text) > LONG_PROMPT_TOKENS:
+        score += 1
+    return score
+
+class ModelTier:
+    """A model the router can pick, with the largest requests it is trusted with."""
+
+    def __init__(self, name, llm, max_prompt_tokens=None, max_context_tokens=None, max_complexity=None):
+        """
+        Args:
+            name (str): Tier name used in logs and metrics, e.g. "fast"
+            llm: Chat model with an invoke(messages) method
+            max_prompt_tokens (int, optional): Longest user prompt this tier takes
+            max_context_tokens (int, optional): Most history/context tokens this tier takes
+            max_complexity (int, optional): Highest estimate_complexity score this tier takes
+        """
+        self.name = name
+        self.llm = llm
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_context_tokens = max_context_tokens
+        self.max_complexity = max_complexity
+        self.latency = None
+        metrics.register_gauge(f"llm.{name}.latency_avg", lambda: round(self.latency, 3) if self.latency else None)
+
+    def accepts(self, prompt_tokens, context_tokens, complexity):
+        """Reasons this tier is too small for a request (empty if it can take it)."""
+        reasons = []
+        if self.max_prompt_tokens is not None and prompt_tokens > self.max_prompt_tokens:
+            reasons.append("long prompt")
+        if self.max_context_tokens is not None and context_tokens > self.max_context_tokens:
+            reasons.append("long history")
+        if self.max_complexity is not None and complexity > self.max_complexity:
+            reasons.append("complex prompt")
+        return reasons
+
+    def observe(self, seconds):
+        self.latency = seconds if self.latency is None else (
+            LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * self.latency
+        )
+
+class RoutingDecision:
+    """Which tier answered a request, why, and how long it took."""
+
+    __slots__ = ("tier", "reasons", "prompt_tokens", "context_tokens", "complexity", "latency")
+
+    def __init__(self, tier, reasons, prompt_tokens, context_tokens, complexity):
+        self.tier = tier
+        self.reasons = reasons
+        self.prompt_tokens = prompt_tokens
+        self.context_tokens = context_tokens
+        self.complexity = complexity
+        self.latency = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class LLMRouter:
+    """
+    Sends each prompt to the cheapest model tier that can handle it.
+
+    Tiers are ordered from cheapest to strongest. A request moves up a tier
+    only when the prompt is too long, the conversation too large or the
+    prompt too complex for the cheaper one, or when the cheaper one fails.
+    A session's latency SLO works the other way: if the chosen tier has
+    lately been slower than the SLO, a cheaper tier that meets it is used.
+    Every decision and its latency is logged, counted in the metrics and
+    kept in `recent`.
+    """
+
+    def __init__(self, tiers, history=100):
+        """
+        Args:
+            tiers (list): ModelTier objects, cheapest first
+            history (int): Number of recent decisions kept
+        """
+        if not tiers:
+            raise ValueError("LLMRouter needs at least one tier")
+        self.tiers = list(tiers)
+        self.recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def choose(self, messages, session=None):
+        """
+        Pick the tier for a list of chat messages ending with the user's prompt.
+
+        Args:
+            messages (list): Messages to send
+            session (Session, optional): The conversation's session, for its latency SLO
+
+        Returns:
+            RoutingDecision: The chosen tier and the reasons for it
+        """
+        prompt = messages[-1].content
+        prompt_tokens = count_tokens(prompt)
+        context_tokens = sum(count_tokens(message.content) for message in messages[:-1])
+        complexity = estimate_complexity(prompt)
+
+        index, reasons = len(self.tiers) - 1, []
+        for position, tier in enumerate(self.tiers):
+            rejected = tier.accepts(prompt_tokens, context_tokens, complexity)
+            if not rejected:
+                index = position
+                break
+            reasons = rejected
+
+        slo = getattr(session, "latency_slo", None) or LLM_LATENCY_SLO_SECONDS
+        if slo and self.tiers[index].latency and self.tiers[index].latency > slo:
+            faster = [i for i in range(index) if self.tiers[i].latency is None or self.tiers[i].latency <= slo]
+            if faster:
+                index, reasons = faster[-1], [f"latency SLO {slo}s"]
+
+        return RoutingDecision(self.tiers[index].name, reasons, prompt_tokens, context_tokens, complexity)
+
+    def invoke(self, messages, session=None):
+        """
+        Answer messages with the chosen tier, escalating to stronger tiers if it fails.
+
+        Args:
+            messages (list): Messages to send
+            session (Session, optional): The conversation's session
+
+        Returns:
+            AIMessage: The model's response
+
+        Raises:
+            RateLimitError: If a tier is rate limited; a stronger tier would only add load
+                            while the caller backs off
+            Exception: The strongest tier's error if every tier from the chosen one up fails
+        """
+        decision = self.choose(messages, session)
+        names = [tier.name for tier in self.tiers]
+        for tier in self.tiers[names.index(decision.tier):]:
+            start = time.perf_counter()
+            try:
+                response = tier.llm.invoke(messages)
+            except RateLimitError:
+                metrics.increment(f"llm.{tier.name}.errors")
+                raise
+            except Exception as e:
+                metrics.increment(f"llm.{tier.name}.errors")
+                if tier is self.tiers[-1]:
+                    raise
+                logger.warning(f"LLM tier '{tier.name}' failed, escalating: {str(e)}")
+                decision.reasons = decision.reasons + [f"{tier.name} failed"]
+                continue
+            decision.latency = time.perf_counter() - start
+            decision.tier = tier.name
+            self._record(tier, decision)
+            return response
+
+    def tier(self, name):
+        """Return the ModelTier with a name."""
+        return next(tier for tier in self.tiers if tier.name == name)
+
+    def record(self, decision):
+        """Record a decision answered outside invoke (e.g. a streamed answer) once its latency is set."""
+        self._record(self.tier(decision.tier), decision)
+
+    def _record(self, tier, decision):
+        with self._lock:
+            tier.observe(decision.latency)
+            self.recent.append(decision)
+        metrics.increment(f"llm.{tier.name}.requests")
+        logger.info(
+            f"LLM request answered by '{tier.name}' in {decision.latency:.2f}s "
+            f"(prompt {decision.prompt_tokens} tokens, context {decision.context_tokens} tokens, "
+            f"complexity {decision.complexity}, reasons: {decision.reasons or ['cheapest tier']})"
+        )
@@ -0,0 +1,164 @@
+import os
+import sys
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from config import NEWS_INDEX_MAX_ARTICLES
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Common words left out of the index and of queries
+STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "but", "of", "in", "on", "for", "to", "with", "about", "at",
+    "by", "from", "as", "is", "are", "was", "were", "be", "been", "it", "its", "this", "that",
+    "these", "those", "after", "over", "into", "up", "out", "new", "news", "says", "said",
+})
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms, dropping stopwords and plural endings.
+
+    Args:
+        text (str): Headline, description or query
+
+    Returns:
+        list: Index terms in order of appearance
+    """
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+class HeadlineIndex:
+    """
+    In-memory BM25 inverted index over recently fetched news articles.
+
+    Every article NewsAPI returns is indexed by its title and description, so
+    topical queries that overlap the current headlines can be answered without
+    another API call. Articles remember when they were last fetched and which
+    categories they appeared under; searches only return fresh ones.
+    """
+
+    def __init__(self, max_articles=NEWS_INDEX_MAX_ARTICLES, k1=1.5, b=0.75):
+        """
+        Args:
+            max_articles (int): Articles kept before the least recently fetched are dropped
+            k1 (float): BM25 term-frequency saturation
+            b (float): BM25 document-length normalization
+        """
+        self.max_articles = max_articles
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._articles = {}
+        self._postings = defaultdict(dict)
+        self._total_length = 0
+
+    def add_articles(self, articles, category=None, fetched_at=None):
+        """
+        Index (or refresh) articles from one NewsAPI response.
+
+        Args:
+            articles (list): NewsAPI article dicts
+            category (str, optional): Category the articles were fetched for
+            fetched_at (float, optional): Fetch time, defaults to now
+        """
+        fetched_at = fetched_at if fetched_at is not None else time.time()
+        with self._lock:
+            for article in articles:
+                doc_id = article.get("url") or article.get("title")
+                if not doc_id:
+                    continue
+                record = self._articles.get(doc_id)
+                if record is None:
+                    terms = tokenize(f"{article.get('title', '')} {article.get('description') or ''}")
+                    record = {"article": article, "categories": set(), "length": len(terms), "terms": set(terms)}
+                    for term in terms:
+                        self._postings[term][doc_id] = self._postings[term].get(doc_id, 0) + 1
+                    self._total_length += len(terms)
+                    self._articles[doc_id] = record
+                record["fetched_at"] = fetched_at
+                if category:
+                    record["categories"].add(category)
+            while len(self._articles) > self.max_articles:
+                oldest = min(self._articles, key=lambda d: self._articles[d]["fetched_at"])
+                self._remove(oldest)
+
+    def _remove(self, doc_id):
+        # Caller holds the lock
+        record = self._articles.pop(doc_id)
+        self._total_length -= record["length"]
+        for term in record["terms"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(self, query, category=None, max_age=None, limit=5):
+        """
+        Return fresh articles containing every query term, best BM25 score first.
+
+        Args:
+            query (str): Search terms
+            category (str, optional): Only return articles fetched for this category
+            max_age (float, optional): Ignore articles last fetched longer ago than this
+            limit (int): Maximum number of articles
+
+        Returns:
+            list: NewsAPI article dicts
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        now = time.time()
+        with self._lock:
+            if not self._articles:
+                return []
+            postings = [self._postings.get(term, {}) for term in set(terms)]
+            candidates = set.intersection(*(set(p) for p in postings)) if all(postings) else set()
+            count = len(self._articles)
+            average_length = self._total_length / count or 1
+            scored = []
+            for doc_id in candidates:
+                record = self._articles[doc_id]
+                if max_age is not None and now - record["fetched_at"] > max_age:
+                    continue
+                if category and category not in record["categories"]:
+                    continue
+                score = 0.0
+                for term in terms:
+                    df = len(self._postings[term])
+                    tf = self._postings[term][doc_id]
+                    idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                    norm = self.k1 * (1 - self.b + self.b * record["length"] / average_length)
+                    score += idf * tf * (self.k1 + 1) / (tf + norm)
+                scored.append((score, record["fetched_at"], record["article"]))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [article for _, _, article in scored[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._articles.clear()
+            self._postings.clear()
+            self._total_length = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._articles)
+
+# Shared index fed by every successful headlines fetch
+headline_index = HeadlineIndex()
@@ -1,7 +1,10 @@
 import os
+import re
 import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from difflib import SequenceMatcher
 from typing import List, Dict, Any, Optional
 
 # Add the project root directory to Python path when running directly
@@ -9,6 +12,22 @@ if __name__ == "__main__":
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.logging_config import get_logger
+from utils.singleflight import coalesce
+from utils.ttl_cache import TTLCache
+from utils.rate_limiter import UpstreamBudget, QuotaExceededError, USER, parse_retry_after
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, retry_with_backoff, hedged_call,
+    is_transient_error, is_upstream_failure
+)
+from config import (
+    NEWS_CACHE_TTL, NEWS_CACHE_MAXSIZE, NEWS_CACHE_EVICTION, UPSTREAM_MAX_STALE, NEWSAPI_CALLS_PER_MINUTE, NEWSAPI_CALLS_PER_DAY,
+    UPSTREAM_BACKGROUND_RESERVE, UPSTREAM_LOW_WATER,
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, UPSTREAM_TIMEOUT_SECONDS,
+    UPSTREAM_RETRY_ATTEMPTS, UPSTREAM_RETRY_BASE_DELAY, UPSTREAM_RETRY_MAX_DELAY,
+    UPSTREAM_HEDGE_AFTER_SECONDS, NEWS_INDEX_ENABLED, NEWS_INDEX_MAX_AGE, NEWS_INDEX_MIN_HITS,
+    NEWS_FANOUT_MAX_PARALLEL, NEWS_DEDUP_TITLE_SIMILARITY, NEWS_COMBINED_LIMIT
+)
+from services.news_index import headline_index
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -23,29 +42,111 @@ NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 if not NEWS_API_KEY:
     logger.warning("NEWS_API_KEY not found in environment variables")
 
+# Words that do not change what a headline search matches
+QUERY_STOPWORDS = frozenset({
+    "a", "an", "the", "and", "of", "in", "on", "for", "to", "with", "about", "at", "by",
+    "me", "my", "some", "any", "is", "are", "what", "whats", "what's", "please",
+    "news", "headlines", "latest", "recent", "today", "todays", "today's", "current",
+})
+
+def normalize_news_query(query: Optional[str]) -> Optional[str]:
+    """
+    Reduce a search query to its meaningful words, e.g. "The latest news on Climate Change?"
+    becomes "climate change", so equivalent phrasings share a cache entry.
+
+    Args:
+        query: Raw search query
+
+    Returns:
+        The normalized query, or None if nothing meaningful is left
+    """
+    if not query:
+        return None
+    words = (word.strip(".'") for word in re.findall(r"[\w'$&+.-]+", query.lower()))
+    return " ".join(word for word in words if word and word not in QUERY_STOPWORDS) or None
+
+def _headlines_key(country: str = "us", category: Optional[str] = None,
+                   query: Optional[str] = None, page_size: int = 5, priority: str = USER) -> tuple:
+    """Normalize headline lookups so equivalent requests coalesce together."""
+    return (
+        country.lower(),
+        category.lower() if category else None,
+        normalize_news_query(query),
+        page_size,
+    )
+
+# Quota budget shared by every NewsAPI call
+newsapi_budget = UpstreamBudget(
+    "newsapi", NEWSAPI_CALLS_PER_MINUTE, NEWSAPI_CALLS_PER_DAY,
+    background_reserve=UPSTREAM_BACKGROUND_RESERVE, low_water=UPSTREAM_LOW_WATER
+)
+
+# Fails fast while NewsAPI is unhealthy instead of waiting out every timeout
+newsapi_breaker = CircuitBreaker(
+    "newsapi", failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=BREAKER_RESET_SECONDS, is_failure=is_upstream_failure
+)
+
+# Successful NewsAPI payloads keyed by normalized lookup arguments
+headlines_cache = TTLCache(
+    "news.headlines", ttl=NEWS_CACHE_TTL, maxsize=NEWS_CACHE_MAXSIZE, eviction=NEWS_CACHE_EVICTION,
+    cacheable=lambda data: "error" not in data,
+    max_stale=UPSTREAM_MAX_STALE, stale_on=(QuotaExceededError, CircuitOpenError)
+)
+
+# Formatted responses keyed like headlines_cache, stored with the payload they were built from
+formatted_news_cache = TTLCache(
+    "news.formatted", ttl=NEWS_CACHE_TTL + UPSTREAM_MAX_STALE,
+    maxsize=NEWS_CACHE_MAXSIZE, eviction=NEWS_CACHE_EVICTION
+)
+
+QUOTA_EXCEEDED_MESSAGE = "I've reached my news lookup limit for now. Please try again in a few minutes."
+UNAVAILABLE_MESSAGE = "The news service is temporarily unavailable. Please try again shortly."
+
+# Threads used to fetch the parts of a multi-category request side by side
+_fanout_executor = ThreadPoolExecutor(max_workers=NEWS_FANOUT_MAX_PARALLEL, thread_name_prefix="news-fanout")
+
 class NewsService:
     """Service for fetching news from NewsAPI.org"""
     
     BASE_URL = "https://newsapi.org/v2"
     
     @staticmethod
+    def _request(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Perform one GET against NewsAPI and return the decoded JSON payload."""
+        response = requests.get(endpoint, params=params, timeout=UPSTREAM_TIMEOUT_SECONDS)
+        if response.status_code == 429:
+            newsapi_budget.exhaust(parse_retry_after(response.headers))
+            raise QuotaExceededError("NewsAPI rate limit reached")
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    @coalesce(name="newsapi.top_headlines", key=_headlines_key)
     def get_top_headlines(
         country: str = "us", 
         category: Optional[str] = None,
         query: Optional[str] = None,
-        page_size: int = 5
+        page_size: int = 5,
+        priority: str = USER
     ) -> Dict[str, Any]:
         """
-        Fetch top headlines from NewsAPI
+        Fetch top headlines from NewsAPI.
+        Concurrent identical lookups share a single upstream request.
         
         Args:
             country: Country code (default: "us")
             category: News category (business, entertainment, health, science, sports, technology)
             query: Search term
             page_size: Number of results to return (default: 5)
+            priority: Budget priority - USER for live requests, BACKGROUND for cache warming
             
         Returns:
             Dict containing news articles
+
+        Raises:
+            QuotaExceededError: If the NewsAPI budget refuses the call or NewsAPI answers 429
+            CircuitOpenError: If the NewsAPI circuit is open
         """
         endpoint = f"{NewsService.BASE_URL}/top-headlines"
         
@@ -63,18 +164,27 @@ class NewsService:
             
         logger.info(f"Fetching news: country={country}, category={category}, query={query}")
         
+        def attempt():
+            newsapi_budget.acquire(priority)
+            return newsapi_breaker.call(NewsService._request, endpoint, params)
+        
         try:
-            response = requests.get(endpoint, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = retry_with_backoff(
+                lambda: hedged_call(attempt, UPSTREAM_HEDGE_AFTER_SECONDS, name="newsapi"),
+                attempts=UPSTREAM_RETRY_ATTEMPTS, base_delay=UPSTREAM_RETRY_BASE_DELAY,
+                max_delay=UPSTREAM_RETRY_MAX_DELAY, retry_if=is_transient_error, name="newsapi"
+            )
             
             if data.get("status") == "ok":
                 logger.info(f"Successfully fetched {len(data.get('articles', []))} news articles")
+                headline_index.add_articles(data.get("articles", []), category=category)
                 return data
             else:
                 logger.error(f"News API error: {data.get('message', 'Unknown error')}")
                 return {"error": data.get("message", "Failed to fetch news")}
                 
+        except (QuotaExceededError, CircuitOpenError):
+            raise
         except requests.exceptions.RequestException as e:
             logger.error(f"Request error fetching news: {str(e)}")
             return {"error": f"Failed to fetch news: {str(e)}"}
@@ -82,12 +192,13 @@ class NewsService:
             logger.error(f"Unexpected error fetching news: {str(e)}")
             return {"error": f"An unexpected error occurred: {str(e)}"}            
     @staticmethod
-    def format_news_response(news_data: Dict[str, Any]) -> str:
+    def format_news_response(news_data: Dict[str, Any], limit: int = 5) -> str:
         """
         Format news data into a readable response
         
         Args:
             news_data: News data from the API
+            limit: Maximum number of headlines to list
             
         Returns:
             Formatted news string
@@ -102,7 +213,7 @@ class NewsService:
             
         response = "Here are the latest headlines:\n\n"
         
-        for i, article in enumerate(articles[:5], 1):
+        for i, article in enumerate(articles[:limit], 1):
             title = article.get("title", "No title")
             source = article.get("source", {}).get("name", "Unknown source")
             url = article.get("url", "")
@@ -114,9 +225,32 @@ class NewsService:
             
         return response
 
+def _indexed_articles(category: Optional[str], query: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+    """Fresh local matches for a normalized query, or None if the index cannot answer it."""
+    if not query or not NEWS_INDEX_ENABLED:
+        return None
+    articles = headline_index.search(query, category=category, max_age=NEWS_INDEX_MAX_AGE)
+    if len(articles) < NEWS_INDEX_MIN_HITS:
+        return None
+    logger.info(f"Answered news query '{query}' from {len(articles)} indexed headlines")
+    return articles
+
+def _load_headlines(category: Optional[str], query: Optional[str]) -> Dict[str, Any]:
+    """Cached (or freshly fetched) headlines payload for a normalized query."""
+    return headlines_cache.get_or_load(
+        _headlines_key(category=category, query=query),
+        lambda: NewsService.get_top_headlines(category=category, query=query),
+        prefer_stale=newsapi_budget.near_exhaustion()
+    )
+
 def get_news(category: Optional[str] = None, query: Optional[str] = None) -> str:
     """
-    Get formatted news based on category or query
+    Get formatted news based on category or query.
+    Headlines are served from the in-memory cache while fresh, and from
+    stale cache entries when the NewsAPI quota is exhausted or its circuit is open.
+    Queries are normalized first, so "the latest on Climate Change" and
+    "climate change" share one cache entry and one formatted response, and
+    are answered from the local headline index when it has enough fresh hits.
     
     Args:
         category: News category
@@ -125,8 +259,133 @@ def get_news(category: Optional[str] = None, query: Optional[str] = None) -> str
     Returns:
         Formatted news string
     """
-    news_data = NewsService.get_top_headlines(category=category, query=query)
-    return NewsService.format_news_response(news_data)
+    query = normalize_news_query(query)
+
+    # Searches overlapping recently fetched headlines are answered from the local index
+    articles = _indexed_articles(category, query)
+    if articles is not None:
+        return NewsService.format_news_response({"status": "ok", "articles": articles})
+
+    key = _headlines_key(category=category, query=query)
+    try:
+        news_data = _load_headlines(category, query)
+    except QuotaExceededError as e:
+        logger.warning(f"News quota exhausted and nothing cached: {str(e)}")
+        return QUOTA_EXCEEDED_MESSAGE
+    except CircuitOpenError as e:
+        logger.warning(f"News service unavailable and nothing cached: {str(e)}")
+        return UNAVAILABLE_MESSAGE
+
+    # Reuse the formatted text only while it was built from this exact payload
+    formatted = formatted_news_cache.get(key)
+    if formatted is not None and formatted[0] is news_data:
+        return formatted[1]
+    response = NewsService.format_news_response(news_data)
+    if "error" not in news_data:
+        formatted_news_cache.set(key, (news_data, response))
+    return response
+
+def _fetch_articles(category: Optional[str], query: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Articles for one part of a combined request, from the local index, the cache or NewsAPI.
+
+    Raises:
+        QuotaExceededError: If nothing is cached and the NewsAPI budget is spent
+        CircuitOpenError: If nothing is cached and the NewsAPI circuit is open
+    """
+    articles = _indexed_articles(category, query)
+    if articles is not None:
+        return articles
+    news_data = _load_headlines(category, query)
+    if "error" in news_data:
+        logger.warning(f"News lookup failed for category={category}, query={query}: {news_data['error']}")
+        return []
+    return news_data.get("articles", [])
+
+def _normalize_title(title: Optional[str]) -> str:
+    """Lowercase a headline and drop the trailing " - Source" NewsAPI appends."""
+    title = re.sub(r"\s+[-|]\s+[^-|]+$", "", title or "")
+    return " ".join(re.findall(r"\w+", title.lower()))
+
+def _normalize_url(url: Optional[str]) -> str:
+    """Drop scheme, query string, fragment and trailing slash so the same page compares equal."""
+    url = re.sub(r"^https?://(www\.)?", "", (url or "").strip().lower())
+    return re.split(r"[?#]", url, 1)[0].rstrip("/")
+
+def merge_articles(result_lists: List[List[Dict[str, Any]]], limit: int = NEWS_COMBINED_LIMIT,
+                   similarity: float = NEWS_DEDUP_TITLE_SIMILARITY) -> List[Dict[str, Any]]:
+    """
+    Merge several article lists into one ranked, de-duplicated list.
+
+    Articles are the same story if their URLs match or their headlines are at
+    least `similarity` alike. Stories returned for more of the requested
+    categories or topics rank first, then stories near the top of their own
+    list (so every list contributes its best headline early), then the newest.
+
+    Args:
+        result_lists: Article lists, one per category or topic
+        limit: Maximum number of articles to return
+        similarity: SequenceMatcher ratio above which headlines are duplicates
+
+    Returns:
+        Ranked NewsAPI article dicts
+    """
+    stories = []
+    for results in result_lists:
+        for rank, article in enumerate(results):
+            url = _normalize_url(article.get("url"))
+            title = _normalize_title(article.get("title"))
+            story = next((
+                s for s in stories
+                if (url and url == s["url"]) or
+                   (title and s["title"] and SequenceMatcher(None, title, s["title"]).ratio() >= similarity)
+            ), None)
+            if story is None:
+                stories.append({"article": article, "url": url, "title": title, "hits": 1, "rank": rank})
+            else:
+                story["hits"] += 1
+                story["rank"] = min(story["rank"], rank)
+    stories.sort(key=lambda s: s["article"].get("publishedAt") or "", reverse=True)
+    stories.sort(key=lambda s: (-s["hits"], s["rank"]))
+    return [s["article"] for s in stories[:limit]]
+
+def get_combined_news(categories: Optional[List[str]] = None, queries: Optional[List[str]] = None) -> str:
+    """
+    Get one formatted response covering several categories and/or search topics.
+
+    Every (category, topic) combination is fetched concurrently, with at most
+    NEWS_FANOUT_MAX_PARALLEL lookups in flight, so the request takes about as
+    long as its slowest part. Each part goes through the same local index and
+    cache as get_news; the results are merged with merge_articles.
+
+    Args:
+        categories: News categories, e.g. ["technology", "business"]
+        queries: Search topics, e.g. ["climate change", "elections"]
+
+    Returns:
+        Formatted news string
+    """
+    normalized = [normalize_news_query(q) for q in queries or []]
+    topics = [q for q in dict.fromkeys(normalized) if q] or [None]
+    parts = [(category, topic) for category in (list(dict.fromkeys(categories or [])) or [None]) for topic in topics]
+    logger.info(f"Fetching {len(parts)} news lookups concurrently: {parts}")
+
+    futures = [_fanout_executor.submit(_fetch_articles, category, topic) for category, topic in parts]
+    result_lists, errors = [], []
+    for future in futures:
+        try:
+            result_lists.append(future.result())
+        except (QuotaExceededError, CircuitOpenError) as e:
+            errors.append(e)
+
+    if not result_lists and errors:
+        logger.warning(f"Combined news request failed: {str(errors[0])}")
+        if any(isinstance(e, QuotaExceededError) for e in errors):
+            return QUOTA_EXCEEDED_MESSAGE
+        return UNAVAILABLE_MESSAGE
+
+    articles = merge_articles(result_lists)
+    return NewsService.format_news_response({"status": "ok", "articles": articles}, limit=NEWS_COMBINED_LIMIT)
 
 # --- TEST FUNCTION ---
 def test_news_service():
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from collections import Counter
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from utils.ttl_cache import TTLCache
+from config import (
+    PREFERENCES_ENABLED, PREFERENCES_DB_PATH, PREFERENCES_HOME_MIN_REQUESTS, PREFERENCES_MAX_CATEGORIES,
+    PREFERENCES_FLUSH_INTERVAL, PREFERENCES_CACHE_TTL, PREFERENCES_CACHE_MAX
+)
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class PreferenceStore:
+    """
+    Per-session preferences persisted in SQLite as one JSON document per session.
+
+    Reads are served from a bounded in-memory cache after the first load.
+    Updates only change memory and mark the session dirty; dirty sessions are
+    written together, in one transaction, at most every `flush_interval`
+    seconds on a background timer, and on close.
+    """
+
+    def __init__(self, path, flush_interval=None, cache_ttl=None, cache_max=None):
+        """
+        Args:
+            path (str): SQLite database file, or ":memory:" for a throwaway store
+            flush_interval (float, optional): Seconds updates wait before being written
+                (defaults to PREFERENCES_FLUSH_INTERVAL; 0 writes every update at once)
+            cache_ttl (float, optional): Seconds loaded preferences stay in memory
+                (defaults to PREFERENCES_CACHE_TTL)
+            cache_max (int, optional): Most sessions kept in memory (defaults to PREFERENCES_CACHE_MAX)
+        """
+        self.path = path
+        self.flush_interval = PREFERENCES_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._lock = threading.Lock()
+        # Serialises flushes so an older snapshot never overwrites a newer one
+        self._db_lock = threading.Lock()
+        self._loaded = TTLCache(
+            "preferences",
+            ttl=PREFERENCES_CACHE_TTL if cache_ttl is None else cache_ttl,
+            maxsize=PREFERENCES_CACHE_MAX if cache_max is None else cache_max
+        )
+        # Preferences changed since the last flush; kept here so eviction from _loaded cannot lose them
+        self._dirty = {}
+        self._timer = None
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS preferences (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL)"
+        )
+        self._db.commit()
+
+    def get(self, session_id):
+        """Return a copy of the preferences stored for a session (empty if none)."""
+        with self._lock:
+            return dict(self._load(session_id))
+
+    def update(self, session_id, **changes):
+        """Merge changes into a session's preferences and schedule them to be written."""
+        with self._lock:
+            data = dict(self._load(session_id))
+            data.update(changes)
+            self._loaded.set(session_id, data)
+            self._dirty[session_id] = data
+            if self.flush_interval > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.flush_interval, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Write every dirty session's preferences in one transaction."""
+        with self._db_lock:
+            with self._lock:
+                self._timer = None
+                rows = [(session_id, json.dumps(data), time.time()) for session_id, data in self._dirty.items()]
+                self._dirty = {}
+            if not rows:
+                return
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO preferences (session_id, data, updated_at) VALUES (?, ?, ?)", rows
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to save preferences for {len(rows)} sessions: {str(e)}")
+                return
+            logger.debug(f"Saved preferences for {len(rows)} sessions")
+
+    def _load(self, session_id):
+        # Caller holds the lock
+        data = self._dirty.get(session_id)
+        if data is None:
+            data = self._loaded.get(session_id)
+        if data is None:
+            row = self._db.execute("SELECT data FROM preferences WHERE session_id = ?", (session_id,)).fetchone()
+            data = json.loads(row[0]) if row else {}
+            self._loaded.set(session_id, data)
+        return data
+
+    def close(self):
+        """Write pending updates and close the database."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_preference_store():
+    """Return the shared PreferenceStore, opening the database on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PreferenceStore(PREFERENCES_DB_PATH)
+                logger.info(f"Opened preference store {PREFERENCES_DB_PATH}")
+    return _store
+
+def flush_preference_store():
+    """Write pending preference updates, if the store has been opened (e.g. at shutdown)."""
+    if _store is not None:
+        _store.flush()
+
+def set_preference_store(store):
+    """Swap the preference store (e.g. for an in-memory one in tests)."""
+    global _store
+    _store = store
+
+def _read(session):
+    # Sessions keyed on a client IP keep their preferences in memory only
+    if not session.persistent:
+        with session.lock:
+            return dict(session.preferences)
+    return get_preference_store().get(session.id)
+
+def _write(session, **changes):
+    if not session.persistent:
+        with session.lock:
+            session.preferences.update(changes)
+        return
+    get_preference_store().update(session.id, **changes)
+
+def get_preferences(session):
+    """
+    Preferences for a session: home_location, unit and news_categories when known.
+
+    Args:
+        session (Session or None): The conversation's session
+
+    Returns:
+        dict: Preferences (empty without a session or when preferences are disabled)
+    """
+    if session is None or not PREFERENCES_ENABLED:
+        return {}
+    return _read(session)
+
+def learn_weather_preferences(session, asked_locations, asked_unit, resolved_locations):
+    """
+    Update a session's weather preferences from one answered request.
+
+    A unit the user names becomes the preferred unit. The location a
+    location-less request was answered for (default or geolocated) becomes
+    the home location, so it is not looked up again; a single place asked
+    about at least PREFERENCES_HOME_MIN_REQUESTS times, more than any other,
+    then takes over as home.
+
+    Args:
+        session (Session or None): The conversation's session
+        asked_locations (list or None): Places named in the message
+        asked_unit (str or None): Unit named in the message
+        resolved_locations (list or None): Places the answer was given for
+    """
+    if session is None or not PREFERENCES_ENABLED:
+        return
+    preferences = _read(session)
+    changes = {}
+    if asked_unit and preferences.get("unit") != asked_unit:
+        changes["unit"] = asked_unit
+    if asked_locations and len(asked_locations) == 1:
+        counts = Counter(preferences.get("location_counts", {}))
+        counts[asked_locations[0]] += 1
+        changes["location_counts"] = dict(counts)
+        place, count = counts.most_common(1)[0]
+        if count >= PREFERENCES_HOME_MIN_REQUESTS and preferences.get("home_location") != place:
+            changes["home_location"] = place
+    elif not asked_locations and resolved_locations and not preferences.get("home_location"):
+        changes["home_location"] = resolved_locations[0]
+    if changes:
+        logger.debug(f"Learned weather preferences for session {session.id}: {sorted(changes)}")
+        _write(session, **changes)
+
+def learn_news_preferences(session, categories):
+    """
+    Count the news categories a session asks for; the most requested become its favourites.
+
+    Args:
+        session (Session or None): The conversation's session
+        categories (list): Categories named in the message
+    """
+    if session is None or not PREFERENCES_ENABLED or not categories:
+        return
+    counts = Counter(_read(session).get("category_counts", {}))
+    counts.update(categories)
+    favourites = [category for category, _ in counts.most_common(PREFERENCES_MAX_CATEGORIES)]
+    _write(session, category_counts=dict(counts), news_categories=favourites)
@@ -0,0 +1,96 @@
+import os
+import re
+import sys
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+from utils.semantic_cache import SemanticCache, normalize_prompt
+from config import (
+    SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL, SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_MAX_HISTORY_TURNS
+)
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Words that point back at something said earlier ("what about it?", "tell me more")
+REFERENCE_WORDS = frozenset({
+    "it", "its", "that", "this", "these", "those", "they", "them", "their", "he", "him", "his",
+    "she", "her", "there", "then", "also", "again", "more", "else", "previous", "above", "earlier",
+})
+
+# Openings that only make sense as a follow-up ("and in Paris?", "what about tomorrow")
+FOLLOW_UP_START = re.compile(r"^(?:and|but|so|or|what about|how about|why|why not)\b")
+
+# Follow-ups are usually short; longer prompts stand on their own even after a few turns
+MAX_FOLLOW_UP_WORDS = 3
+
+general_answers = SemanticCache(
+    "general", threshold=SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CACHE_TTL, maxsize=SEMANTIC_CACHE_MAX_ENTRIES
+)
+
+def is_context_dependent(user_message, history_turns):
+    """
+    Guess whether an answer depends on the conversation so far and so must not be shared.
+
+    The first message of a conversation never is. Later ones are when they
+    refer back ("it", "that", "them"...), open like a follow-up ("and ...",
+    "what about ..."), are too short to stand alone, or come after
+    SEMANTIC_CACHE_MAX_HISTORY_TURNS earlier turns.
+
+    Args:
+        user_message (str): The user's input message
+        history_turns (int): Earlier exchanges in the conversation
+
+    Returns:
+        bool: True if the message should bypass the cache
+    """
+    if history_turns == 0:
+        return False
+    if history_turns >= SEMANTIC_CACHE_MAX_HISTORY_TURNS:
+        return True
+    text = normalize_prompt(user_message)
+    words = text.split()
+    return (
+        len(words) <= MAX_FOLLOW_UP_WORDS
+        or bool(FOLLOW_UP_START.match(text))
+        or any(word in REFERENCE_WORDS for word in words)
+    )
+
+def get_cached_answer(user_message, history_turns):
+    """
+    Return a stored answer to an equivalent question, if caching applies.
+
+    Args:
+        user_message (str): The user's input message
+        history_turns (int): Earlier exchanges in the conversation
+
+    Returns:
+        str or None: Cached answer
+    """
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    if is_context_dependent(user_message, history_turns):
+        metrics.increment("semantic_cache.general.skipped")
+        return None
+    hit = general_answers.lookup(user_message)
+    if hit is None:
+        return None
+    answer, similarity = hit
+    logger.info(f"Answered from semantic cache (similarity {similarity:.3f})")
+    return answer
+
+def predict_cache_hit(user_message, history_turns):
+    """True if get_cached_answer would answer the message, without counting it as a lookup."""
+    if not SEMANTIC_CACHE_ENABLED or is_context_dependent(user_message, history_turns):
+        return False
+    return general_answers.contains(user_message)
+
+def cache_answer(user_message, history_turns, answer):
+    """Store an LLM answer for reuse unless caching is off or the question relied on context."""
+    if SEMANTIC_CACHE_ENABLED and not is_context_dependent(user_message, history_turns):
+        general_answers.store(user_message, answer)
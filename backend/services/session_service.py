@@ -0,0 +1,99 @@
+import os
+import sys
+import threading
+import time
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import HumanMessage, AIMessage
+from utils.logging_config import get_logger
+from utils.ttl_cache import TTLCache
+from config import SESSION_TTL, SESSION_MAX, SESSION_HISTORY_TURNS
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class Session:
+    """State kept for one conversation between messages."""
+
+    def __init__(self, session_id, persistent=False):
+        self.id = session_id
+        # Only sessions with a client-supplied id are saved; IP-keyed ones may be shared behind a NAT
+        self.persistent = persistent
+        self.created_at = time.time()
+        # Facts learned about the user, e.g. {"name": "Sam"}
+        self.profile = {}
+        # Last routed request and its slots, for follow-ups (see dialogue_service)
+        self.dialogue = {}
+        # Recent routed answers given to the LLM as context (see tool_context)
+        self.tool_results = []
+        # Latency target for LLM answers in seconds; None uses LLM_LATENCY_SLO_SECONDS
+        self.latency_slo = None
+        # Conversation sent to the LLM: Human/AI message pairs, oldest first (see add_exchange)
+        self.history = []
+        # Exchanges so far, including those dropped from history
+        self.turns = 0
+        # Learned preferences of a non-persistent session (see preference_service)
+        self.preferences = {}
+        self.lock = threading.Lock()
+
+# Sessions expire after SESSION_TTL seconds without a message
+sessions = TTLCache("sessions", ttl=SESSION_TTL, maxsize=SESSION_MAX)
+_sessions_lock = threading.Lock()
+
+def get_session(session_id, persistent=False):
+    """
+    Return the session for an id, creating it on first use and renewing its expiry.
+
+    Args:
+        session_id (str or None): Client-supplied session id (or client IP)
+        persistent (bool): Whether a new session's preferences are saved across restarts
+
+    Returns:
+        Session or None: None when there is no id to key the session on
+    """
+    if not session_id:
+        return None
+    with _sessions_lock:
+        session = sessions.get(session_id)
+        if session is None:
+            session = Session(session_id, persistent)
+            logger.debug(f"Started session {session_id}")
+        sessions.set(session_id, session)
+    return session
+
+def conversation(session):
+    """
+    Return a copy of a session's conversation history.
+
+    Args:
+        session (Session or None): The conversation's session
+
+    Returns:
+        list: Human/AI messages, oldest first (empty without a session)
+    """
+    if session is None:
+        return []
+    with session.lock:
+        return list(session.history)
+
+def add_exchange(session, user_message, answer):
+    """
+    Append a message and its answer to a session's history as one pair.
+
+    Both are added under the session lock, so concurrent requests in one
+    session never split a pair; only the last SESSION_HISTORY_TURNS pairs are kept.
+
+    Args:
+        session (Session or None): The conversation's session
+        user_message (str): The user's message
+        answer (str): The answer given
+    """
+    if session is None:
+        return
+    with session.lock:
+        session.history.extend([HumanMessage(content=user_message), AIMessage(content=answer)])
+        del session.history[:-2 * SESSION_HISTORY_TURNS]
+        session.turns += 1
@@ -0,0 +1,313 @@
+import os
+import re
+import sys
+import zlib
+import requests
+from abc import ABC, abstractmethod
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+from utils.logging_config import get_logger
+from utils.batcher import BatchLoader
+from utils.ttl_cache import TTLCache
+from utils.rate_limiter import UpstreamBudget, QuotaExceededError, USER, parse_retry_after
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, retry_with_backoff, is_transient_error, is_upstream_failure
+)
+from config import (
+    STOCK_QUOTE_PROVIDER, STOCK_QUOTE_CACHE_TTL, STOCK_BATCH_WINDOW_SECONDS, STOCK_BATCH_MAX_SYMBOLS,
+    STOCK_CALLS_PER_MINUTE, STOCK_CALLS_PER_DAY, UPSTREAM_MAX_STALE,
+    UPSTREAM_BACKGROUND_RESERVE, UPSTREAM_LOW_WATER, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS,
+    UPSTREAM_TIMEOUT_SECONDS, UPSTREAM_RETRY_ATTEMPTS, UPSTREAM_RETRY_BASE_DELAY, UPSTREAM_RETRY_MAX_DELAY
+)
+from services.ticker_index import get_ticker_index
+
+# Load environment variables
+load_dotenv()
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+STOCK_API_KEY = os.getenv("STOCK_API_KEY")
+
+QUOTA_EXCEEDED_MESSAGE = "I've reached my stock quote limit for now. Please try again in a minute."
+UNAVAILABLE_MESSAGE = "The stock quote service is temporarily unavailable. Please try again shortly."
+
+# Indices quoted for market-wide questions such as "How is the stock market today?"
+MARKET_INDEX_SYMBOLS = ["^GSPC", "^DJI", "^IXIC"]
+MARKET_WIDE_PATTERN = re.compile(r"\bmarkets?\b|\bwall street\b", re.IGNORECASE)
+
+class QuoteProvider(ABC):
+    """
+    Source of stock quotes.
+
+    Providers fetch several symbols per call; get_quotes returns a dict of
+    symbol -> {"symbol", "name", "price", "change", "change_percent"} for the
+    symbols it found, leaving unknown symbols out.
+    """
+
+    name = "quotes"
+
+    @abstractmethod
+    def get_quotes(self, symbols, priority=USER):
+        """
+        Fetch quotes for several symbols.
+
+        Args:
+            symbols (list): Ticker symbols
+            priority (str): USER or BACKGROUND, for the upstream budget
+
+        Returns:
+            dict: symbol -> quote dict for the symbols found
+        """
+
+class FMPQuoteProvider(QuoteProvider):
+    """Quotes from Financial Modeling Prep, whose quote endpoint takes a comma-separated symbol list."""
+
+    name = "fmp"
+    BASE_URL = "https://financialmodelingprep.com/api/v3/quote"
+
+    def __init__(self, api_key=STOCK_API_KEY):
+        self.api_key = api_key
+        # Quota budget and circuit breaker shared by every quote call
+        self.budget = UpstreamBudget(
+            "fmp", STOCK_CALLS_PER_MINUTE, STOCK_CALLS_PER_DAY,
+            background_reserve=UPSTREAM_BACKGROUND_RESERVE, low_water=UPSTREAM_LOW_WATER
+        )
+        self.breaker = CircuitBreaker(
+            "fmp", failure_threshold=BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=BREAKER_RESET_SECONDS, is_failure=is_upstream_failure
+        )
+
+    def _request(self, url):
+        """Perform one GET against the quote endpoint and return the decoded JSON payload."""
+        response = requests.get(url, params={"apikey": self.api_key}, timeout=UPSTREAM_TIMEOUT_SECONDS)
+        if response.status_code == 429:
+            self.budget.exhaust(parse_retry_after(response.headers))
+            raise QuotaExceededError("Financial Modeling Prep rate limit reached")
+        response.raise_for_status()
+        return response.json()
+
+    def get_quotes(self, symbols, priority=USER):
+        """
+        Fetch quotes for several symbols in one call.
+
+        Raises:
+            QuotaExceededError: If the budget refuses the call or the API answers 429
+            CircuitOpenError: If the circuit is open
+        """
+        url = f"{self.BASE_URL}/{','.join(symbols)}"
+        logger.info(f"Fetching quotes for {len(symbols)} symbol(s) from API: {symbols}")
+
+        def attempt():
+            self.budget.acquire(priority)
+            return self.breaker.call(self._request, url)
+
+        data = retry_with_backoff(
+            attempt, attempts=UPSTREAM_RETRY_ATTEMPTS, base_delay=UPSTREAM_RETRY_BASE_DELAY,
+            max_delay=UPSTREAM_RETRY_MAX_DELAY, retry_if=is_transient_error, name="fmp"
+        )
+        if not isinstance(data, list):
+            logger.error(f"Unexpected quote payload: {data}")
+            return {}
+        return {
+            item["symbol"]: {
+                "symbol": item["symbol"],
+                "name": item.get("name"),
+                "price": item.get("price"),
+                "change": item.get("change"),
+                "change_percent": item.get("changesPercentage"),
+            }
+            for item in data if item.get("symbol") and item.get("price") is not None
+        }
+
+class FakeQuoteProvider(QuoteProvider):
+    """
+    Deterministic local quotes for tests and offline development.
+
+    Prices are derived from the symbol, so the same symbol always gets the same
+    quote; explicit quotes can be given instead. Every call is recorded.
+    """
+
+    name = "fake"
+
+    def __init__(self, quotes=None):
+        """
+        Args:
+            quotes (dict, optional): symbol -> quote dict to serve instead of generated ones
+        """
+        self.quotes = quotes
+        self.calls = []
+
+    def get_quotes(self, symbols, priority=USER):
+        self.calls.append(list(symbols))
+        if self.quotes is not None:
+            return {symbol: self.quotes[symbol] for symbol in symbols if symbol in self.quotes}
+        index = get_ticker_index()
+        quotes = {}
+        for symbol in symbols:
+            if symbol not in index:
+                continue
+            seed = zlib.crc32(symbol.encode("utf-8"))
+            price = round(20 + seed % 48000 / 100, 2)
+            change = round((seed % 801 - 400) / 100, 2)
+            quotes[symbol] = {
+                "symbol": symbol, "name": index.name(symbol), "price": price,
+                "change": change, "change_percent": round(change / (price - change) * 100, 2),
+            }
+        return quotes
+
+def create_quote_provider(name=STOCK_QUOTE_PROVIDER):
+    """Build the configured QuoteProvider."""
+    if name == "fake":
+        return FakeQuoteProvider()
+    if name == "fmp":
+        return FMPQuoteProvider()
+    raise ValueError(f"Unknown stock quote provider: {name}")
+
+quote_provider = create_quote_provider()
+
+# Quotes keyed by symbol; short-lived because prices move
+quote_cache = TTLCache(
+    "stocks.quotes", ttl=STOCK_QUOTE_CACHE_TTL, maxsize=2048,
+    max_stale=UPSTREAM_MAX_STALE, stale_on=(QuotaExceededError, CircuitOpenError)
+)
+
+# Symbols asked for by concurrent requests (e.g. a burst at market open) share upstream calls
+quote_batcher = BatchLoader(
+    "stocks.quotes", lambda symbols: quote_provider.get_quotes(symbols),
+    max_batch=STOCK_BATCH_MAX_SYMBOLS, window=STOCK_BATCH_WINDOW_SECONDS
+)
+
+def set_quote_provider(provider):
+    """Swap the quote provider (e.g. for a FakeQuoteProvider in tests) and drop cached quotes."""
+    global quote_provider
+    quote_provider = provider
+    quote_cache.clear()
+
+def get_quotes(symbols):
+    """
+    Return quotes for symbols, from the cache where fresh and otherwise in one batched fetch.
+
+    When the provider is out of quota or unavailable, recently expired quotes
+    are served instead.
+
+    Args:
+        symbols (list): Ticker symbols
+
+    Returns:
+        dict: symbol -> quote dict for the symbols a quote was found for
+
+    Raises:
+        QuotaExceededError: If quotes are missing, nothing stale is cached and the quota is spent
+        CircuitOpenError: If quotes are missing, nothing stale is cached and the provider circuit is open
+    """
+    quotes = {}
+    missing = []
+    for symbol in symbols:
+        quote = quote_cache.get(symbol)
+        if quote is not None:
+            quotes[symbol] = quote
+        else:
+            missing.append(symbol)
+    if not missing:
+        return quotes
+
+    try:
+        fetched = quote_batcher.load(missing)
+    except (QuotaExceededError, CircuitOpenError) as e:
+        stale = {symbol: quote_cache.get_stale(symbol) for symbol in missing}
+        stale = {symbol: quote for symbol, quote in stale.items() if quote is not None}
+        if not stale and not quotes:
+            raise
+        logger.warning(f"Serving stale quotes for {sorted(stale)}: {str(e)}")
+        quotes.update(stale)
+        return quotes
+
+    for symbol, quote in fetched.items():
+        quote_cache.set(symbol, quote)
+    quotes.update(fetched)
+    return quotes
+
+def format_quote(quote):
+    """One line describing a quote, e.g. "Apple Inc. (AAPL): $189.84, up $1.23 (+0.65%)"."""
+    name = quote.get("name") or quote["symbol"]
+    price, change = quote["price"], quote.get("change")
+    is_index = quote["symbol"].startswith("^")
+    price_text = f"{price:,.2f}" if is_index else f"${price:,.2f}"
+    if change is None:
+        return f"{name} ({quote['symbol']}): {price_text}"
+    direction = "up" if change > 0 else "down" if change < 0 else "unchanged"
+    change_text = f"{abs(change):,.2f}" if is_index else f"${abs(change):,.2f}"
+    percent = quote.get("change_percent")
+    percent_text = f" ({percent:+.2f}%)" if percent is not None else ""
+    if direction == "unchanged":
+        return f"{name} ({quote['symbol']}): {price_text}, unchanged{percent_text}"
+    return f"{name} ({quote['symbol']}): {price_text}, {direction} {change_text}{percent_text}"
+
+def find_stock_symbols(text):
+    """
+    Find the tickers a message asks about.
+
+    Companies and symbols named in the message come first; a market-wide
+    question that names none ("How is the stock market today?") gets the
+    major indices.
+
+    Args:
+        text (str): User message
+
+    Returns:
+        list: Ticker symbols, empty if the message names nothing to quote
+    """
+    symbols = get_ticker_index().find_symbols(text)
+    if not symbols and MARKET_WIDE_PATTERN.search(text):
+        return list(MARKET_INDEX_SYMBOLS)
+    return symbols
+
+def get_stock_quotes(symbols):
+    """
+    Get a formatted answer with the latest quote for each symbol.
+
+    Args:
+        symbols (list): Ticker symbols
+
+    Returns:
+        str: Formatted quotes
+    """
+    try:
+        quotes = get_quotes(symbols)
+    except QuotaExceededError as e:
+        logger.warning(f"Stock quota exhausted and nothing cached: {str(e)}")
+        return QUOTA_EXCEEDED_MESSAGE
+    except CircuitOpenError as e:
+        logger.warning(f"Stock quotes unavailable and nothing cached: {str(e)}")
+        return UNAVAILABLE_MESSAGE
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request error fetching quotes: {str(e)}")
+        return UNAVAILABLE_MESSAGE
+
+    lines = [format_quote(quotes[symbol]) for symbol in symbols if symbol in quotes]
+    missing = [symbol for symbol in symbols if symbol not in quotes]
+    if missing:
+        lines.append(f"No quote is available for {', '.join(missing)}.")
+    if len(lines) == 1:
+        return lines[0]
+    return "Here are the latest quotes:\n\n" + "\n".join(lines)
+
+# --- TEST FUNCTION ---
+def test_stock_service():
+    logger.info("Starting stock service test")
+    for message in ["How are Apple stocks doing?", "MSFT vs $nvda", "How is the stock market today?"]:
+        symbols = find_stock_symbols(message)
+        logger.info(f"{message} -> {symbols}: {get_stock_quotes(symbols) if symbols else 'no symbols'}")
+    logger.info("Stock service test completed")
+
+if __name__ == "__main__":
+    # Import and setup logging when running this file directly
+    from utils.logging_config import setup_logging
+    import logging
+    setup_logging(logging.DEBUG)
+    test_stock_service()
@@ -0,0 +1,207 @@
+import os
+import re
+import sys
+import csv
+import threading
+from bisect import bisect_left
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.logging_config import get_logger
+from config import STOCK_SYMBOLS_PATH
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Words dropped from company names so "Apple Inc." and "apple" share a key
+NAME_SUFFIXES = frozenset({
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "plc", "holdings", "holding", "group", "the", "sa", "se", "nv",
+})
+
+# Longest company name, in words, tried when scanning a message
+MAX_NAME_WORDS = 4
+
+# Company names that are also everyday words ("hit the target", "zoom in"); in a message
+# they only count capitalized ("Target") or right before a ticker cue ("target stock")
+COMMON_WORD_NAMES = frozenset({"target", "square", "zoom", "visa", "chase"})
+
+# Words that mark the name before them as a company, e.g. "visa shares"
+TICKER_CUES = frozenset({"stock", "stocks", "share", "shares", "ticker", "quote", "quotes"})
+
+def normalize_company(name):
+    """
+    Reduce a company name or message fragment to its lookup key.
+
+    Lowercases, drops punctuation other than "&" and "-" inside words, possessive
+    "'s" and corporate suffixes, e.g. "The Coca-Cola Company" -> "coca-cola".
+
+    Args:
+        name (str): Company name or alias
+
+    Returns:
+        str: Lookup key, empty if nothing is left
+    """
+    words = re.findall(r"[a-z0-9&'-]+", name.lower().replace(".", ""))
+    words = [re.sub(r"'s?$", "", word) for word in words]
+    return " ".join(word for word in words if word.strip("&-") and word not in NAME_SUFFIXES)
+
+class TickerIndex:
+    """
+    Local index resolving ticker symbols and company names without NLP or network.
+
+    Names and aliases are normalized into a sorted array searched with bisect,
+    which gives exact lookups and prefix completion from one compact structure.
+    Symbols are matched only when written in capitals ("AAPL") or with a "$"
+    prefix ("$aapl"), so everyday words that are also tickers ("ALL", "SO") in
+    lowercase text are not picked up. Likewise, names in COMMON_WORD_NAMES
+    are matched only capitalized or followed by a ticker cue.
+    """
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries (iterable): (symbol, name, aliases) tuples
+        """
+        self._names = {}
+        keyed = {}
+        for symbol, name, aliases in entries:
+            symbol = symbol.strip().upper()
+            self._names[symbol] = name.strip()
+            for alias in [name, *aliases]:
+                key = normalize_company(alias)
+                if key:
+                    keyed.setdefault(key, symbol)
+        self._keys = sorted(keyed)
+        self._symbols = [keyed[key] for key in self._keys]
+
+    def lookup(self, name):
+        """
+        Resolve a company name, alias or symbol to its symbol.
+
+        Args:
+            name (str): Company name, alias or symbol in any case
+
+        Returns:
+            str or None: Ticker symbol
+        """
+        symbol = self._lookup_name(name)
+        if symbol is None and name.strip().lstrip("$").upper() in self._names:
+            symbol = name.strip().lstrip("$").upper()
+        return symbol
+
+    def _lookup_name(self, name):
+        """Symbol for a company name or alias (not a bare symbol)."""
+        key = normalize_company(name)
+        position = bisect_left(self._keys, key)
+        if key and position < len(self._keys) and self._keys[position] == key:
+            return self._symbols[position]
+        return None
+
+    def complete(self, prefix, limit=10):
+        """
+        List (name key, symbol) pairs whose key starts with prefix, in key order.
+
+        Args:
+            prefix (str): Start of a company name
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (key, symbol) tuples
+        """
+        key = normalize_company(prefix)
+        if not key:
+            return []
+        results = []
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position].startswith(key) and len(results) < limit:
+            results.append((self._keys[position], self._symbols[position]))
+            position += 1
+        return results
+
+    def name(self, symbol):
+        """Display name for a symbol, or None if it is not indexed."""
+        return self._names.get(symbol.upper())
+
+    def find_symbols(self, text):
+        """
+        Find every ticker a message refers to, in order of first mention.
+
+        Company names are matched longest first ("bank of america" before
+        "america"); "$aapl" and capitalized symbols ("MSFT") count as symbols.
+        Names that are everyday words need a capital or a following ticker cue.
+
+        Args:
+            text (str): User message
+
+        Returns:
+            list: Ticker symbols without duplicates
+        """
+        tokens = re.findall(r"\$?[A-Za-z0-9^][A-Za-z0-9&.'-]*", text)
+        symbols = []
+        i = 0
+        while i < len(tokens):
+            found, width = None, 1
+            bare = tokens[i].lstrip("$").rstrip(".'")
+            if (tokens[i].startswith("$") or (bare.isupper() and len(bare) > 1)) and bare.upper() in self._names:
+                found = bare.upper()
+            else:
+                for length in range(min(MAX_NAME_WORDS, len(tokens) - i), 0, -1):
+                    name = tokens[i:i + length]
+                    found = self._lookup_name(" ".join(name))
+                    if found and not self._names_company(name, tokens[i + length:i + length + 1]):
+                        found = None
+                    if found:
+                        width = length
+                        break
+            if found and found not in symbols:
+                symbols.append(found)
+            i += width
+        return symbols
+
+    @staticmethod
+    def _names_company(words, following):
+        """Whether matched words refer to the company rather than an everyday word."""
+        if normalize_company(" ".join(words)) not in COMMON_WORD_NAMES:
+            return True
+        if all(word[:1].isupper() for word in words):
+            return True
+        return bool(following) and following[0].lower().rstrip(".'") in TICKER_CUES
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, symbol):
+        return symbol.upper() in self._names
+
+def load_symbols(path=STOCK_SYMBOLS_PATH):
+    """
+    Read the bundled symbols file.
+
+    Args:
+        path (str): CSV with symbol, name and ';'-separated aliases; '#' lines are comments
+
+    Returns:
+        list: (symbol, name, aliases) tuples
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = csv.DictReader(line for line in f if line.strip() and not line.startswith("#"))
+        return [
+            (row["symbol"], row["name"], [alias for alias in (row.get("aliases") or "").split(";") if alias.strip()])
+            for row in rows if row.get("symbol") and row.get("name")
+        ]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_ticker_index():
+    """Return the shared TickerIndex, loading the symbols file on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = TickerIndex(load_symbols())
+                logger.info(f"Loaded ticker index with {len(_index)} symbols from {STOCK_SYMBOLS_PATH}")
+    return _index
@@ -0,0 +1,108 @@
+import os
+import re
+import sys
+import json
+import time
+
+# Add the project root directory to Python path when running directly
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import SystemMessage
+from utils.logging_config import get_logger
+from utils.tokens import count_tokens, truncate_tokens
+from config import (
+    TOOL_CONTEXT_ENABLED, TOOL_RESULT_MAX_TOKENS, TOOL_CONTEXT_MAX_TOKENS, TOOL_CONTEXT_MAX_AGE,
+    TOOL_CONTEXT_MAX_RESULTS
+)
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+TOOL_CONTEXT_HEADER = (
+    "Results of tools used earlier in this conversation, oldest first, one JSON object per line. "
+    "Use them to answer follow-up questions; they may be out of date by age_seconds."
+)
+
+class ToolResult:
+    """A routed answer kept for the LLM, already compacted."""
+
+    __slots__ = ("tool", "request", "result", "at")
+
+    def __init__(self, tool, request, result, at):
+        self.tool = tool
+        self.request = request
+        self.result = result
+        self.at = at
+
+    def to_line(self, now):
+        return json.dumps({
+            "tool": self.tool, "request": self.request, "age_seconds": int(now - self.at), "result": self.result
+        }, ensure_ascii=False)
+
+def compact_result(text):
+    """Shrink an answer for the LLM: no links or layout, capped at TOOL_RESULT_MAX_TOKENS tokens."""
+    text = re.sub(r"https?://\S+", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return truncate_tokens(text, TOOL_RESULT_MAX_TOKENS)
+
+def record_tool_result(session, tool, request, result):
+    """
+    Keep a routed answer in the session so later LLM turns can use it.
+
+    Args:
+        session (Session or None): The conversation's session
+        tool (str): Intent that produced the answer, e.g. "weather"
+        request (str): The user's message
+        result (str): The answer given
+    """
+    if session is None or not TOOL_CONTEXT_ENABLED:
+        return
+    record = ToolResult(tool, request, compact_result(result), time.time())
+    with session.lock:
+        session.tool_results.append(record)
+        del session.tool_results[:-TOOL_CONTEXT_MAX_RESULTS]
+
+def fresh_tool_results(session):
+    """
+    The session's tool results the LLM should see: newer than TOOL_CONTEXT_MAX_AGE
+    and, newest first, within TOOL_CONTEXT_MAX_TOKENS tokens.
+
+    Args:
+        session (Session or None): The conversation's session
+
+    Returns:
+        list: ToolResult records, oldest first
+    """
+    if session is None or not TOOL_CONTEXT_ENABLED:
+        return []
+    now = time.time()
+    with session.lock:
+        session.tool_results[:] = [r for r in session.tool_results if now - r.at <= TOOL_CONTEXT_MAX_AGE]
+        candidates = list(session.tool_results)
+    selected, budget = [], TOOL_CONTEXT_MAX_TOKENS
+    for record in reversed(candidates):
+        cost = count_tokens(record.to_line(now))
+        if cost > budget:
+            break
+        selected.append(record)
+        budget -= cost
+    return selected[::-1]
+
+def with_tool_context(messages, results):
+    """
+    Add tool results to the messages sent to the LLM, just before the newest message.
+
+    Args:
+        messages (list): Conversation messages ending with the user's new message
+        results (list): ToolResult records from fresh_tool_results
+
+    Returns:
+        list: Messages to send
+    """
+    if not results or not messages:
+        return messages
+    now = time.time()
+    context = SystemMessage(content="\n".join([TOOL_CONTEXT_HEADER] + [record.to_line(now) for record in results]))
+    logger.debug(f"Adding {len(results)} tool result(s) to the LLM context")
+    return messages[:-1] + [context, messages[-1]]
@@ -1,6 +1,7 @@
 import os
 import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Add the project root directory to Python path when running directly
@@ -9,6 +10,23 @@ if __name__ == "__main__":
 
 from dotenv import load_dotenv
 from utils.logging_config import get_logger
+from utils.singleflight import coalesce
+from utils.ttl_cache import TTLCache
+from utils.rate_limiter import UpstreamBudget, QuotaExceededError, USER, parse_retry_after
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, retry_with_backoff, hedged_call,
+    is_transient_error, is_upstream_failure
+)
+from config import (
+    WEATHER_CACHE_TTL, FORECAST_CACHE_TTL, UPSTREAM_MAX_STALE,
+    OPENWEATHER_CALLS_PER_MINUTE, OPENWEATHER_CALLS_PER_DAY,
+    UPSTREAM_BACKGROUND_RESERVE, UPSTREAM_LOW_WATER,
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS, UPSTREAM_TIMEOUT_SECONDS,
+    UPSTREAM_RETRY_ATTEMPTS, UPSTREAM_RETRY_BASE_DELAY, UPSTREAM_RETRY_MAX_DELAY,
+    UPSTREAM_HEDGE_AFTER_SECONDS, NEGATIVE_CITY_CACHE_TTL,
+    WEATHER_FANOUT_MAX_PARALLEL, WEATHER_GROUP_ENABLED, WEATHER_CITY_ID_TTL
+)
+from services.city_index import resolve_city
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +36,157 @@ logger = get_logger(__name__)
 
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
+# Quota budget shared by every OpenWeather call
+openweather_budget = UpstreamBudget(
+    "openweather", OPENWEATHER_CALLS_PER_MINUTE, OPENWEATHER_CALLS_PER_DAY,
+    background_reserve=UPSTREAM_BACKGROUND_RESERVE, low_water=UPSTREAM_LOW_WATER
+)
+
+# Fails fast while OpenWeather is unhealthy instead of waiting out every timeout
+openweather_breaker = CircuitBreaker(
+    "openweather", failure_threshold=BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=BREAKER_RESET_SECONDS, is_failure=is_upstream_failure
+)
+
+# Raw OpenWeather payloads keyed by (normalized city, unit); incomplete payloads are not stored
+current_weather_cache = TTLCache(
+    "weather.current", ttl=WEATHER_CACHE_TTL,
+    cacheable=lambda data: "weather" in data and "main" in data,
+    max_stale=UPSTREAM_MAX_STALE, stale_on=(QuotaExceededError, CircuitOpenError)
+)
+forecast_cache = TTLCache(
+    "weather.forecast", ttl=FORECAST_CACHE_TTL,
+    cacheable=lambda data: bool(data.get("list")),
+    max_stale=UPSTREAM_MAX_STALE, stale_on=(QuotaExceededError, CircuitOpenError)
+)
+
+# Normalized names OpenWeather answered 404 for; repeat lookups skip the API
+unknown_city_cache = TTLCache("weather.unknown_cities", ttl=NEGATIVE_CITY_CACHE_TTL, maxsize=4096)
+
+# OpenWeather city ids learned from earlier responses, keyed by normalized city name
+city_id_cache = TTLCache("weather.city_ids", ttl=WEATHER_CITY_ID_TTL, maxsize=4096)
+
+# Cities the group endpoint accepts per call
+GROUP_MAX_CITIES = 20
+
+# Threads used to look up the cities of a multi-location request side by side
+_fanout_executor = ThreadPoolExecutor(max_workers=WEATHER_FANOUT_MAX_PARALLEL, thread_name_prefix="weather-fanout")
+
+QUOTA_EXCEEDED_MESSAGE = "The weather service is busy right now. Please try again in a minute."
+
+def _weather_key(city, unit="imperial"):
+    """Normalize (city, unit) so differently-cased requests coalesce together."""
+    return (city.strip().lower(), unit)
+
+def _fetch_key(city, unit="imperial", **_):
+    """Coalescing key for fetches; a background refresh and a user request for the same city share one call."""
+    return _weather_key(city, unit)
+
+def _remember_city_id(city, city_id):
+    """Record the OpenWeather id of a city so later multi-city requests can use the group endpoint."""
+    if isinstance(city_id, int) and city_id > 0:
+        city_id_cache.set(city.strip().lower(), city_id)
+
+def _request_json(url):
+    """
+    Perform one GET against OpenWeather and return the decoded JSON payload.
+
+    HTTP errors are re-raised with the response attached so callers can
+    branch on the status code.
+    """
+    response = requests.get(url, timeout=UPSTREAM_TIMEOUT_SECONDS)
+    if response.status_code == 429:
+        openweather_budget.exhaust(parse_retry_after(response.headers))
+        raise QuotaExceededError("OpenWeather rate limit reached")
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as http_err:
+        http_err.response = response
+        raise
+    return response.json()
+
+def _fetch_json(url, priority=USER):
+    """
+    GET an OpenWeather endpoint through the budget, circuit breaker and retry policy.
+
+    Each attempt (including hedged duplicates) is charged to the OpenWeather
+    budget. Transient failures are retried with jittered backoff.
+
+    Raises:
+        QuotaExceededError: If the budget refuses the call or OpenWeather answers 429
+        CircuitOpenError: If the OpenWeather circuit is open
+    """
+    def attempt():
+        openweather_budget.acquire(priority)
+        return openweather_breaker.call(_request_json, url)
+
+    return retry_with_backoff(
+        lambda: hedged_call(attempt, UPSTREAM_HEDGE_AFTER_SECONDS, name="openweather"),
+        attempts=UPSTREAM_RETRY_ATTEMPTS, base_delay=UPSTREAM_RETRY_BASE_DELAY,
+        max_delay=UPSTREAM_RETRY_MAX_DELAY, retry_if=is_transient_error, name="openweather"
+    )
+
+@coalesce(name="openweather.current", key=_fetch_key)
+def fetch_current_weather_data(city, unit="imperial", priority=USER):
+    """
+    Fetch the raw current-weather payload for a city.
+
+    Concurrent calls for the same city and unit share one upstream request.
+
+    Args:
+        city (str): The city to get weather for
+        unit (str): The temperature unit - "imperial" for Fahrenheit or "metric" for Celsius
+        priority (str): Budget priority - USER for live requests, BACKGROUND for cache warming
+
+    Returns:
+        dict: Raw OpenWeather response
+    """
+    url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={WEATHER_API_KEY}&units={unit}"
+    logger.info(f"Fetching current weather for {city} from API (unit: {unit})")
+    data = _fetch_json(url, priority)
+    _remember_city_id(city, data.get("id"))
+    return data
+
+@coalesce(name="openweather.forecast", key=_fetch_key)
+def fetch_forecast_weather_data(city, unit="imperial", priority=USER):
+    """
+    Fetch the raw 5-day/3-hour forecast payload for a city.
+
+    The payload covers every time period, so concurrent requests for the same
+    city and unit share one upstream request regardless of the period asked for.
+
+    Args:
+        city (str): The city to get weather for
+        unit (str): The temperature unit - "imperial" for Fahrenheit or "metric" for Celsius
+        priority (str): Budget priority - USER for live requests, BACKGROUND for cache warming
+
+    Returns:
+        dict: Raw OpenWeather response
+    """
+    url = f"https://api.openweathermap.org/data/2.5/forecast?q={city}&appid={WEATHER_API_KEY}&units={unit}"
+    logger.info(f"Fetching forecast for {city} from API (unit: {unit})")
+    data = _fetch_json(url, priority)
+    _remember_city_id(city, (data.get("city") or {}).get("id"))
+    return data
+
+def fetch_group_weather_data(city_ids, unit="imperial", priority=USER):
+    """
+    Fetch current weather for several cities in one call to OpenWeather's group endpoint.
+
+    Args:
+        city_ids (list): OpenWeather city ids, at most GROUP_MAX_CITIES
+        unit (str): The temperature unit - "imperial" for Fahrenheit or "metric" for Celsius
+        priority (str): Budget priority - USER for live requests, BACKGROUND for cache warming
+
+    Returns:
+        dict: Current-weather payloads keyed by city id
+    """
+    ids = ",".join(str(city_id) for city_id in city_ids)
+    url = f"https://api.openweathermap.org/data/2.5/group?id={ids}&appid={WEATHER_API_KEY}&units={unit}"
+    logger.info(f"Fetching current weather for {len(city_ids)} cities from group API (unit: {unit})")
+    data = _fetch_json(url, priority)
+    return {item.get("id"): item for item in data.get("list", [])}
+
 def get_weather(city, unit="imperial", time_period=None):
     """
     Fetch weather data for a given city and time period.
@@ -33,6 +202,9 @@ def get_weather(city, unit="imperial", time_period=None):
     if not WEATHER_API_KEY:
         logger.error("Weather API key is missing")
         return "Weather API key is missing. Please configure it."
+
+    # Fix near-miss spellings locally instead of paying for a 404
+    city = resolve_city(city)
     
     # If no time period or "now" is specified, get current weather
     if not time_period or time_period.lower() in ["now", "current"]:
@@ -41,6 +213,74 @@ def get_weather(city, unit="imperial", time_period=None):
     # For future forecasts, use the forecast endpoint
     return get_forecast_weather(city, unit, time_period)
 
+def _prefetch_group_weather(cities, unit):
+    """
+    Fill current_weather_cache for cities whose OpenWeather id is known, in as few calls as possible.
+
+    Cities already cached, or whose id has not been learned yet, are left to the
+    per-city path. Failures are logged and ignored for the same reason.
+    """
+    ids = {}
+    for city in cities:
+        city_id = city_id_cache.get(city.strip().lower())
+        if city_id is None:
+            continue
+        entry = current_weather_cache.get_entry(_weather_key(city, unit))
+        if entry is None or not entry.is_fresh():
+            ids[city_id] = city
+    if len(ids) < 2:
+        return
+    city_ids = list(ids)
+    for start in range(0, len(city_ids), GROUP_MAX_CITIES):
+        batch = city_ids[start:start + GROUP_MAX_CITIES]
+        try:
+            payloads = fetch_group_weather_data(batch, unit)
+        except (QuotaExceededError, CircuitOpenError, requests.exceptions.RequestException) as e:
+            logger.warning(f"Group weather lookup failed, falling back to per-city lookups: {str(e)}")
+            return
+        for city_id, data in payloads.items():
+            if city_id in ids:
+                current_weather_cache.set(_weather_key(ids[city_id], unit), data)
+
+def get_weather_for_cities(cities, unit="imperial", time_period=None):
+    """
+    Fetch weather for several cities and combine the answers into one response.
+
+    Every city is looked up concurrently through the weather caches. For current
+    weather, cities whose OpenWeather id is already known are first fetched
+    together from the group endpoint, so comparing a handful of familiar cities
+    costs a single upstream call.
+
+    Args:
+        cities (list): The cities to get weather for
+        unit (str): The temperature unit - "imperial" for Fahrenheit or "metric" for Celsius
+        time_period (str, optional): Time period for forecast (e.g., "today", "tomorrow", "week")
+
+    Returns:
+        str: One weather answer per city, separated by blank lines
+    """
+    if not WEATHER_API_KEY:
+        logger.error("Weather API key is missing")
+        return "Weather API key is missing. Please configure it."
+
+    # Resolve spellings first so "Phoenix" and "phoenix" are looked up once
+    resolved = {}
+    for city in cities:
+        city = resolve_city(city)
+        resolved.setdefault(city.strip().lower(), city)
+    cities = list(resolved.values())
+    if len(cities) == 1:
+        return get_weather(cities[0], unit, time_period)
+    logger.info(f"Fetching weather for {len(cities)} cities concurrently: {cities}")
+
+    if not time_period or time_period.lower() in ["now", "current"]:
+        if WEATHER_GROUP_ENABLED:
+            _prefetch_group_weather(cities, unit)
+        responses = _fanout_executor.map(lambda city: get_current_weather(city, unit), cities)
+    else:
+        responses = _fanout_executor.map(lambda city: get_forecast_weather(city, unit, time_period), cities)
+    return "\n\n".join(responses)
+
 def get_current_weather(city, unit="imperial"):
     """
     Fetch current weather data for a given city.
@@ -52,13 +292,15 @@ def get_current_weather(city, unit="imperial"):
     Returns:
         str: Current weather information formatted as a string
     """
-    url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={WEATHER_API_KEY}&units={unit}"
-    logger.info(f"Fetching current weather for {city} from API (unit: {unit})")
+    if unknown_city_cache.get(city.strip().lower()):
+        logger.info(f"City previously not found, skipping API call: {city}")
+        return f"Could not find weather data for '{city}'. Please check the city name."
 
     try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+        data = current_weather_cache.get_or_load(
+            _weather_key(city, unit), lambda: fetch_current_weather_data(city, unit),
+            prefer_stale=openweather_budget.near_exhaustion()
+        )
 
         if "weather" in data and "main" in data:
             weather_desc = data["weather"][0]["description"]
@@ -75,13 +317,22 @@ def get_current_weather(city, unit="imperial"):
         logger.warning(f"Incomplete weather data received for {city}")
         return "Weather data is unavailable for this location."
     
+    except QuotaExceededError as e:
+        logger.warning(f"Weather quota exhausted and nothing cached for {city}: {str(e)}")
+        return QUOTA_EXCEEDED_MESSAGE
+
     except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 404:
+        if http_err.response is not None and http_err.response.status_code == 404:
             logger.warning(f"City not found: {city}")
+            unknown_city_cache.set(city.strip().lower(), True)
             return f"Could not find weather data for '{city}'. Please check the city name."
         logger.error(f"HTTP Error when fetching weather for {city}: {http_err}")
         return f"HTTP Error: {http_err}"
     
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping weather lookup for {city}: {str(e)}")
+        return "There was an issue connecting to the weather service. Try again later."
+
     except requests.exceptions.RequestException as e:
         logger.error(f"Request exception when fetching weather for {city}: {e}")
         return "There was an issue connecting to the weather service. Try again later."
@@ -98,14 +349,18 @@ def get_forecast_weather(city, unit="imperial", time_period="tomorrow"):
     Returns:
         str: Forecast weather information formatted as a string
     """
-    # 5-day forecast with 3-hour intervals
-    url = f"https://api.openweathermap.org/data/2.5/forecast?q={city}&appid={WEATHER_API_KEY}&units={unit}"
-    logger.info(f"Fetching forecast for {city} from API (unit: {unit}, time_period: {time_period})")
+    logger.info(f"Getting forecast for {city} (unit: {unit}, time_period: {time_period})")
+
+    if unknown_city_cache.get(city.strip().lower()):
+        logger.info(f"City previously not found, skipping API call: {city}")
+        return f"Could not find forecast data for '{city}'. Please check the city name."
 
     try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
+        # 5-day forecast with 3-hour intervals
+        data = forecast_cache.get_or_load(
+            _weather_key(city, unit), lambda: fetch_forecast_weather_data(city, unit),
+            prefer_stale=openweather_budget.near_exhaustion()
+        )
 
         if "list" not in data or not data["list"]:
             logger.warning(f"No forecast data available for {city}")
@@ -121,13 +376,22 @@ def get_forecast_weather(city, unit="imperial", time_period="tomorrow"):
         logger.info(f"Successfully retrieved forecast data for {city} ({time_period})")
         return forecast_data
     
+    except QuotaExceededError as e:
+        logger.warning(f"Weather quota exhausted and nothing cached for {city}: {str(e)}")
+        return QUOTA_EXCEEDED_MESSAGE
+
     except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 404:
+        if http_err.response is not None and http_err.response.status_code == 404:
             logger.warning(f"City not found: {city}")
+            unknown_city_cache.set(city.strip().lower(), True)
             return f"Could not find forecast data for '{city}'. Please check the city name."
         logger.error(f"HTTP Error when fetching forecast for {city}: {http_err}")
         return f"HTTP Error: {http_err}"
     
+    except CircuitOpenError as e:
+        logger.warning(f"Skipping forecast lookup for {city}: {str(e)}")
+        return "There was an issue connecting to the weather service. Try again later."
+
     except requests.exceptions.RequestException as e:
         logger.error(f"Request exception when fetching forecast for {city}: {e}")
         return "There was an issue connecting to the weather service. Try again later."
@@ -0,0 +1,124 @@
+import pytest
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.admission import AdmissionController, OverloadedError, parse_reset_duration
+
+
+class TestAdmissionController:
+    """Test suite for admission.py"""
+
+    def test_admits_up_to_limit(self):
+        """Calls within the limit are admitted at once"""
+        controller = AdmissionController("test", max_in_flight=2, max_queue=0, queue_timeout=1)
+
+        controller.acquire()
+        controller.acquire()
+
+        assert controller.in_flight == 2
+        assert controller.try_acquire() is False
+
+    def test_queue_full_is_refused_immediately(self):
+        """With no queue room, a caller is refused at once with a Retry-After"""
+        controller = AdmissionController("test", max_in_flight=1, max_queue=0, queue_timeout=5)
+        controller.acquire()
+
+        start = time.monotonic()
+        with pytest.raises(OverloadedError) as excinfo:
+            controller.acquire()
+
+        assert time.monotonic() - start < 0.5
+        assert excinfo.value.retry_after >= 1
+
+    def test_queued_caller_gets_released_slot(self):
+        """A waiting caller is admitted when a slot is released"""
+        controller = AdmissionController("test", max_in_flight=1, max_queue=1, queue_timeout=2)
+        controller.acquire()
+        admitted = threading.Event()
+
+        def waiter():
+            controller.acquire()
+            admitted.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        assert not admitted.is_set()
+
+        controller.release()
+        thread.join(1)
+
+        assert admitted.is_set()
+        assert controller.in_flight == 1
+
+    def test_queue_deadline(self):
+        """A caller still waiting at the deadline is refused"""
+        controller = AdmissionController("test", max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        controller.acquire()
+
+        with pytest.raises(OverloadedError):
+            controller.acquire()
+        # The timed-out caller left the queue
+        assert controller.try_acquire() is False
+        controller.release()
+        assert controller.try_acquire() is True
+
+    def test_admit_releases_on_error(self):
+        """The slot is given back when the admitted call fails"""
+        controller = AdmissionController("test", max_in_flight=1, max_queue=0, queue_timeout=1)
+
+        with pytest.raises(ValueError):
+            with controller.admit():
+                raise ValueError("boom")
+
+        assert controller.in_flight == 0
+
+    def test_headers_adapt_limit(self):
+        """Low remaining allowance halves the limit; plenty lets it grow back"""
+        controller = AdmissionController("test", max_in_flight=8, max_queue=0, queue_timeout=1, min_in_flight=2)
+        low = {"x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "20",
+               "x-ratelimit-limit-tokens": "30000", "x-ratelimit-remaining-tokens": "29000"}
+        plenty = {"x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "450"}
+
+        controller.observe_headers(low)
+        assert controller.limit == 4
+        controller.observe_headers(low)
+        controller.observe_headers(low)
+        assert controller.limit == 2
+        controller.observe_headers(plenty)
+        assert controller.limit == 3
+        controller.observe_headers({})
+        assert controller.limit == 3
+
+    def test_rate_limited_pauses_admission(self):
+        """After a rate limit, calls are held until Retry-After has passed"""
+        controller = AdmissionController("test", max_in_flight=4, max_queue=4, queue_timeout=0.1)
+
+        controller.rate_limited(30)
+
+        assert controller.limit == 2
+        assert controller.try_acquire() is False
+        with pytest.raises(OverloadedError) as excinfo:
+            controller.acquire()
+        assert excinfo.value.retry_after >= 29
+
+    def test_spent_allowance_pauses_until_reset(self):
+        """With no requests left, calls are held until the allowance resets"""
+        controller = AdmissionController("test", max_in_flight=4, max_queue=0, queue_timeout=1)
+
+        controller.observe_headers({"x-ratelimit-limit-requests": "500", "x-ratelimit-remaining-requests": "0",
+                                    "x-ratelimit-reset-requests": "20s"})
+
+        assert controller.try_acquire() is False
+        assert controller.retry_after() >= 19
+
+    def test_parse_reset_duration(self):
+        assert parse_reset_duration("6m0s") == 360
+        assert parse_reset_duration("1.5s") == 1.5
+        assert parse_reset_duration("250ms") == 0.25
+        assert parse_reset_duration("soon") is None
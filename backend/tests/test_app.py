@@ -74,4 +74,12 @@ def test_router_registration():
     chat_routes = [route for route in app.routes if '/chat' in str(route.path)]
     
     # Assert that at least one chat route exists
-    assert len(chat_routes) > 0, "No chat routes found in the application"
\ No newline at end of file
+    assert len(chat_routes) > 0, "No chat routes found in the application"
+def test_metrics_endpoint():
+    """Test that the metrics endpoint exposes upstream budget gauges."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.json()
+    assert "counters" in body
+    assert "upstream.openweather.remaining_minute" in body["gauges"]
+    assert "upstream.newsapi.remaining_day" in body["gauges"]
@@ -0,0 +1,55 @@
+import pytest
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.batcher import BatchLoader
+
+
+class TestBatchLoader:
+    """Test suite for merging concurrent lookups into bulk loads"""
+
+    def test_concurrent_requests_share_one_call(self):
+        """Keys requested within the window are loaded together"""
+        calls = []
+        loader = BatchLoader("test", lambda keys: calls.append(sorted(keys)) or {k: k.lower() for k in keys}, window=0.1)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(loader.load, keys) for keys in (["AAPL"], ["MSFT", "AAPL"], ["NVDA"])]
+            results = [f.result() for f in futures]
+
+        assert calls == [["AAPL", "MSFT", "NVDA"]]
+        assert results == [{"AAPL": "aapl"}, {"MSFT": "msft", "AAPL": "aapl"}, {"NVDA": "nvda"}]
+        assert loader.stats() == {"batches": 1, "keys_loaded": 3}
+
+    def test_large_requests_are_split(self):
+        """No load call receives more than max_batch keys"""
+        calls = []
+        loader = BatchLoader("test", lambda keys: calls.append(len(keys)) or {k: k for k in keys}, max_batch=2, window=0)
+
+        results = loader.load(["a", "b", "c", "d", "e"])
+
+        assert max(calls) == 2
+        assert sum(calls) == 5
+        assert results == {k: k for k in "abcde"}
+
+    def test_missing_keys_are_left_out(self):
+        """Keys the loader does not return are absent from the result"""
+        loader = BatchLoader("test", lambda keys: {"AAPL": 1}, window=0)
+
+        assert loader.load(["AAPL", "ZZZZ"]) == {"AAPL": 1}
+
+    def test_errors_reach_every_waiter(self):
+        """A failed load raises in every caller that shared it"""
+        def fail(keys):
+            raise RuntimeError("upstream down")
+        loader = BatchLoader("test", fail, window=0.1)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(loader.load, [key]) for key in ("AAPL", "MSFT")]
+            for future in futures:
+                with pytest.raises(RuntimeError):
+                    future.result()
@@ -0,0 +1,155 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.cache_warmer import CacheWarmer, register_default_targets
+from utils.ttl_cache import TTLCache
+
+
+class TestCacheWarmer:
+    """Test suite for the background cache warmer"""
+
+    def test_pinned_keys_are_warmed(self):
+        """Pinned keys are loaded even without any traffic"""
+        cache = TTLCache("test", ttl=600)
+        refresh = MagicMock(return_value={"temp": 100})
+        warmer = CacheWarmer(calls_per_minute=10, lead_seconds=60)
+        warmer.register("weather", cache, refresh, pinned=[("phoenix", "imperial")])
+
+        assert warmer.run_once() == 1
+        refresh.assert_called_once_with(("phoenix", "imperial"))
+        assert cache.get(("phoenix", "imperial")) == {"temp": 100}
+
+    def test_fresh_entries_are_skipped(self):
+        """Entries far from expiry are not refreshed"""
+        cache = TTLCache("test", ttl=600)
+        cache.set("key", "value")
+        refresh = MagicMock()
+        warmer = CacheWarmer(calls_per_minute=10, lead_seconds=60)
+        warmer.register("test", cache, refresh, pinned=["key"])
+
+        assert warmer.run_once() == 0
+        refresh.assert_not_called()
+
+    def test_entries_near_expiry_are_refreshed(self):
+        """Popular entries about to expire are reloaded ahead of time"""
+        cache = TTLCache("test", ttl=600)
+        cache.set("seattle", "old", ttl=30)
+        cache.get("seattle")
+        refresh = MagicMock(return_value="new")
+        warmer = CacheWarmer(calls_per_minute=10, lead_seconds=60)
+        warmer.register("test", cache, refresh)
+
+        assert warmer.run_once() == 1
+        assert cache.get("seattle") == "new"
+
+    def test_budget_limits_refreshes(self):
+        """No more than the per-minute budget is spent on upstream calls"""
+        cache = TTLCache("test", ttl=600)
+        refresh = MagicMock(side_effect=lambda key: key)
+        warmer = CacheWarmer(calls_per_minute=2, lead_seconds=60)
+        warmer.register("test", cache, refresh, pinned=["a", "b", "c"])
+
+        assert warmer.run_once() == 2
+        assert warmer.run_once() == 0
+        assert refresh.call_count == 2
+
+    def test_failed_refresh_is_counted(self):
+        """Refresh errors are logged and counted, not raised"""
+        cache = TTLCache("test", ttl=600)
+        warmer = CacheWarmer(calls_per_minute=10)
+        warmer.register("test", cache, MagicMock(side_effect=RuntimeError("down")), pinned=["a"])
+
+        assert warmer.run_once() == 0
+        assert warmer.failed == 1
+
+    def test_failing_key_backs_off(self):
+        """A key whose refresh keeps failing is retried after a growing delay"""
+        cache = TTLCache("test", ttl=600)
+        refresh = MagicMock(side_effect=RuntimeError("down"))
+        warmer = CacheWarmer(calls_per_minute=10, interval=15, max_backoff=60)
+        warmer.register("test", cache, refresh, pinned=["a"])
+
+        warmer.run_once()
+        warmer.run_once()
+        assert refresh.call_count == 1
+        assert warmer._failures[("test", "a")][1] == pytest.approx(time.time() + 30, abs=5)
+
+        # Once the delay has passed the key is retried and the next delay doubles, up to max_backoff
+        for count in (2, 3):
+            warmer._failures[("test", "a")] = (count - 1, 0)
+            warmer.run_once()
+            assert warmer._failures[("test", "a")][0] == count
+            assert warmer._failures[("test", "a")][1] == pytest.approx(time.time() + 60, abs=5)
+        assert refresh.call_count == 3
+
+    def test_success_clears_backoff(self):
+        cache = TTLCache("test", ttl=600)
+        refresh = MagicMock(side_effect=[RuntimeError("down"), "value"])
+        warmer = CacheWarmer(calls_per_minute=10)
+        warmer.register("test", cache, refresh, pinned=["a"])
+
+        warmer.run_once()
+        warmer._failures[("test", "a")] = (1, 0)
+        assert warmer.run_once() == 1
+        assert ("test", "a") not in warmer._failures
+
+    def test_skipped_keys_are_not_warmed(self):
+        """Keys the target knows will fail, such as unknown cities, cost no upstream calls"""
+        cache = TTLCache("test", ttl=600)
+        refresh = MagicMock(side_effect=lambda key: key)
+        warmer = CacheWarmer(calls_per_minute=10)
+        warmer.register("test", cache, refresh, pinned=["atlantis", "paris"], skip=lambda key: key == "atlantis")
+
+        assert warmer.run_once() == 1
+        refresh.assert_called_once_with("paris")
+
+    def test_daily_allowance_spaces_refreshes(self):
+        """A target with a daily allowance is refreshed no more often than it permits"""
+        cache = TTLCache("test", ttl=1)
+        refresh = MagicMock(side_effect=lambda key: key)
+        warmer = CacheWarmer(calls_per_minute=10)
+        warmer.register("test", cache, refresh, pinned=["a", "b"], calls_per_day=24)
+
+        assert warmer.run_once() == 1
+        assert warmer.run_once() == 0
+        assert warmer.targets["test"].next_call_at == pytest.approx(time.time() + 3600, abs=5)
+
+    @patch('services.cache_warmer.CACHE_WARMING_NEWS_DAILY_SHARE', 0.1)
+    @patch('services.cache_warmer.NEWSAPI_CALLS_PER_DAY', 100)
+    @patch('services.news_service.NEWS_API_KEY', 'key')
+    @patch('services.weather_service.WEATHER_API_KEY', None)
+    def test_default_news_target_fits_daily_quota(self):
+        """News warming pins only the top headlines and stays within its share of the daily quota"""
+        warmer = CacheWarmer()
+        register_default_targets(warmer)
+
+        target = warmer.targets["news.headlines"]
+        assert len(target.pinned) == 1
+        assert target.spacing == 24 * 60 * 60 / 10
+
+    @patch('services.cache_warmer.CACHE_WARMING_NEWS_DAILY_SHARE', 0)
+    @patch('services.news_service.NEWS_API_KEY', 'key')
+    @patch('services.weather_service.WEATHER_API_KEY', None)
+    def test_news_warming_can_be_disabled(self):
+        warmer = CacheWarmer()
+        register_default_targets(warmer)
+        assert "news.headlines" not in warmer.targets
+
+    @patch('services.weather_service.WEATHER_API_KEY', 'key')
+    @patch('services.news_service.NEWS_API_KEY', None)
+    def test_unknown_cities_are_skipped(self):
+        from services.weather_service import unknown_city_cache, _weather_key
+        unknown_city_cache.set("atlantis", True)
+        warmer = CacheWarmer()
+        register_default_targets(warmer)
+
+        target = warmer.targets["weather.current"]
+        assert target.skip(_weather_key("Atlantis"))
+        assert not target.skip(_weather_key("Paris"))
+        unknown_city_cache.delete("atlantis")
@@ -0,0 +1,85 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.casual_service import respond_casual, match_casual, CASUAL_TEMPLATES
+from services.session_service import Session
+
+
+class TestCasualService:
+    """Test suite for casual_service.py"""
+
+    def test_match_casual_kinds_in_order(self):
+        """Kinds are listed in the order they appear, without duplicates"""
+        kinds, name = match_casual("Hi! Who are you? Hello again")
+        assert kinds == ["greeting", "identity"]
+        assert name is None
+
+    def test_match_casual_introduction(self):
+        """A name the user gives is captured and capitalized"""
+        kinds, name = match_casual("hey, my name is sam")
+        assert kinds == ["greeting", "introduction"]
+        assert name == "Sam"
+
+    def test_no_match_returns_none(self):
+        """Messages without a casual phrase are left to the LLM"""
+        assert respond_casual("Explain quantum computing") is None
+        # "hi" inside another word is not a greeting
+        assert respond_casual("This is something else") is None
+
+    @pytest.mark.parametrize("message", [
+        "hi what is the capital of France",
+        "thanks so much, now what is the boiling point of water?",
+        "hey who are you and what is 2+2",
+    ])
+    def test_casual_phrase_with_question_left_to_llm(self, message):
+        """A casual phrase inside a real question does not get a template answer"""
+        assert match_casual(message) == ([], None)
+        assert respond_casual(message) is None
+
+    def test_filler_around_casual_phrases(self):
+        assert match_casual("Thanks so much!")[0] == ["thanks"]
+        assert match_casual("Good morning, how are you doing today?")[0] == ["greeting", "how_are_you"]
+
+    @pytest.mark.parametrize("message", ["Call me later", "my name is not important", "call me Sam tomorrow"])
+    def test_phrases_that_are_not_introductions(self, message):
+        """Words after "my name is" or "call me" that are not names are never remembered"""
+        session = Session("s3")
+        respond_casual(message, session)
+        assert "name" not in session.profile
+
+    def test_call_me_at_end_is_introduction(self):
+        assert match_casual("Please call me Sam.") == (["introduction"], "Sam")
+
+    @patch('services.casual_service.CASUAL_RESPONSE_VARIATION', False)
+    def test_first_template_without_variation(self):
+        """With variation off the first template is always used"""
+        assert respond_casual("Hello") == "Hello! How can I help you today?"
+        assert respond_casual("Who are you?").startswith("I'm Chatbot Assistant")
+
+    @patch('services.casual_service.CASUAL_RESPONSE_VARIATION', False)
+    def test_several_kinds_answered_in_order(self):
+        """A greeting followed by a question gets a short greeting and the answer"""
+        response = respond_casual("Hello, what's your name?")
+        assert response == "Hello! My name is Chatbot Assistant."
+
+    @patch('services.casual_service.CASUAL_RESPONSE_VARIATION', False)
+    def test_session_personalization(self):
+        """A remembered name is used in later replies and repeat greetings are recognized"""
+        session = Session("s1")
+        assert respond_casual("My name is Sam", session) == "Nice to meet you, Sam!"
+        assert session.profile["name"] == "Sam"
+        assert respond_casual("Thanks", session) == "You're welcome, Sam!"
+        assert respond_casual("Hi", session) == "Hello, Sam! How can I help you today?"
+        assert respond_casual("Hi", session) == "Welcome back, Sam! What can I help with?"
+
+    def test_variation_avoids_repeating(self):
+        """With variation on, the same session does not get the same joke twice in a row"""
+        session = Session("s2")
+        jokes = [respond_casual("Tell me a joke", session) for _ in range(20)]
+        assert all(joke in CASUAL_TEMPLATES["joke"] for joke in jokes)
+        assert all(a != b for a, b in zip(jokes, jokes[1:]))
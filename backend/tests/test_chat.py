@@ -3,8 +3,10 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pytest
+from unittest.mock import ANY
 from logging import Logger
 from routes.chat import chat_endpoint
+from utils.admission import OverloadedError
 from pydantic import BaseModel
 from fastapi import Request
 
@@ -12,6 +14,7 @@ from fastapi import Request
 class ChatRequest(BaseModel):
     message: str
     test_ip: str = None
+    session_id: str = None
 
 @pytest.mark.asyncio
 class TestChatEndpoint:
@@ -38,7 +41,7 @@ class TestChatEndpoint:
         assert response == {"response": "Test response"}
         mock_logger.info.assert_any_call("Received message: Hello")
         mock_logger.info.assert_any_call("OpenAI Response: Test response")
-        mock_chat_with_memory.assert_called_once_with("Hello", client_ip="127.0.0.1")
+        mock_chat_with_memory.assert_called_once_with("Hello", client_ip="127.0.0.1", plan=ANY)
 
     async def test_error_handling(self, mock_logger, mock_chat_with_memory, mock_request):
         mock_chat_with_memory.side_effect = Exception("Test error")
@@ -49,6 +52,16 @@ class TestChatEndpoint:
         assert response == {"error": "Internal Server Error"}
         mock_logger.error.assert_called_once()
 
+    async def test_overloaded_returns_503(self, mock_logger, mock_chat_with_memory, mock_request):
+        mock_chat_with_memory.side_effect = OverloadedError("llm is overloaded: queue full", 2.5)
+        request = ChatRequest(message="Hello")
+        
+        response = await chat_endpoint(request, mock_request)
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "3"
+        mock_logger.error.assert_not_called()
+
     async def test_empty_message(self, mock_logger, mock_chat_with_memory, mock_request):
         mock_chat_with_memory.return_value = ""
         request = ChatRequest(message="")
@@ -57,7 +70,7 @@ class TestChatEndpoint:
         
         assert response == {"response": ""}
         mock_logger.info.assert_any_call("Received message: ")
-        mock_chat_with_memory.assert_called_once_with("", client_ip="127.0.0.1")
+        mock_chat_with_memory.assert_called_once_with("", client_ip="127.0.0.1", plan=ANY)
 
     async def test_special_characters_message(self, mock_logger, mock_chat_with_memory, mock_request):
         mock_chat_with_memory.return_value = "Special response"
@@ -67,7 +80,7 @@ class TestChatEndpoint:
         
         assert response == {"response": "Special response"}
         mock_logger.info.assert_any_call("Received message: !@#$%^&*()")
-        mock_chat_with_memory.assert_called_once_with("!@#$%^&*()", client_ip="127.0.0.1")
+        mock_chat_with_memory.assert_called_once_with("!@#$%^&*()", client_ip="127.0.0.1", plan=ANY)
         
     async def test_with_test_ip_override(self, mock_logger, mock_chat_with_memory, mock_request):
         mock_chat_with_memory.return_value = "Test response with custom IP"
@@ -76,5 +89,29 @@ class TestChatEndpoint:
         response = await chat_endpoint(request, mock_request)
         
         assert response == {"response": "Test response with custom IP"}
-        mock_chat_with_memory.assert_called_once_with("Hello", client_ip="192.168.1.100")
-        mock_logger.debug.assert_called_once_with("Using IP: 192.168.1.100")
\ No newline at end of file
+        mock_chat_with_memory.assert_called_once_with("Hello", client_ip="192.168.1.100", plan=ANY)
+        mock_logger.debug.assert_called_once_with("Using IP: 192.168.1.100")
+
+    async def test_with_session_id(self, mock_logger, mock_chat_with_memory, mock_request):
+        mock_chat_with_memory.return_value = "Hello again"
+        request = ChatRequest(message="Hello", session_id="abc123")
+        
+        response = await chat_endpoint(request, mock_request)
+        
+        assert response == {"response": "Hello again"}
+        mock_chat_with_memory.assert_called_once_with("Hello", client_ip="127.0.0.1", session_id="abc123", plan=ANY)
+
+    @pytest.mark.parametrize("cost", ["cheap", "expensive"])
+    async def test_request_planned_once(self, mocker, mock_logger, mock_chat_with_memory, mock_request, cost):
+        mock_plan_request = mocker.patch('routes.chat.plan_request')
+        mock_plan_request.return_value.cost = cost
+        mock_chat_with_memory.return_value = "Answer"
+        request = ChatRequest(message="Hello")
+        
+        response = await chat_endpoint(request, mock_request)
+        
+        assert response == {"response": "Answer"}
+        mock_plan_request.assert_called_once_with("Hello", client_ip="127.0.0.1")
+        mock_chat_with_memory.assert_called_once_with(
+            "Hello", client_ip="127.0.0.1", plan=mock_plan_request.return_value
+        )
@@ -0,0 +1,72 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.city_index import CityIndex, edit_distance, get_city_index, get_gazetteer, resolve_city
+
+
+class TestCityIndex:
+    """Test suite for local city name resolution"""
+
+    def test_edit_distance(self):
+        """Test Levenshtein distance and the early-exit limit"""
+        assert edit_distance("seattle", "seattle") == 0
+        assert edit_distance("seatle", "seattle") == 1
+        assert edit_distance("chicgao", "chicago") == 1
+        assert edit_distance("atlantis", "atlanta") == 2
+        assert edit_distance("london", "tokyo", limit=1) == 2
+
+    def test_exact_match_returns_canonical_spelling(self):
+        """Test that exact matches ignore case and spacing"""
+        index = CityIndex(["New York", "Los Angeles"])
+        assert index.closest("  new   york ") == "New York"
+        assert "LOS ANGELES" in index
+
+    def test_near_miss_is_corrected(self):
+        """Test that one or two typos resolve to the intended city"""
+        index = CityIndex(["Seattle", "Phoenix", "San Francisco"])
+        assert index.closest("Seatle") == "Seattle"
+        assert index.closest("Phoenx") == "Phoenix"
+        assert index.closest("San Fransisco") == "San Francisco"
+        assert index.closest("San Frnasisco") == "San Francisco"
+
+    def test_short_and_distant_names_are_not_corrected(self):
+        """Test that short names and far-off names are left alone"""
+        index = CityIndex(["Rome", "Oslo", "Seattle"])
+        assert index.closest("Rom") is None
+        assert index.closest("NonExistentCity") is None
+        assert CityIndex(["Atlanta"]).closest("Atlantis") is None
+
+    def test_ambiguous_matches_are_not_corrected(self):
+        """Test that ties between candidates do not guess"""
+        index = CityIndex(["Paris", "Parks"])
+        assert index.closest("Parts") is None
+
+    def test_bundled_index_includes_gazetteer_names(self):
+        """Test that the fuzzy index covers world cities and Arizona towns from the gazetteer"""
+        index = get_city_index()
+        assert "London" in index
+        assert len(index) == len(get_gazetteer())
+        assert index.canonical("casa grande") == "Casa Grande"
+
+    def test_gazetteer_is_rebuilt_when_city_list_changes(self, tmp_path):
+        """Test that a missing or outdated compiled file is rebuilt from the city list"""
+        import services.city_index as city_index
+        source = tmp_path / "cities.txt"
+        source.write_text("# comment\nTestville\n")
+        path = str(tmp_path / "gazetteer.bin")
+        original = city_index._gazetteer
+        try:
+            city_index._gazetteer = None
+            assert "testville" in city_index.get_gazetteer(path, str(source))
+        finally:
+            city_index._gazetteer = original
+
+    def test_resolve_city_passes_unknown_names_through(self):
+        """Test that unknown cities are returned unchanged"""
+        assert resolve_city("Tucsn") == "Tucson"
+        assert resolve_city("phoenix") == "phoenix"
+        assert resolve_city("Atlantis") == "Atlantis"
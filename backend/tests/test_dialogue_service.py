@@ -0,0 +1,74 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.dialogue_service import remember_dialogue, resolve_follow_up
+from services.session_service import Session
+
+
+class TestDialogueService:
+    """Test suite for dialogue_service.py"""
+
+    def setup_method(self):
+        self.session = Session("dialogue-test")
+        remember_dialogue(self.session, "weather", locations=["Seattle"], unit="imperial", time_period=None)
+
+    def test_time_period_follow_up(self):
+        """Only the time period changes; location and unit carry over"""
+        intent, slots = resolve_follow_up("What about tomorrow?", self.session)
+        assert intent == "weather"
+        assert slots == {"locations": ["Seattle"], "unit": "imperial", "time_period": "tomorrow"}
+
+    def test_location_follow_up(self):
+        assert resolve_follow_up("And in Denver?", self.session)[1]["locations"] == ["Denver"]
+        # Places missing from the gazetteer still count after an explicit opening
+        assert resolve_follow_up("how about Reykjavik", self.session)[1]["locations"] == ["Reykjavik"]
+
+    def test_bare_slot_follow_ups(self):
+        """Short messages made only of slot values are follow-ups"""
+        assert resolve_follow_up("tomorrow?", self.session)[1]["time_period"] == "tomorrow"
+        assert resolve_follow_up("in celsius", self.session)[1]["unit"] == "metric"
+        assert resolve_follow_up("in mesa", self.session)[1]["locations"] == ["Mesa"]
+
+    def test_everyday_word_places_need_indicator(self):
+        """Town names that are everyday words only count after "in", "for"..."""
+        assert resolve_follow_up("in Nice tomorrow", self.session)[1]["locations"] == ["Nice"]
+        assert resolve_follow_up("Nice tomorrow", self.session) is None
+
+    @pytest.mark.parametrize("message", [
+        "Tell me about Paris",
+        "What about the news?",
+        "Why?",
+        "Thank you",
+        "Can you explain how weather forecasts are made for tomorrow in detail?",
+    ])
+    def test_not_follow_ups(self, message):
+        assert resolve_follow_up(message, self.session) is None
+
+    def test_news_follow_ups(self):
+        remember_dialogue(self.session, "news", categories=["technology"], queries=[])
+        assert resolve_follow_up("What about sports?", self.session) == (
+            "news", {"categories": ["sports"], "queries": []}
+        )
+        assert resolve_follow_up("how about tesla", self.session) == (
+            "news", {"categories": ["technology"], "queries": ["tesla"]}
+        )
+        assert resolve_follow_up("I love sports", self.session) is None
+
+    @pytest.mark.parametrize("message", [
+        "And you?", "What about you?", "what about it", "what about Monday", "and tomorrow?", "What about them?",
+    ])
+    def test_pronouns_and_time_words_are_not_news_topics(self, message):
+        remember_dialogue(self.session, "news", categories=["technology"], queries=[])
+        assert resolve_follow_up(message, self.session) is None
+
+    def test_no_state_or_expired_state(self):
+        assert resolve_follow_up("What about tomorrow?", None) is None
+        assert resolve_follow_up("What about tomorrow?", Session("fresh")) is None
+        with patch('services.dialogue_service.time.time', return_value=time.time() + 3600):
+            assert resolve_follow_up("What about tomorrow?", self.session) is None
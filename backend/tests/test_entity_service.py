@@ -111,6 +111,38 @@ class TestEntityService:
             entities = extract_entities(message, intent="weather")
             assert "GPE" in entities
             assert "Tempe" in entities["GPE"] or "Tempe" in [e.lower() for e in entities["GPE"]]
+
+    def test_multi_word_place_after_indicator(self):
+        """Test that the longest known place name after an indicator is used"""
+        entities = extract_entities("how hot is it in lake havasu city right now", intent="weather")
+        assert "Lake Havasu City" in entities["GPE"]
+
+        entities = extract_entities("what's it like for the week in casa grande?", intent="weather")
+        assert "Casa Grande" in entities["GPE"]
+
+    def test_known_places_tagged_in_pipeline(self):
+        """Test that the gazetteer component tags places for weather messages only"""
+        entities = extract_entities("Mesa weather tomorrow", intent="weather")
+        assert "Mesa" in entities["GPE"]
+
+        # Lowercase town names that are everyday words need a location indicator
+        entities = extract_entities("should I page someone if it snows", intent="weather")
+        assert entities["GPE"] == []
+
+        entities = extract_entities("Tell me about Gilbert", intent="general")
+        assert "Gilbert" not in entities["GPE"]
+
+
+    @pytest.mark.parametrize("message, expected", [
+        ("Nice weather in Seattle today?", ["Seattle"]),
+        ("Surprise me with the weather in Denver", ["Denver"]),
+        ("Page through the weather for Boston", ["Boston"]),
+        ("What's the weather in Nice?", ["Nice"]),
+    ])
+    def test_everyday_words_at_sentence_start_are_not_places(self, message, expected):
+        """Capitalized sentence-initial words that double as town names are not places"""
+        entities = extract_entities(message, intent="weather")
+        assert entities["GPE"] == expected
             
     def test_time_period_extraction(self):
         """Test extraction of time period entities"""
@@ -0,0 +1,62 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.gazetteer import Gazetteer, build_gazetteer
+
+
+class TestGazetteer:
+    """Test suite for the memory-mapped place-name table"""
+
+    def _open(self, tmp_path, names):
+        path = str(tmp_path / "gazetteer.bin")
+        build_gazetteer(names, path)
+        return Gazetteer(path)
+
+    def test_exact_lookup_is_case_and_space_insensitive(self, tmp_path):
+        """Test that lookups normalize the name and return the stored spelling"""
+        gazetteer = self._open(tmp_path, ["New York", "Lake Havasu City", "São Paulo"])
+        assert gazetteer.get("new  york") == "New York"
+        assert gazetteer.get("LAKE HAVASU CITY?") == "Lake Havasu City"
+        assert gazetteer.get("são paulo") == "São Paulo"
+        assert gazetteer.get("New") is None
+        assert "Atlantis" not in gazetteer
+
+    def test_duplicates_keep_first_spelling(self, tmp_path):
+        """Test that names differing only in case are stored once"""
+        gazetteer = self._open(tmp_path, ["Mesa", "mesa", "MESA"])
+        assert len(gazetteer) == 1
+        assert gazetteer.get("mesa") == "Mesa"
+
+    def test_prefix_search(self, tmp_path):
+        """Test that prefix queries return sorted matches up to the limit"""
+        gazetteer = self._open(tmp_path, ["San Diego", "San Jose", "Santiago", "Seattle", "Salem"])
+        assert gazetteer.with_prefix("san") == ["San Diego", "San Jose", "Santiago"]
+        assert gazetteer.with_prefix("san", limit=1) == ["San Diego"]
+        assert gazetteer.with_prefix("x") == []
+
+    def test_many_names(self, tmp_path):
+        """Test that every name in a large table can be found"""
+        names = [f"Town {i}" for i in range(20000)]
+        gazetteer = self._open(tmp_path, names)
+        assert len(gazetteer) == 20000
+        assert all(gazetteer.get(name) == name for name in names[::997])
+        assert gazetteer.get("Town 20000") is None
+        assert sorted(gazetteer.names(), key=str.lower) == sorted(names, key=str.lower)
+
+    def test_empty_table(self, tmp_path):
+        """Test that an empty gazetteer answers every lookup with None"""
+        gazetteer = self._open(tmp_path, [])
+        assert len(gazetteer) == 0
+        assert gazetteer.get("Phoenix") is None
+        assert gazetteer.with_prefix("p") == []
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file without the gazetteer header is refused"""
+        path = tmp_path / "cities.txt"
+        path.write_text("Phoenix\nTucson\n")
+        with pytest.raises(ValueError):
+            Gazetteer(str(path))
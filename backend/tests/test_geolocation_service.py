@@ -7,12 +7,18 @@ import requests
 # Add the parent directory to the path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from services.geolocation_service import get_location_from_ip
+from services.geolocation_service import get_location_from_ip, geolocation_cache
+from utils.ip_ranges import IPRangeTable, build_ip_table
+from config import GEOLOCATION_NEGATIVE_TTL
 
 
 class TestGeolocationService:
     """Test suite for geolocation service"""
 
+    def setup_method(self):
+        """Clear cached locations before each test"""
+        geolocation_cache.clear()
+
     @patch('services.geolocation_service.requests.get')
     def test_get_location_from_ip_success(self, mock_get):
         """Test successful geolocation lookup"""
@@ -97,4 +103,84 @@ class TestGeolocationService:
         assert result["city"] is None
         assert result["region"] is None
         assert result["country"] is None
-        assert result["loc"] is None
\ No newline at end of file
+        assert result["loc"] is None
+
+    @patch('services.geolocation_service.requests.get')
+    def test_offline_database_answers_without_network(self, mock_get, tmp_path):
+        """Test that addresses in the local range table never reach ipinfo.io"""
+        source = tmp_path / "geoip.csv"
+        source.write_text("network,city,region,country,loc\n68.98.0.0/16,Phoenix,Arizona,US,\"33.4484,-112.0740\"\n")
+        build_ip_table(str(source), str(tmp_path / "geoip.bin"))
+        table = IPRangeTable(str(tmp_path / "geoip.bin"))
+
+        with patch('services.geolocation_service.get_ip_table', return_value=table):
+            result = get_location_from_ip("68.98.8.91")
+
+        assert result["city"] == "Phoenix"
+        assert result["loc"] == "33.4484,-112.0740"
+        mock_get.assert_not_called()
+
+    @patch('services.geolocation_service.get_ip_table', return_value=None)
+    @patch('services.geolocation_service.requests.get')
+    def test_ipinfo_fallback_can_be_disabled(self, mock_get, mock_table):
+        """Test that no network call is made when the fallback is disabled"""
+        with patch('services.geolocation_service.IPINFO_FALLBACK_ENABLED', False):
+            result = get_location_from_ip("8.8.8.8")
+
+        assert result is None
+        mock_get.assert_not_called()
+
+    @patch('services.geolocation_service.requests.get')
+    def test_private_and_reserved_addresses_skip_lookup(self, mock_get):
+        """Test that addresses no service can place are answered locally"""
+        for ip in ["127.0.0.1", "10.1.2.3", "192.168.1.100", "::1", "fe80::1", "0.0.0.0", "invalid_ip"]:
+            assert get_location_from_ip(ip) is None
+
+        mock_get.assert_not_called()
+
+    @patch('services.geolocation_service.get_ip_table', return_value=None)
+    @patch('services.geolocation_service.requests.get')
+    def test_clients_in_same_subnet_share_cache_entry(self, mock_get, mock_table):
+        """Test that repeat lookups from one /24 are served from the cache"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"city": "Phoenix", "region": "Arizona", "country": "US", "loc": "33.4,-112.0"}
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        first = get_location_from_ip("68.98.8.91")
+        second = get_location_from_ip("68.98.8.17")
+        other_subnet = get_location_from_ip("68.98.9.17")
+
+        assert first["city"] == second["city"] == other_subnet["city"] == "Phoenix"
+        assert mock_get.call_count == 2
+        assert geolocation_cache.stats()["hits"] == 1
+
+    @patch('services.geolocation_service.get_ip_table', return_value=None)
+    @patch('services.geolocation_service.requests.get')
+    def test_failed_lookups_are_negatively_cached(self, mock_get, mock_table):
+        """Test that a failure is remembered briefly instead of retried every message"""
+        mock_get.side_effect = requests.exceptions.RequestException("Connection error")
+
+        assert get_location_from_ip("8.8.8.8") is None
+        assert get_location_from_ip("8.8.8.8") is None
+
+        assert mock_get.call_count == 1
+        entry = geolocation_cache.get_entry("8.8.8.0/24")
+        assert entry.expires_at - entry.stored_at == GEOLOCATION_NEGATIVE_TTL
+
+    @patch('services.geolocation_service.get_ip_table', return_value=None)
+    @patch('services.geolocation_service.requests.get')
+    def test_subnet_aggregation_can_be_disabled(self, mock_get, mock_table):
+        """Test that each address gets its own entry without aggregation"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {"city": "Phoenix"}
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        with patch('services.geolocation_service.GEOLOCATION_AGGREGATE_SUBNETS', False):
+            get_location_from_ip("68.98.8.91")
+            get_location_from_ip("68.98.8.17")
+            get_location_from_ip("2001:4860:4860::8888")
+
+        assert mock_get.call_count == 3
+        assert geolocation_cache.get_entry("2001:4860:4860::8888") is not None
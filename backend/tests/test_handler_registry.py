@@ -0,0 +1,81 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.handler_registry import HandlerRegistry, MessageAnalysis
+
+
+class TestHandlerRegistry:
+    """Test suite for intent handler routing with declared analysis outputs"""
+
+    def setup_method(self):
+        self.calls = []
+
+        def entities(analysis):
+            self.calls.append("entities")
+            return {"GPE": ["Phoenix"]}
+
+        def location(analysis):
+            self.calls.append("location")
+            return analysis.entities["GPE"][0]
+
+        self.registry = HandlerRegistry({"entities": entities, "location": location})
+
+        @self.registry.register("weather", needs=("location",))
+        def weather(analysis):
+            return f"weather in {analysis.location}"
+
+        @self.registry.register("news")
+        def news(analysis):
+            return f"news for {analysis.user_message}"
+
+        @self.registry.register("general")
+        def general(analysis):
+            return "llm"
+
+    def test_only_declared_outputs_are_computed(self):
+        """A handler without needs never triggers analysis"""
+        analysis = self.registry.analyze(user_message="tech news", intent="news")
+
+        assert self.registry.dispatch("news", analysis) == "news for tech news"
+        assert self.calls == []
+        assert analysis.computed() == set()
+
+    def test_outputs_are_computed_lazily_once(self):
+        """Outputs are computed on first read, including those they depend on, and reused"""
+        analysis = self.registry.analyze(user_message="weather in Phoenix", intent="weather")
+
+        assert self.registry.dispatch("weather", analysis) == "weather in Phoenix"
+        assert analysis.location == "Phoenix"
+        assert self.calls == ["location", "entities"]
+        assert analysis.computed() == {"entities", "location"}
+
+    def test_undeclared_outputs_are_refused(self):
+        """Handlers cannot read outputs they did not declare"""
+        @self.registry.register("stocks")
+        def stocks(analysis):
+            return analysis.entities
+
+        with pytest.raises(AttributeError):
+            self.registry.dispatch("stocks", self.registry.analyze(user_message="AAPL", intent="stocks"))
+        assert self.calls == []
+
+    def test_unregistered_intent_uses_default_handler(self):
+        """Intents without a handler fall back to the default intent's handler"""
+        analysis = self.registry.analyze(user_message="hello", intent="casual")
+
+        assert self.registry.dispatch("casual", analysis) == "llm"
+        assert "casual" not in self.registry
+
+    def test_unknown_needs_rejected(self):
+        """Registering a handler that needs an output with no analyzer fails fast"""
+        with pytest.raises(ValueError):
+            self.registry.register("stocks", needs=("tickers",))
+
+    def test_analysis_get_unknown_output(self):
+        """Asking for an output that is neither an input nor an analyzer raises KeyError"""
+        with pytest.raises(KeyError):
+            MessageAnalysis({}, user_message="hi").get("entities")
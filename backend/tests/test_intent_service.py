@@ -9,8 +9,11 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from services.intent_service import (
     detect_intent,
+    detect_intents,
     detect_news_category,
+    detect_news_categories,
     extract_news_query,
+    split_news_query,
     detect_temperature_unit,
     INTENT_LABELS,
     NEWS_CATEGORIES
@@ -140,6 +143,37 @@ class TestIntentService(unittest.TestCase):
         result = extract_news_query("Just show me the news")
         self.assertIsNone(result)
     
+    def test_detect_news_categories(self):
+        # Every category mentioned is returned, in NEWS_CATEGORIES order
+        result = detect_news_categories("Give me tech and business news")
+        self.assertEqual(result, ["business", "technology"])
+        
+        # Keywords only match whole words
+        result = detect_news_categories("What's happening in the world today?")
+        self.assertEqual(result, [])
+    
+    def test_split_news_query(self):
+        result = split_news_query("climate change, the elections and taxes")
+        self.assertEqual(result, ["climate change", "the elections", "taxes"])
+        
+        result = split_news_query("artificial intelligence")
+        self.assertEqual(result, ["artificial intelligence"])
+        
+        self.assertEqual(split_news_query(None), [])
+    
+    def test_detect_intents(self):
+        # Separate requests are split with their own text
+        result = detect_intents("What's the weather in Phoenix and any tech news?")
+        self.assertEqual(result, [("weather", "What's the weather in Phoenix"), ("news", "any tech news")])
+        
+        # Clauses without a keyword stay with their request
+        self.assertEqual(detect_intents("tech and business news"), [("news", "tech and business news")])
+        self.assertEqual(detect_intents("Phoenix and Seattle weather"), [("weather", "Phoenix and Seattle weather")])
+        
+        # A sentence with no keyword is a general request
+        result = detect_intents("What's the weather in Phoenix? Who won the 1998 world cup?")
+        self.assertEqual(result, [("weather", "What's the weather in Phoenix"), ("general", "Who won the 1998 world cup")])
+    
     def test_detect_temperature_unit(self):
         # Test Celsius detection
         result = detect_temperature_unit("What's the temperature in Celsius?")
@@ -0,0 +1,75 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ip_ranges import IPRangeTable, build_ip_table
+
+CIDR_CSV = """network,city,region,country,latitude,longitude
+8.8.8.0/24,Mountain View,California,US,37.4056,-122.0775
+1.0.0.0/24,Brisbane,Queensland,AU,-27.4679,153.0281
+68.98.0.0/16,Phoenix,Arizona,US,33.4484,-112.0740
+2001:4860::/32,Mountain View,California,US,37.4056,-122.0775
+not-a-network,Nowhere,,,,
+"""
+
+RANGE_CSV = """start_ip,end_ip,city,region,country,loc
+10.0.0.0,10.0.0.255,Tempe,Arizona,US,"33.4255,-111.9400"
+10.0.2.0,10.0.2.255,Mesa,Arizona,US,"33.4152,-111.8315"
+"""
+
+
+class TestIPRangeTable:
+    """Test suite for the memory-mapped IP range table"""
+
+    def _build(self, tmp_path, content):
+        source = tmp_path / "geoip.csv"
+        source.write_text(content)
+        path = str(tmp_path / "geoip.bin")
+        build_ip_table(str(source), path)
+        return IPRangeTable(path)
+
+    def test_ipv4_lookup(self, tmp_path):
+        """Test that addresses inside a CIDR range resolve to its location"""
+        table = self._build(tmp_path, CIDR_CSV)
+        assert len(table) == 4
+        assert table.lookup("8.8.8.8") == {
+            "city": "Mountain View", "region": "California", "country": "US", "loc": "37.4056,-122.0775"
+        }
+        assert table.lookup("68.98.8.91")["city"] == "Phoenix"
+        assert table.lookup("1.0.0.255")["city"] == "Brisbane"
+
+    def test_ipv6_lookup(self, tmp_path):
+        """Test that IPv6 ranges are stored alongside IPv4 ones"""
+        table = self._build(tmp_path, CIDR_CSV)
+        assert table.lookup("2001:4860:4860::8888")["city"] == "Mountain View"
+        assert table.lookup("2001:4861::1") is None
+
+    def test_addresses_outside_ranges(self, tmp_path):
+        """Test gaps, addresses below the first range and above the last"""
+        table = self._build(tmp_path, CIDR_CSV)
+        assert table.lookup("0.0.0.1") is None
+        assert table.lookup("8.8.9.0") is None
+        assert table.lookup("255.255.255.255") is None
+
+    def test_start_end_columns(self, tmp_path):
+        """Test CSVs that give explicit first and last addresses"""
+        table = self._build(tmp_path, RANGE_CSV)
+        assert table.lookup("10.0.0.17")["city"] == "Tempe"
+        assert table.lookup("10.0.1.1") is None
+        assert table.lookup("10.0.2.255")["loc"] == "33.4152,-111.8315"
+
+    def test_invalid_address_raises(self, tmp_path):
+        """Test that malformed addresses raise ValueError"""
+        table = self._build(tmp_path, CIDR_CSV)
+        with pytest.raises(ValueError):
+            table.lookup("invalid_ip")
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that a file without the table header is refused"""
+        path = tmp_path / "geoip.csv"
+        path.write_text(CIDR_CSV)
+        with pytest.raises(ValueError):
+            IPRangeTable(str(path))
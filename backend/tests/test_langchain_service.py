@@ -1,28 +1,50 @@
 import pytest
 import os
 import sys
-from unittest.mock import patch, MagicMock
+import time
+from unittest.mock import patch, MagicMock, ANY
 
 # Add the parent directory to the path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import httpx
+from openai import RateLimitError
+from services import langchain_service
 from services.langchain_service import (
     chat_with_memory, 
-    handle_weather_request, 
-    handle_news_request, 
     handle_stocks_request,
-    conversation_history
+    plan_request
 )
+from services.response_cache import general_answers
+from services.preference_service import PreferenceStore, set_preference_store
+from services.session_service import get_session, sessions
+from utils.admission import AdmissionController, OverloadedError
 from langchain.schema import HumanMessage, AIMessage
 
 
+def history(session_id):
+    """The conversation history kept for a session"""
+    return get_session(session_id).history
+
+
+def route(intent, user_message, entities=None, client_ip=None, session=None):
+    """Answer a message through the handler registry, with its entities given rather than extracted"""
+    handlers = langchain_service.handlers
+    inputs = {} if entities is None else {"entities": entities}
+    analysis = handlers.analyze(
+        user_message=user_message, intent=intent, client_ip=client_ip, session=session, speculation=None, **inputs
+    )
+    return handlers.dispatch(intent, analysis)
+
+
 class TestLangchainService:
     """Test suite for langchain_service.py"""
     
     def setup_method(self):
-        """Setup method to clear conversation history before each test"""
-        # Clear conversation history
-        conversation_history.clear()
+        """Setup method to start each test without sessions (and so without conversation history)"""
+        # Keep learned preferences in memory rather than in the real database
+        set_preference_store(PreferenceStore(":memory:"))
+        sessions.clear()
     
     @patch('services.langchain_service.detect_intent')
     @patch('services.langchain_service.extract_entities')
@@ -40,10 +62,16 @@ class TestLangchainService:
         # Assertions
         mock_detect_intent.assert_called_once_with("What's the weather in New York?")
         mock_extract_entities.assert_called_once_with("What's the weather in New York?", intent="weather")
-        mock_weather_handler.assert_called_once_with({"GPE": ["New York"]}, "What's the weather in New York?", client_ip="192.168.1.1")
+        mock_weather_handler.assert_called_once_with(
+            ["New York"], "imperial", None, preferences={}, asked_locations=["New York"], session=ANY
+        )
         assert result == "Weather in New York is sunny."
-        # Verify conversation history wasn't modified for intent-based routing
-        assert len(conversation_history) == 0
+        # Routed answers are kept as tool results for later LLM turns, not in the history
+        assert len(history("192.168.1.1")) == 0
+        tool_results = get_session("192.168.1.1").tool_results
+        assert [(r.tool, r.request, r.result) for r in tool_results] == [
+            ("weather", "What's the weather in New York?", "Weather in New York is sunny.")
+        ]
 
     @patch('services.langchain_service.detect_intent')
     @patch('services.langchain_service.extract_entities')
@@ -62,16 +90,49 @@ class TestLangchainService:
         mock_detect_intent.assert_called_once_with("What's the weather in New York tomorrow?")
         mock_extract_entities.assert_called_once_with("What's the weather in New York tomorrow?", intent="weather")
         mock_weather_handler.assert_called_once_with(
-            {"GPE": ["New York"], "DATE": ["tomorrow"]}, 
-            "What's the weather in New York tomorrow?", 
-            client_ip=None
+            ["New York"], "imperial", "tomorrow", preferences={}, asked_locations=["New York"], session=None
         )
         assert result == "Weather in New York tomorrow will be sunny."
-        assert len(conversation_history) == 0
+
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.handle_news_request')
+    @patch('services.langchain_service.handle_weather_request')
+    def test_chat_with_memory_multiple_intents(self, mock_weather_handler, mock_news_handler, mock_extract_entities):
+        """Test that a message with two requests runs both handlers and combines the answers"""
+        mock_extract_entities.return_value = {"GPE": ["Phoenix"]}
+        mock_weather_handler.return_value = "It's sunny in Phoenix."
+        mock_news_handler.return_value = "Here are the latest headlines..."
+
+        result = chat_with_memory("What's the weather in Phoenix and any tech news?")
+
+        mock_weather_handler.assert_called_once_with(
+            ["Phoenix"], "imperial", None, preferences={}, asked_locations=["Phoenix"], session=None
+        )
+        mock_news_handler.assert_called_once_with("any tech news", "technology", None, session=None)
+        assert result == "It's sunny in Phoenix.\n\nHere are the latest headlines..."
+
+    @patch('services.langchain_service.MULTI_INTENT_TASK_TIMEOUT', 0.1)
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.handle_news_request')
+    @patch('services.langchain_service.handle_weather_request')
+    def test_chat_with_memory_slow_branch_dropped(self, mock_weather_handler, mock_news_handler, mock_extract_entities):
+        """Test that a branch past its timeout is left out without delaying the rest"""
+        mock_extract_entities.return_value = {"GPE": ["Phoenix"]}
+        mock_weather_handler.return_value = "It's sunny in Phoenix."
+        mock_news_handler.side_effect = lambda message, category, query, session=None: time.sleep(0.5) or "late headlines"
+
+        start = time.perf_counter()
+        result = chat_with_memory("What's the weather in Phoenix and any tech news?")
+
+        assert time.perf_counter() - start < 0.4
+        assert result.startswith("It's sunny in Phoenix.")
+        assert "news took too long" in result
+        assert "late headlines" not in result
 
     @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.extract_entities')
     @patch('services.langchain_service.handle_news_request')
-    def test_chat_with_memory_news_intent(self, mock_news_handler, mock_detect_intent):
+    def test_chat_with_memory_news_intent(self, mock_news_handler, mock_extract_entities, mock_detect_intent):
         """Test chat_with_memory with news intent"""
         # Setup mocks
         mock_detect_intent.return_value = "news"
@@ -82,10 +143,9 @@ class TestLangchainService:
         
         # Assertions
         mock_detect_intent.assert_called_once_with("Show me the latest news")
-        mock_news_handler.assert_called_once_with("Show me the latest news")
+        mock_news_handler.assert_called_once_with("Show me the latest news", None, None, session=None)
+        mock_extract_entities.assert_not_called()
         assert result == "Here are the latest headlines..."
-        # Verify conversation history wasn't modified for intent-based routing
-        assert len(conversation_history) == 0
     
     @patch('services.langchain_service.detect_intent')
     @patch('services.langchain_service.extract_entities')
@@ -94,19 +154,17 @@ class TestLangchainService:
         """Test chat_with_memory with stocks intent"""
         # Setup mocks
         mock_detect_intent.return_value = "stocks"
-        mock_extract_entities.return_value = {"ORG": ["Apple"]}
-        mock_stocks_handler.return_value = "I'll be able to provide stock information in a future update."
+        mock_stocks_handler.return_value = "Apple Inc. (AAPL): $189.84, up $1.23 (+0.65%)"
         
         # Call the function
         result = chat_with_memory("How are Apple stocks doing?")
         
         # Assertions
         mock_detect_intent.assert_called_once_with("How are Apple stocks doing?")
-        mock_extract_entities.assert_called_once_with("How are Apple stocks doing?", intent="stocks")
-        mock_stocks_handler.assert_called_once_with({"ORG": ["Apple"]})
-        assert result == "I'll be able to provide stock information in a future update."
-        # Verify conversation history wasn't modified for intent-based routing
-        assert len(conversation_history) == 0
+        # Tickers are resolved from the local index, so entities are never extracted
+        mock_extract_entities.assert_not_called()
+        mock_stocks_handler.assert_called_once_with("How are Apple stocks doing?")
+        assert result == "Apple Inc. (AAPL): $189.84, up $1.23 (+0.65%)"
     
     @patch('services.langchain_service.detect_intent')
     @patch('services.langchain_service.extract_entities')
@@ -123,22 +181,375 @@ class TestLangchainService:
         mock_llm.invoke.return_value = mock_response
         
         # Call the function
-        result = chat_with_memory("Hello, who are you?")
+        result = chat_with_memory("Hello, who are you?", session_id="general-session")
         
         # Assertions
         mock_detect_intent.assert_called_once_with("Hello, who are you?")
-        mock_extract_entities.assert_called_once_with("Hello, who are you?", intent="general")
+        # The LLM handler does not declare entities, so they are never extracted
+        mock_extract_entities.assert_not_called()
         mock_llm.invoke.assert_called_once()
         
         # Check conversation history was updated
-        assert len(conversation_history) == 2
-        assert isinstance(conversation_history[0], HumanMessage)
-        assert conversation_history[0].content == "Hello, who are you?"
-        assert isinstance(conversation_history[1], AIMessage)
-        assert conversation_history[1].content == "I'm an AI assistant. How can I help you today?"
+        conversation = history("general-session")
+        assert len(conversation) == 2
+        assert isinstance(conversation[0], HumanMessage)
+        assert conversation[0].content == "Hello, who are you?"
+        assert isinstance(conversation[1], AIMessage)
+        assert conversation[1].content == "I'm an AI assistant. How can I help you today?"
         
         assert result == "I'm an AI assistant. How can I help you today?"
     
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_sessions_have_separate_histories(self, mock_llm, mock_detect_intent):
+        """One session's exchanges never reach another session's prompt or history"""
+        mock_detect_intent.return_value = "general"
+        mock_llm.invoke.side_effect = lambda messages: AIMessage(content=f"answer {len(messages)}")
+        
+        chat_with_memory("My favourite colour is green", session_id="alice")
+        chat_with_memory("What is my favourite colour?", session_id="bob")
+        
+        bob_prompt = mock_llm.invoke.call_args.args[0]
+        assert [m.content for m in bob_prompt] == ["What is my favourite colour?"]
+        assert [m.content for m in history("alice")] == ["My favourite colour is green", "answer 1"]
+        assert [m.content for m in history("bob")] == ["What is my favourite colour?", "answer 1"]
+    
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_casual_uses_templates(self, mock_llm, mock_extract_entities, mock_detect_intent):
+        """Casual messages are answered from templates, without the LLM, and kept in history"""
+        mock_detect_intent.return_value = "casual"
+        
+        result = chat_with_memory("My name is Sam", session_id="casual-session")
+        assert "Sam" in result
+        assert chat_with_memory("Thanks", session_id="casual-session").endswith("Sam!")
+        
+        mock_llm.invoke.assert_not_called()
+        mock_extract_entities.assert_not_called()
+        conversation = history("casual-session")
+        assert len(conversation) == 4
+        assert conversation[0].content == "My name is Sam"
+        assert conversation[1].content == result
+    
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_casual_falls_back_to_llm(self, mock_llm, mock_detect_intent):
+        """Casual messages no template covers go to the LLM"""
+        mock_detect_intent.return_value = "casual"
+        mock_response = MagicMock()
+        mock_response.content = "Sunsets are red because of scattering."
+        mock_llm.invoke.return_value = mock_response
+        
+        result = chat_with_memory("Why are sunsets red?", session_id="casual-llm")
+        
+        assert result == "Sunsets are red because of scattering."
+        mock_llm.invoke.assert_called_once()
+        assert len(history("casual-llm")) == 2
+    
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_greeting_with_question_goes_to_llm(self, mock_llm, mock_detect_intent):
+        """A greeting in front of a real question does not swallow the question"""
+        mock_detect_intent.return_value = "casual"
+        mock_response = MagicMock()
+        mock_response.content = "The capital of France is Paris."
+        mock_llm.invoke.return_value = mock_response
+        
+        result = chat_with_memory("hi what is the capital of France", session_id="casual-question")
+        
+        assert result == "The capital of France is Paris."
+        mock_llm.invoke.assert_called_once()
+    
+    @patch('services.response_cache.SEMANTIC_CACHE_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_general_semantic_cache(self, mock_llm, mock_detect_intent):
+        """With the semantic cache on, a repeated general question skips the LLM but is still kept in history"""
+        from services.response_cache import general_answers
+        general_answers.clear()
+        mock_detect_intent.return_value = "general"
+        mock_response = MagicMock()
+        mock_response.content = "Canberra."
+        mock_llm.invoke.return_value = mock_response
+        
+        assert chat_with_memory("What is the capital of Australia?", session_id="cache-session") == "Canberra."
+        assert chat_with_memory("what is the capital of australia", session_id="cache-session") == "Canberra."
+        
+        mock_llm.invoke.assert_called_once()
+        assert len(history("cache-session")) == 4
+        general_answers.clear()
+    
+    @patch('services.response_cache.SEMANTIC_CACHE_ENABLED', True)
+    @patch('services.response_cache.SEMANTIC_CACHE_MAX_HISTORY_TURNS', 3)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_semantic_cache_counts_turns_per_session(self, mock_llm, mock_detect_intent):
+        """A long conversation in one session does not keep other sessions from cache hits"""
+        general_answers.clear()
+        mock_detect_intent.return_value = "general"
+        mock_llm.invoke.side_effect = lambda messages: AIMessage(content=f"answer {len(messages)}")
+        
+        for i in range(4):
+            chat_with_memory(f"Tell me fact number {i} about the ocean", session_id="long-session")
+        chat_with_memory("What is the tallest mountain on Earth?", session_id="first-session")
+        calls = mock_llm.invoke.call_count
+        
+        assert chat_with_memory("What is the tallest mountain on Earth?", session_id="second-session") == "answer 1"
+        assert mock_llm.invoke.call_count == calls
+        assert plan_request("What is the tallest mountain on Earth?", session_id="third-session").cost == "cheap"
+        general_answers.clear()
+    
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.handle_weather_request')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_general_sees_tool_results(self, mock_llm, mock_weather_handler,
+                                                        mock_extract_entities, mock_detect_intent):
+        """A general turn after a weather answer gets that answer as a compact tool result"""
+        mock_extract_entities.return_value = {"GPE": ["Seattle"]}
+        mock_weather_handler.return_value = "It's 55°F and rainy in Seattle.\nSee https://example.com/forecast"
+        mock_response = MagicMock()
+        mock_response.content = "Yes, a little warmer than yesterday."
+        mock_llm.invoke.return_value = mock_response
+        
+        mock_detect_intent.return_value = "weather"
+        chat_with_memory("Weather in Seattle", session_id="tools-session")
+        mock_detect_intent.return_value = "general"
+        chat_with_memory("Is that warmer than yesterday?", session_id="tools-session")
+        
+        messages = mock_llm.invoke.call_args.args[0]
+        assert messages[-1].content == "Is that warmer than yesterday?"
+        assert '"tool": "weather"' in messages[-2].content
+        assert "It's 55°F and rainy in Seattle. See" in messages[-2].content
+        assert "https://" not in messages[-2].content
+        # The tool result is given to the LLM, not stored in the history
+        assert [message.content for message in history("tools-session")] == [
+            "Is that warmer than yesterday?", "Yes, a little warmer than yesterday."
+        ]
+    
+    @patch('services.langchain_service.detect_intents')
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.get_weather')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_weather_follow_up(self, mock_llm, mock_get_weather, mock_extract_entities,
+                                                mock_detect_intent, mock_detect_intents):
+        """A follow-up reuses the previous weather slots without intent detection, NLP or the LLM"""
+        mock_detect_intents.return_value = [("weather", "Weather in Seattle")]
+        mock_detect_intent.return_value = "weather"
+        mock_extract_entities.return_value = {"GPE": ["Seattle"]}
+        mock_get_weather.side_effect = ["Seattle now: rain.", "Seattle tomorrow: showers."]
+        
+        chat_with_memory("Weather in Seattle", session_id="follow-up-session")
+        result = chat_with_memory("What about tomorrow?", session_id="follow-up-session")
+        
+        assert result == "Seattle tomorrow: showers."
+        mock_get_weather.assert_called_with("Seattle", "imperial", "tomorrow")
+        mock_detect_intent.assert_called_once()
+        mock_extract_entities.assert_called_once()
+        mock_llm.invoke.assert_not_called()
+        assert [r.result for r in get_session("follow-up-session").tool_results] == [
+            "Seattle now: rain.", "Seattle tomorrow: showers."
+        ]
+    
+    @patch('services.langchain_service.LLM_TIERING_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm_router')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_general_uses_router_when_tiering(self, mock_llm, mock_router, mock_detect_intent):
+        """With tiering enabled, general prompts go through the model router"""
+        mock_detect_intent.return_value = "general"
+        mock_router.invoke.return_value = AIMessage(content="Not much, you?")
+        
+        result = chat_with_memory("What's up?", session_id="tiered")
+        
+        assert result == "Not much, you?"
+        mock_llm.invoke.assert_not_called()
+        messages, session = mock_router.invoke.call_args.args
+        assert messages[0].content == "What's up?"
+        assert session.id == "tiered"
+    
+    @patch('services.langchain_service.SPECULATIVE_LLM_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_uses_speculative_answer(self, mock_llm, mock_detect_intent):
+        """An ambiguous message's LLM answer is streamed while the intent is classified, then used"""
+        mock_detect_intent.return_value = "general"
+        mock_llm.stream.return_value = iter([AIMessage(content="Not much, "), AIMessage(content="you?")])
+        
+        result = chat_with_memory("What's up?", session_id="speculative")
+        
+        assert result == "Not much, you?"
+        mock_llm.invoke.assert_not_called()
+        assert mock_llm.stream.call_args.args[0][-1].content == "What's up?"
+        assert [m.content for m in history("speculative")] == ["What's up?", "Not much, you?"]
+    
+    @patch('services.langchain_service.SPECULATIVE_LLM_ENABLED', True)
+    @patch('services.langchain_service.LLM_TIERING_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm_admission')
+    def test_speculative_answer_is_recorded_like_invoked_ones(self, mock_admission, mock_detect_intent):
+        """A speculative answer records its routing decision and latency, and feeds its headers to admission"""
+        from services.llm_router import LLMRouter, ModelTier
+        fast_llm, strong_llm = MagicMock(), MagicMock()
+        headers = {"x-ratelimit-limit-requests": "100", "x-ratelimit-remaining-requests": "90"}
+        fast_llm.stream.return_value = iter([
+            AIMessage(content="Not much, "), AIMessage(content="you?", response_metadata={"headers": headers})
+        ])
+        router = LLMRouter([ModelTier("fast", fast_llm, max_complexity=1), ModelTier("strong", strong_llm)])
+        mock_detect_intent.return_value = "general"
+        mock_admission.try_acquire.return_value = True
+        
+        with patch('services.langchain_service.llm_router', router):
+            result = chat_with_memory("What's up?", session_id="speculative-tiered")
+        
+        assert result == "Not much, you?"
+        strong_llm.stream.assert_not_called()
+        assert router.recent[-1].tier == "fast"
+        assert router.recent[-1].latency is not None
+        mock_admission.observe_headers.assert_called_once_with(headers)
+    
+    @patch('services.langchain_service.SPECULATIVE_LLM_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.handle_weather_request')
+    @patch('services.langchain_service.start_speculative_answer')
+    def test_chat_with_memory_cancels_speculation_for_routed_intent(self, mock_start, mock_weather_handler,
+                                                                    mock_extract_entities, mock_detect_intent):
+        """The speculative answer is cancelled once the classifier picks a routed intent"""
+        mock_detect_intent.return_value = "weather"
+        mock_extract_entities.return_value = {"GPE": ["Paris"]}
+        mock_weather_handler.return_value = "Paris: 18°C."
+        
+        result = chat_with_memory("Should I bring an umbrella to Paris?")
+        
+        assert result == "Paris: 18°C."
+        mock_start.return_value.cancel.assert_called_once()
+    
+    @patch('services.langchain_service.SPECULATIVE_LLM_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.start_speculative_answer')
+    @patch('services.langchain_service.handle_weather_request')
+    def test_chat_with_memory_no_speculation_for_keyword_match(self, mock_weather_handler, mock_start,
+                                                               mock_detect_intent):
+        """Messages the keyword pass already routes are not answered speculatively"""
+        mock_detect_intent.return_value = "weather"
+        mock_weather_handler.return_value = "Sunny."
+        
+        chat_with_memory("What's the weather in Paris?")
+        
+        mock_start.assert_not_called()
+    
+    @patch('services.langchain_service.SPECULATIVE_LLM_ENABLED', True)
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.speculation_budget')
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_speculation_budget_spent(self, mock_llm, mock_budget, mock_detect_intent):
+        """Without speculative budget left, the answer is requested after classification as usual"""
+        mock_detect_intent.return_value = "general"
+        mock_budget.try_acquire.return_value = False
+        mock_llm.invoke.return_value = AIMessage(content="Not much.")
+        
+        result = chat_with_memory("What's up?")
+        
+        assert result == "Not much."
+        mock_llm.stream.assert_not_called()
+    
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm_admission', AdmissionController("test.llm", 4, 4, 1))
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_llm_rate_limited(self, mock_llm, mock_detect_intent):
+        """An OpenAI rate limit is surfaced as OverloadedError with the upstream's Retry-After"""
+        mock_detect_intent.return_value = "general"
+        response = httpx.Response(429, headers={"Retry-After": "7"}, request=httpx.Request("POST", "https://api.openai.com"))
+        mock_llm.invoke.side_effect = RateLimitError("Rate limit reached", response=response, body=None)
+        
+        with pytest.raises(OverloadedError) as excinfo:
+            chat_with_memory("What's up?", session_id="shed")
+        
+        assert excinfo.value.retry_after == 7
+        assert langchain_service.llm_admission.limit == 2
+        # The unanswered message is not left in the history to be replayed later
+        assert history("shed") == []
+    
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.llm_admission', AdmissionController("test.llm", 1, 0, 1))
+    @patch('services.langchain_service.llm')
+    def test_chat_with_memory_shed_call_leaves_history_unchanged(self, mock_llm, mock_detect_intent):
+        """A call refused by admission control leaves the history as it was"""
+        mock_detect_intent.return_value = "general"
+        mock_llm.invoke.return_value = AIMessage(content="Hi!")
+        chat_with_memory("Hello there, assistant", session_id="shed")
+        before = list(history("shed"))
+        langchain_service.llm_admission.acquire()
+        
+        with pytest.raises(OverloadedError):
+            chat_with_memory("Tell me about black holes", session_id="shed")
+        
+        assert history("shed") == before
+        assert mock_llm.invoke.call_count == 1
+    
+    @pytest.mark.parametrize("message, cost", [
+        ("What's the weather in Paris?", "cheap"),
+        ("Any tech news?", "cheap"),
+        ("Hello!", "cheap"),
+        ("hi what is the capital of France", "expensive"),
+        ("Tell me about black holes", "expensive"),
+    ])
+    def test_plan_request_cost(self, message, cost):
+        """Routed intents and templated casual replies are cheap; LLM-bound messages are expensive"""
+        assert plan_request(message, session_id="cost").cost == cost
+    
+    @patch('services.langchain_service.MULTI_INTENT_ENABLED', True)
+    def test_plan_request_cost_multi_intent(self):
+        """A multi-intent message is expensive if any part needs the LLM"""
+        assert plan_request("What's the weather in Paris? Any tech news?", session_id="cost").cost == "cheap"
+        assert plan_request(
+            "What's the weather in Paris? Tell me about black holes.", session_id="cost"
+        ).cost == "expensive"
+    
+    @patch('services.response_cache.SEMANTIC_CACHE_ENABLED', True)
+    def test_plan_request_cost_cache_hit(self):
+        """A general question the semantic cache will answer is cheap"""
+        general_answers.store("Tell me about black holes", "They are dense.")
+        try:
+            assert plan_request("Tell me about black holes", session_id="cost").cost == "cheap"
+        finally:
+            general_answers.clear()
+    
+    @patch('services.langchain_service.get_weather')
+    def test_plan_request_cost_follow_up(self, mock_get_weather):
+        """Elliptical follow-ups to a weather answer are cheap"""
+        mock_get_weather.return_value = "Seattle: rain."
+        route("weather", "Weather in Seattle?", {"GPE": ["Seattle"]}, session=get_session("cost"))
+        
+        assert plan_request("what about tomorrow?", session_id="cost").cost == "cheap"
+    
+    def test_plan_request_persists_only_explicit_sessions(self):
+        """Preferences are saved for client-supplied session ids, not for sessions keyed on an IP"""
+        assert plan_request("Hello", session_id="explicit").session.persistent
+        assert not plan_request("Hello", client_ip="203.0.113.9").session.persistent
+    
+    @patch('services.langchain_service.resolve_follow_up')
+    @patch('services.langchain_service.detect_intents')
+    @patch('services.langchain_service.detect_intent')
+    @patch('services.langchain_service.handle_news_request')
+    def test_chat_with_memory_reuses_plan(self, mock_news_handler, mock_detect_intent, mock_detect_intents,
+                                          mock_resolve_follow_up):
+        """Given its plan, chat_with_memory does not repeat the keyword pass or follow-up resolution"""
+        mock_resolve_follow_up.return_value = None
+        mock_detect_intents.return_value = [("news", "Any tech news?")]
+        mock_detect_intent.return_value = "news"
+        mock_news_handler.return_value = "Tech headlines..."
+        
+        plan = plan_request("Any tech news?", session_id="planned")
+        result = chat_with_memory("Any tech news?", session_id="planned", plan=plan)
+        
+        assert result == "Tech headlines..."
+        mock_resolve_follow_up.assert_called_once()
+        mock_detect_intents.assert_called_once()
+    
     @patch('services.langchain_service.get_weather')
     def test_handle_weather_request_with_location(self, mock_get_weather):
         """Test handle_weather_request with a valid location"""
@@ -150,7 +561,7 @@ class TestLangchainService:
         user_message = "What's the weather in New York?"
         
         # Call the function with client_ip parameter
-        result = handle_weather_request(entities, user_message, client_ip=None)
+        result = route("weather", user_message, entities, client_ip=None)
         
         # Assertions
         mock_get_weather.assert_called_once_with("New York", "imperial", None)
@@ -168,7 +579,7 @@ class TestLangchainService:
         user_message = "What's the weather like?"
         
         # Call the function without client_ip
-        result = handle_weather_request(entities, user_message, client_ip=None)
+        result = route("weather", user_message, entities, client_ip=None)
         
         # Assertions
         mock_get_weather.assert_called_once_with("Phoenix", "imperial", None)
@@ -189,7 +600,7 @@ class TestLangchainService:
         client_ip = "203.0.113.1"  # Example IP
         
         # Call the function with client_ip parameter
-        result = handle_weather_request(entities, user_message, client_ip=client_ip)
+        result = route("weather", user_message, entities, client_ip=client_ip)
         
         # Assertions
         mock_get_location.assert_called_once_with(client_ip)
@@ -209,7 +620,7 @@ class TestLangchainService:
         client_ip = "203.0.113.1"  # Example IP
         
         # Call the function with client_ip parameter
-        result = handle_weather_request(entities, user_message, client_ip=client_ip)
+        result = route("weather", user_message, entities, client_ip=client_ip)
         
         # Assertions
         mock_get_location.assert_called_once_with(client_ip)
@@ -223,7 +634,7 @@ class TestLangchainService:
         user_message = "What's the weather like?"
         
         # Call the function without client_ip
-        result = handle_weather_request(entities, user_message, client_ip=None)
+        result = route("weather", user_message, entities, client_ip=None)
         
         # Assertions
         assert result == "I need a location to fetch weather details. Please specify a city or region."
@@ -241,13 +652,26 @@ class TestLangchainService:
         user_message = "What's the weather in London in Celsius?"
         
         # Call the function with client_ip parameter
-        result = handle_weather_request(entities, user_message, client_ip=None)
+        result = route("weather", user_message, entities, client_ip=None)
         
         # Assertions
         mock_detect_temp_unit.assert_called_once_with(user_message)
         mock_get_weather.assert_called_once_with("London", "metric", None)
         assert result == "It's 22°C and sunny in London."
-    
+
+    @patch('services.langchain_service.get_weather_for_cities')
+    @patch('services.langchain_service.get_weather')
+    def test_handle_weather_request_multiple_locations(self, mock_get_weather, mock_get_weather_for_cities):
+        """Test that every detected location is answered in one combined response"""
+        mock_get_weather_for_cities.return_value = "Phoenix is hot.\n\nSeattle is rainy."
+
+        entities = {"GPE": ["Phoenix", "Seattle"]}
+        result = route("weather", "Phoenix vs Seattle weather", entities, client_ip=None)
+
+        mock_get_weather_for_cities.assert_called_once_with(["Phoenix", "Seattle"], "imperial", None)
+        mock_get_weather.assert_not_called()
+        assert result == "Phoenix is hot.\n\nSeattle is rainy."
+
     @patch('services.langchain_service.detect_news_category')
     @patch('services.langchain_service.extract_news_query')
     @patch('services.langchain_service.get_news')
@@ -259,21 +683,99 @@ class TestLangchainService:
         mock_get_news.return_value = "Here are the latest AI technology headlines..."
         
         # Call the function
-        result = handle_news_request("Show me the latest AI technology news")
+        result = route("news", "Show me the latest AI technology news")
         
         # Assertions
         mock_detect_category.assert_called_once_with("Show me the latest AI technology news")
         mock_extract_query.assert_called_once_with("Show me the latest AI technology news")
         mock_get_news.assert_called_once_with(category="technology", query="AI")
         assert result == "Here are the latest AI technology headlines..."
-    
-    def test_handle_stocks_request(self):
-        """Test handle_stocks_request"""
-        # Test data
-        entities = {"ORG": ["Apple"]}
+
+    @patch('services.langchain_service.get_combined_news')
+    @patch('services.langchain_service.get_news')
+    def test_handle_news_request_multiple_categories(self, mock_get_news, mock_get_combined_news):
+        """Test that a message naming several categories gets one combined response"""
+        mock_get_combined_news.return_value = "Here are the latest headlines..."
+
+        result = route("news", "Give me tech and business news")
+
+        mock_get_combined_news.assert_called_once_with(categories=["business", "technology"], queries=[])
+        mock_get_news.assert_not_called()
+        assert result == "Here are the latest headlines..."
+
+    @patch('services.langchain_service.DEFAULT_WEATHER_LOCATION', None)
+    @patch('services.langchain_service.get_location_from_ip')
+    @patch('services.langchain_service.get_weather')
+    def test_handle_weather_request_uses_preferences(self, mock_get_weather, mock_get_location):
+        """A returning user's home location and unit are used without geolocation or unit detection"""
+        from services.session_service import Session
+        session = Session("returning-user")
+        mock_get_location.return_value = {"city": "Seattle", "country": "US"}
+        mock_get_weather.return_value = "It's rainy."
+        
+        route("weather", "What's the weather like in celsius?", {}, client_ip="203.0.113.1", session=session)
+        route("weather", "What's the weather like?", {}, client_ip="203.0.113.1", session=session)
+        
+        mock_get_location.assert_called_once_with("203.0.113.1")
+        assert mock_get_weather.call_args_list[-1].args == ("Seattle", "metric", None)
+
+    @patch('services.langchain_service.get_combined_news')
+    @patch('services.langchain_service.get_news')
+    def test_handle_news_request_uses_favourite_categories(self, mock_get_news, mock_get_combined_news):
+        """A plain news request gets the categories the user asked for before"""
+        from services.session_service import Session
+        session = Session("news-reader")
+        
+        route("news", "Any sports news?", session=session)
+        route("news", "Show me the latest news", session=session)
+        
+        assert mock_get_news.call_args_list[-1].kwargs == {"category": "sports", "query": None}
+
+    def test_every_analyzer_is_declared(self):
+        """Each analysis output is read by some handler, which declares it"""
+        handlers = langchain_service.handlers
+        declared = {need for intent in ("weather", "news", "stocks", "casual", "general")
+                    for need in handlers.handler_for(intent).needs}
+        assert declared == set(langchain_service.ANALYZERS)
+
+    @patch('services.langchain_service.extract_entities')
+    @patch('services.langchain_service.get_news')
+    def test_news_route_computes_only_news_outputs(self, mock_get_news, mock_extract_entities):
+        """The news handler gets its category and query from the analysis and never extracts entities"""
+        mock_get_news.return_value = "Tech headlines..."
+        analysis = langchain_service.handlers.analyze(
+            user_message="Any tech news?", intent="news", client_ip=None, session=None, speculation=None
+        )
+        
+        assert langchain_service.handlers.dispatch("news", analysis) == "Tech headlines..."
+        assert analysis.computed() == {"category", "query"}
+        mock_extract_entities.assert_not_called()
+
+    @patch('services.langchain_service.get_stock_quotes')
+    def test_handle_stocks_request(self, mock_get_stock_quotes):
+        """Test handle_stocks_request resolves company names and tickers"""
+        mock_get_stock_quotes.return_value = "Here are the latest quotes..."
         
         # Call the function
-        result = handle_stocks_request(entities)
+        result = handle_stocks_request("How are Apple and $msft doing?")
         
         # Assertions
-        assert result == "I'll be able to provide stock information in a future update."
\ No newline at end of file
+        mock_get_stock_quotes.assert_called_once_with(["AAPL", "MSFT"])
+        assert result == "Here are the latest quotes..."
+
+    @patch('services.langchain_service.get_stock_quotes')
+    def test_handle_stocks_request_without_company(self, mock_get_stock_quotes):
+        """Test handle_stocks_request asks for a company when none is named"""
+        result = handle_stocks_request("Which stocks should I buy?")
+        
+        mock_get_stock_quotes.assert_not_called()
+        assert "Which company or ticker" in result
+
+    @patch('services.langchain_service.get_stock_quotes')
+    def test_handle_stocks_request_market_wide(self, mock_get_stock_quotes):
+        """A question about the whole market is answered with the major indices"""
+        mock_get_stock_quotes.return_value = "Here are the latest quotes..."
+        
+        handle_stocks_request("How is the stock market today?")
+        
+        mock_get_stock_quotes.assert_called_once_with(["^GSPC", "^DJI", "^IXIC"])
\ No newline at end of file
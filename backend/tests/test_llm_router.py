@@ -0,0 +1,95 @@
+import pytest
+import os
+import sys
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+from openai import RateLimitError
+from langchain.schema import HumanMessage, AIMessage
+from services.llm_router import LLMRouter, ModelTier, estimate_complexity
+from services.session_service import Session
+
+
+def make_llm(name):
+    llm = MagicMock()
+    llm.invoke.return_value = AIMessage(content=f"answer from {name}")
+    return llm
+
+
+class TestLLMRouter:
+    """Test suite for llm_router.py"""
+
+    def setup_method(self):
+        self.fast_llm = make_llm("fast")
+        self.strong_llm = make_llm("strong")
+        self.router = LLMRouter([
+            ModelTier("fast", self.fast_llm, max_prompt_tokens=50, max_context_tokens=200, max_complexity=1),
+            ModelTier("strong", self.strong_llm),
+        ])
+
+    def test_estimate_complexity(self):
+        assert estimate_complexity("hey, what's up") == 0
+        assert estimate_complexity("Explain why the sky is blue") >= 4
+        assert estimate_complexity("what is 12 * 7") == 1
+
+    def test_chit_chat_goes_to_fast_tier(self):
+        response = self.router.invoke([HumanMessage(content="Any fun things happening this weekend?")])
+        assert response.content == "answer from fast"
+        self.strong_llm.invoke.assert_not_called()
+        decision = self.router.recent[-1]
+        assert decision.tier == "fast"
+        assert decision.latency is not None
+
+    @pytest.mark.parametrize("messages, reason", [
+        ([HumanMessage(content="Explain how vaccines train the immune system")], "complex prompt"),
+        ([HumanMessage(content="word " * 200)], "long prompt"),
+        ([AIMessage(content="context " * 400), HumanMessage(content="ok")], "long history"),
+    ])
+    def test_escalates_when_needed(self, messages, reason):
+        decision = self.router.choose(messages)
+        assert decision.tier == "strong"
+        assert reason in decision.reasons
+
+    @pytest.mark.parametrize("text", [
+        "tell me about the planet mars",
+        "that explanation was reasonable",
+        "where is the barcode on this box",
+    ])
+    def test_markers_match_whole_words(self, text):
+        """Markers inside longer words ("planet", "barcode", "reasonable") do not count"""
+        assert estimate_complexity(text) == 0
+
+    def test_rate_limit_is_not_escalated(self):
+        """A rate-limited tier's error reaches the caller, which backs off, instead of loading the next tier"""
+        response = httpx.Response(429, headers={"Retry-After": "3"}, request=httpx.Request("POST", "https://api.openai.com"))
+        self.fast_llm.invoke.side_effect = RateLimitError("Rate limit reached", response=response, body=None)
+        with pytest.raises(RateLimitError):
+            self.router.invoke([HumanMessage(content="hi there")])
+        self.strong_llm.invoke.assert_not_called()
+
+    def test_escalates_when_fast_tier_fails(self):
+        self.fast_llm.invoke.side_effect = RuntimeError("down")
+        response = self.router.invoke([HumanMessage(content="hi there")])
+        assert response.content == "answer from strong"
+        assert self.router.recent[-1].tier == "strong"
+        assert "fast failed" in self.router.recent[-1].reasons
+
+    def test_strongest_tier_error_is_raised(self):
+        self.strong_llm.invoke.side_effect = RuntimeError("down")
+        with pytest.raises(RuntimeError):
+            self.router.invoke([HumanMessage(content="Explain quantum entanglement")])
+
+    def test_session_slo_steps_down_from_slow_tier(self):
+        """A session whose SLO the strong tier has been missing gets the faster tier"""
+        self.router.tiers[1].observe(12.0)
+        self.router.tiers[0].observe(1.0)
+        session = Session("slo")
+        session.latency_slo = 3
+        messages = [HumanMessage(content="Explain how vaccines train the immune system")]
+        assert self.router.choose(messages).tier == "strong"
+        decision = self.router.choose(messages, session)
+        assert decision.tier == "fast"
+        assert decision.reasons == ["latency SLO 3s"]
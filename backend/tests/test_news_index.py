@@ -0,0 +1,71 @@
+import pytest
+import os
+import sys
+import time
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.news_index import HeadlineIndex, tokenize
+
+ARTICLES = [
+    {"title": "Climate summit reaches deal on emissions", "description": "Leaders agree on climate change targets",
+     "url": "https://example.com/climate-deal"},
+    {"title": "Heat waves linked to climate change", "description": "Scientists publish new research",
+     "url": "https://example.com/heat"},
+    {"title": "Stocks rally as tech earnings beat forecasts", "description": "Markets climb",
+     "url": "https://example.com/stocks"},
+]
+
+
+class TestHeadlineIndex:
+    """Test suite for the local BM25 headline index"""
+
+    def test_tokenize(self):
+        """Test lowercasing, stopword removal and plural stripping"""
+        assert tokenize("The Elections in Ohio") == ["election", "ohio"]
+        assert tokenize("Heat waves, glass") == ["heat", "wave", "glass"]
+
+    def test_search_requires_every_term(self):
+        """Test that only articles containing all query terms are returned"""
+        index = HeadlineIndex()
+        index.add_articles(ARTICLES)
+
+        results = index.search("climate change")
+        assert [a["url"] for a in results] == ["https://example.com/climate-deal", "https://example.com/heat"]
+        assert index.search("climate stocks") == []
+        assert index.search("the") == []
+
+    def test_bm25_prefers_higher_term_frequency(self):
+        """Test that an article mentioning the term more often ranks first"""
+        index = HeadlineIndex()
+        index.add_articles(ARTICLES)
+
+        assert index.search("climate")[0]["url"] == "https://example.com/climate-deal"
+
+    def test_stale_articles_are_ignored(self):
+        """Test that articles fetched too long ago do not answer searches"""
+        index = HeadlineIndex()
+        index.add_articles(ARTICLES, fetched_at=time.time() - 3600)
+
+        assert index.search("climate", max_age=900) == []
+        index.add_articles(ARTICLES[:1])
+        assert len(index.search("climate", max_age=900)) == 1
+
+    def test_category_filter(self):
+        """Test that a category restricts results to articles fetched for it"""
+        index = HeadlineIndex()
+        index.add_articles(ARTICLES[:2], category="science")
+        index.add_articles(ARTICLES[2:], category="business")
+
+        assert len(index.search("climate", category="science")) == 2
+        assert index.search("climate", category="business") == []
+
+    def test_oldest_articles_evicted_when_full(self):
+        """Test that the index stays within its article limit"""
+        index = HeadlineIndex(max_articles=2)
+        index.add_articles(ARTICLES[:1], fetched_at=1.0)
+        index.add_articles(ARTICLES[1:], fetched_at=2.0)
+
+        assert len(index) == 2
+        assert [a["url"] for a in index.search("climate")] == ["https://example.com/heat"]
@@ -4,16 +4,30 @@ from unittest.mock import patch, MagicMock
 import os
 import sys
 import requests  # Add this import
+import time
 
 # Add the parent directory to the path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from services.news_service import NewsService, get_news
+from services.news_service import (
+    NewsService, get_news, headlines_cache, formatted_news_cache, newsapi_budget, newsapi_breaker,
+    normalize_news_query, get_combined_news, merge_articles
+)
+from services.news_index import headline_index
+from utils.resilience import CircuitOpenError
 
 
 class TestNewsService:
     """Test suite for NewsService class"""
 
+    def setup_method(self):
+        """Clear cached headlines, quota and breaker state before each test"""
+        headlines_cache.clear()
+        formatted_news_cache.clear()
+        headline_index.clear()
+        newsapi_budget.reset()
+        newsapi_breaker.reset()
+
     @patch('services.news_service.requests.get')
     def test_get_top_headlines_success(self, mock_get):
         """Test successful API call to get top headlines"""
@@ -157,6 +171,14 @@ class TestNewsService:
 class TestGetNews:
     """Test suite for get_news function"""
 
+    def setup_method(self):
+        """Clear cached headlines, quota and breaker state before each test"""
+        headlines_cache.clear()
+        formatted_news_cache.clear()
+        headline_index.clear()
+        newsapi_budget.reset()
+        newsapi_breaker.reset()
+
     @patch('services.news_service.NewsService.get_top_headlines')
     @patch('services.news_service.NewsService.format_news_response')
     def test_get_news_default(self, mock_format, mock_get_headlines):
@@ -207,3 +229,210 @@ class TestGetNews:
         mock_get_headlines.assert_called_once_with(category=None, query="climate")
         mock_format.assert_called_once_with(mock_news_data)
         assert result == "Climate news formatted"
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    def test_get_news_served_from_cache(self, mock_get_headlines):
+        """Test that repeated requests reuse cached headlines"""
+        mock_get_headlines.return_value = {"status": "ok", "articles": [{"title": "Cached"}]}
+
+        first = get_news(category="sports")
+        second = get_news(category="Sports")
+
+        mock_get_headlines.assert_called_once_with(category="sports", query=None)
+        assert first == second
+        assert "Cached" in second
+
+    def test_normalize_news_query(self):
+        """Test that case, whitespace, punctuation and filler words are ignored"""
+        assert normalize_news_query("The latest  news on Climate Change?") == "climate change"
+        assert normalize_news_query("S&P 500") == "s&p 500"
+        assert normalize_news_query("the news") is None
+        assert normalize_news_query(None) is None
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    def test_equivalent_queries_share_cache_entry(self, mock_get_headlines):
+        """Test that differently phrased queries reuse one fetch"""
+        mock_get_headlines.return_value = {"status": "ok", "articles": [{"title": "Climate"}]}
+
+        get_news(query="the latest on Climate Change")
+        get_news(query="climate   change news")
+
+        mock_get_headlines.assert_called_once_with(category=None, query="climate change")
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    @patch('services.news_service.NewsService.format_news_response')
+    def test_formatted_response_served_from_cache(self, mock_format, mock_get_headlines):
+        """Test that cached headlines are formatted once, and again after a refresh"""
+        mock_get_headlines.return_value = {"status": "ok", "articles": [{"title": "Tech"}]}
+        mock_format.return_value = "Formatted tech news"
+
+        assert get_news(category="technology") == "Formatted tech news"
+        assert get_news(category="technology") == "Formatted tech news"
+        assert mock_format.call_count == 1
+
+        headlines_cache.set(("us", "technology", None, 5), {"status": "ok", "articles": [{"title": "New"}]})
+        get_news(category="technology")
+        assert mock_format.call_count == 2
+
+    @patch('services.news_service.requests.get')
+    def test_query_answered_from_indexed_headlines(self, mock_get):
+        """Test that a search overlapping fetched headlines makes no API call"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"status": "ok", "articles": [
+            {"title": "Climate talks stall", "source": {"name": "Wire"}, "url": "https://example.com/1"},
+            {"title": "New climate report released", "source": {"name": "Daily"}, "url": "https://example.com/2"},
+            {"title": "Championship game tonight", "source": {"name": "Sports"}, "url": "https://example.com/3"},
+        ]}
+        mock_get.return_value = mock_response
+
+        get_news(category="science")
+        result = get_news(query="news about climate")
+
+        assert mock_get.call_count == 1
+        assert "Climate talks stall" in result
+        assert "Championship" not in result
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    def test_query_falls_back_to_api_without_enough_hits(self, mock_get_headlines):
+        """Test that searches with too few local matches still call NewsAPI"""
+        headline_index.add_articles([{"title": "Mars rover finds water", "url": "https://example.com/mars"}])
+        mock_get_headlines.return_value = {"status": "ok", "articles": [{"title": "Mars mission"}]}
+
+        get_news(query="mars")
+
+        mock_get_headlines.assert_called_once_with(category=None, query="mars")
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    def test_get_news_errors_not_cached(self, mock_get_headlines):
+        """Test that error payloads are refetched on the next request"""
+        mock_get_headlines.return_value = {"error": "rate limited"}
+
+        get_news(category="health")
+        get_news(category="health")
+
+        assert mock_get_headlines.call_count == 2
+
+    @patch('services.news_service.requests.get')
+    def test_get_news_quota_exhausted_serves_stale(self, mock_get):
+        """Test that stale headlines are served when the NewsAPI quota is gone"""
+        headlines_cache.set(("us", "science", None, 5), {
+            "status": "ok", "articles": [{"title": "Old but useful", "source": {"name": "Wire"}}]
+        }, ttl=-1)
+        newsapi_budget.exhaust(retry_after=30)
+
+        result = get_news(category="science")
+
+        mock_get.assert_not_called()
+        assert "Old but useful" in result
+
+    @patch('services.news_service.requests.get')
+    def test_get_news_rate_limited_without_cache(self, mock_get):
+        """Test that a NewsAPI 429 produces a friendly message, not a raw error"""
+        mock_response = MagicMock()
+        mock_response.status_code = 429
+        mock_response.headers = {}
+        mock_get.return_value = mock_response
+
+        result = get_news(category="business")
+
+        assert "news lookup limit" in result
+        assert not newsapi_budget.try_acquire()
+
+    @patch('services.news_service.requests.get')
+    def test_get_news_open_circuit_without_cache(self, mock_get):
+        """Test that an open circuit returns a friendly message without calling NewsAPI"""
+        mock_get.side_effect = requests.exceptions.Timeout("timed out")
+
+        with patch('utils.resilience.time.sleep'):
+            for _ in range(3):
+                get_news(category="technology")
+        calls_before = mock_get.call_count
+        result = get_news(category="entertainment")
+
+        assert mock_get.call_count == calls_before
+        assert "temporarily unavailable" in result
+
+
+class TestCombinedNews:
+    """Test suite for multi-category / multi-topic news requests"""
+
+    def setup_method(self):
+        """Clear cached headlines, quota and breaker state before each test"""
+        headlines_cache.clear()
+        formatted_news_cache.clear()
+        headline_index.clear()
+        newsapi_budget.reset()
+        newsapi_breaker.reset()
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    def test_categories_fetched_concurrently(self, mock_get_headlines):
+        """Test that a combined request takes about as long as one lookup"""
+        def slow_headlines(category=None, query=None):
+            time.sleep(0.2)
+            return {"status": "ok", "articles": [
+                {"title": f"{category} story", "source": {"name": "Wire"}, "url": f"https://example.com/{category}"}
+            ]}
+        mock_get_headlines.side_effect = slow_headlines
+
+        start = time.perf_counter()
+        result = get_combined_news(categories=["technology", "business", "science"])
+        elapsed = time.perf_counter() - start
+
+        assert mock_get_headlines.call_count == 3
+        assert elapsed < 0.5
+        for category in ["technology", "business", "science"]:
+            assert f"{category} story" in result
+
+    @patch('services.news_service.NewsService.get_top_headlines')
+    def test_topics_use_shared_cache(self, mock_get_headlines):
+        """Test that each topic of a combined request reuses the single-query cache entry"""
+        mock_get_headlines.return_value = {"status": "ok", "articles": [{"title": "Story", "url": "https://example.com/s"}]}
+
+        get_news(query="taxes")
+        get_combined_news(queries=["taxes", "the elections"])
+
+        mock_get_headlines.assert_any_call(category=None, query="elections")
+        assert mock_get_headlines.call_count == 2
+
+    def test_merge_removes_duplicate_stories(self):
+        """Test that the same story from two lists appears once and ranks first"""
+        technology = [
+            {"title": "Chip maker beats estimates", "url": "https://example.com/chips"},
+            {"title": "Chipmaker shares surge after earnings - Reuters", "url": "https://a.com/surge?ref=tech"},
+        ]
+        business = [
+            {"title": "Oil prices fall", "url": "https://example.com/oil"},
+            {"title": "Chipmaker shares surge after earnings - Bloomberg", "url": "https://b.com/surge"},
+            {"title": "Another view", "url": "https://www.example.com/chips/"},
+        ]
+
+        merged = merge_articles([technology, business], limit=10)
+
+        titles = [article["title"] for article in merged]
+        assert len(merged) == 3
+        assert titles[0] == "Chip maker beats estimates"
+        assert titles[1] == "Chipmaker shares surge after earnings - Reuters"
+        assert "Oil prices fall" in titles
+
+    def test_merge_orders_by_rank_then_recency(self):
+        """Test that each list's best headline comes before any list's second best"""
+        first = [
+            {"title": "Alpha", "url": "1", "publishedAt": "2024-01-01T00:00:00Z"},
+            {"title": "Bravo", "url": "2", "publishedAt": "2024-01-03T00:00:00Z"},
+        ]
+        second = [{"title": "Charlie", "url": "3", "publishedAt": "2024-01-02T00:00:00Z"}]
+
+        merged = merge_articles([first, second], limit=10)
+
+        assert [article["title"] for article in merged] == ["Charlie", "Alpha", "Bravo"]
+
+    @patch('services.news_service._fetch_articles')
+    def test_combined_news_open_circuit(self, mock_fetch):
+        """Test that a combined request reports an outage when every part fails"""
+        mock_fetch.side_effect = CircuitOpenError("open")
+
+        result = get_combined_news(categories=["technology", "business"])
+
+        assert mock_fetch.call_count == 2
+        assert "temporarily unavailable" in result
@@ -0,0 +1,91 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.preference_service import (
+    PreferenceStore, set_preference_store, get_preferences, learn_weather_preferences, learn_news_preferences
+)
+from services.session_service import Session
+
+
+class TestPreferenceService:
+    """Test suite for preference_service.py"""
+
+    def setup_method(self):
+        set_preference_store(PreferenceStore(":memory:"))
+        self.session = Session("prefs", persistent=True)
+
+    def test_store_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "preferences.db")
+        store = PreferenceStore(path)
+        store.update("abc", unit="metric")
+        store.update("abc", home_location="Seattle")
+        store.close()
+        assert PreferenceStore(path).get("abc") == {"unit": "metric", "home_location": "Seattle"}
+        assert PreferenceStore(path).get("other") == {}
+
+    def test_updates_are_batched(self, tmp_path):
+        path = str(tmp_path / "preferences.db")
+        store = PreferenceStore(path, flush_interval=60)
+        store.update("abc", unit="metric")
+        store.update("abc", home_location="Seattle")
+        store.update("def", unit="imperial")
+        assert store.get("abc") == {"unit": "metric", "home_location": "Seattle"}
+        assert PreferenceStore(path).get("abc") == {}
+        store.flush()
+        assert PreferenceStore(path).get("abc") == {"unit": "metric", "home_location": "Seattle"}
+        assert PreferenceStore(path).get("def") == {"unit": "imperial"}
+        store.close()
+
+    def test_dirty_preferences_survive_eviction(self, tmp_path):
+        store = PreferenceStore(str(tmp_path / "preferences.db"), flush_interval=60, cache_max=2)
+        for session_id in ("a", "b", "c", "d"):
+            store.update(session_id, unit="metric")
+        assert len(store._loaded) == 2
+        assert store.get("a") == {"unit": "metric"}
+        store.close()
+
+    def test_ip_keyed_session_not_persisted(self):
+        """Users sharing an IP behind a NAT must not share saved preferences"""
+        shared = Session("203.0.113.7")
+        learn_weather_preferences(shared, ["Seattle"], "metric", ["Seattle"])
+        assert get_preferences(shared)["unit"] == "metric"
+        assert get_preferences(Session("203.0.113.7")) == {}
+
+    def test_no_session_no_preferences(self):
+        learn_weather_preferences(None, ["Seattle"], "metric", ["Seattle"])
+        assert get_preferences(None) == {}
+
+    def test_named_unit_becomes_preferred(self):
+        learn_weather_preferences(self.session, ["Seattle"], "metric", ["Seattle"])
+        assert get_preferences(self.session)["unit"] == "metric"
+
+    def test_resolved_location_becomes_home(self):
+        """The place a location-less request was answered for is remembered as home"""
+        learn_weather_preferences(self.session, None, None, ["Phoenix"])
+        assert get_preferences(self.session)["home_location"] == "Phoenix"
+        learn_weather_preferences(self.session, None, None, ["Tucson"])
+        assert get_preferences(self.session)["home_location"] == "Phoenix"
+
+    @patch('services.preference_service.PREFERENCES_HOME_MIN_REQUESTS', 2)
+    def test_most_asked_place_becomes_home(self):
+        learn_weather_preferences(self.session, None, None, ["Phoenix"])
+        learn_weather_preferences(self.session, ["Denver"], None, ["Denver"])
+        assert get_preferences(self.session)["home_location"] == "Phoenix"
+        learn_weather_preferences(self.session, ["Denver"], None, ["Denver"])
+        assert get_preferences(self.session)["home_location"] == "Denver"
+
+    @patch('services.preference_service.PREFERENCES_MAX_CATEGORIES', 2)
+    def test_favourite_categories(self):
+        for categories in (["sports"], ["technology"], ["technology"], ["health"]):
+            learn_news_preferences(self.session, categories)
+        assert get_preferences(self.session)["news_categories"] == ["technology", "sports"]
+
+    @patch('services.preference_service.PREFERENCES_ENABLED', False)
+    def test_disabled(self):
+        learn_weather_preferences(self.session, ["Seattle"], "metric", ["Seattle"])
+        assert get_preferences(self.session) == {}
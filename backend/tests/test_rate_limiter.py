@@ -0,0 +1,84 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.rate_limiter import (
+    TokenBucket, UpstreamBudget, QuotaExceededError, USER, BACKGROUND, parse_retry_after
+)
+from utils.metrics import metrics
+
+
+class TestTokenBucket:
+    """Test suite for the token bucket"""
+
+    def test_refills_over_time(self):
+        """Tokens refill at the configured rate up to capacity"""
+        bucket = TokenBucket(capacity=10, refill_per_second=1)
+        bucket.updated_at = 100.0
+        bucket.tokens = 0.0
+
+        assert bucket.available(now=105.0) == pytest.approx(5.0)
+        assert bucket.available(now=200.0) == pytest.approx(10.0)
+
+
+class TestUpstreamBudget:
+    """Test suite for per-upstream quota budgets"""
+
+    def test_user_calls_until_exhausted(self):
+        """User calls spend the whole per-minute budget"""
+        budget = UpstreamBudget("test_user", per_minute=3, per_day=100)
+
+        assert all(budget.try_acquire(USER) for _ in range(3))
+        assert not budget.try_acquire(USER)
+        with pytest.raises(QuotaExceededError):
+            budget.acquire(USER)
+
+    def test_background_calls_respect_reserve(self):
+        """Background refreshes stop once only the reserve is left"""
+        budget = UpstreamBudget("test_bg", per_minute=4, per_day=100, background_reserve=0.5)
+
+        assert budget.try_acquire(BACKGROUND)
+        assert budget.try_acquire(BACKGROUND)
+        assert not budget.try_acquire(BACKGROUND)
+        # The reserve is still available to users
+        assert budget.try_acquire(USER)
+        assert budget.try_acquire(USER)
+
+    def test_near_exhaustion(self):
+        """The low-water mark flags when to prefer stale data"""
+        budget = UpstreamBudget("test_low", per_minute=10, per_day=1000, low_water=0.2)
+        for _ in range(7):
+            budget.acquire()
+        assert not budget.near_exhaustion()
+        budget.acquire()
+        budget.acquire()
+        assert budget.near_exhaustion()
+
+    def test_exhaust_blocks_calls(self):
+        """An upstream 429 blocks further calls for Retry-After seconds"""
+        budget = UpstreamBudget("test_429", per_minute=10, per_day=100)
+        budget.exhaust(retry_after=30)
+
+        assert not budget.try_acquire(USER)
+        assert budget.remaining()["minute"] == 0.0
+        budget.reset()
+        assert budget.try_acquire(USER)
+
+    def test_gauges_are_registered(self):
+        """Remaining budget is exposed through the metrics registry"""
+        budget = UpstreamBudget("test_gauge", per_minute=5, per_day=50)
+        budget.acquire()
+
+        gauges = metrics.snapshot()["gauges"]
+        assert gauges["upstream.test_gauge.remaining_minute"] == pytest.approx(4.0, abs=0.1)
+        assert gauges["upstream.test_gauge.remaining_day"] == pytest.approx(49.0, abs=0.1)
+        assert metrics.counter("upstream.test_gauge.calls.user") == 1
+
+    def test_parse_retry_after(self):
+        """Retry-After values fall back to the default when unusable"""
+        assert parse_retry_after({"Retry-After": "12"}) == 12.0
+        assert parse_retry_after({}) == 60
+        assert parse_retry_after({"Retry-After": "soon"}, default=5) == 5
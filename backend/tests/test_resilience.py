@@ -0,0 +1,107 @@
+import pytest
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch, MagicMock
+import requests
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, retry_with_backoff, hedged_call,
+    is_transient_error, is_upstream_failure
+)
+from utils.metrics import metrics
+
+
+def _http_error(status):
+    response = MagicMock()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+
+class TestCircuitBreaker:
+    """Test suite for the circuit breaker"""
+
+    def test_opens_after_threshold(self):
+        """Consecutive failures open the circuit and later calls fail fast"""
+        breaker = CircuitBreaker("test_open", failure_threshold=2, reset_timeout=60)
+        failing = MagicMock(side_effect=requests.exceptions.ConnectionError("down"))
+
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                breaker.call(failing)
+
+        with pytest.raises(CircuitOpenError):
+            breaker.call(failing)
+        assert failing.call_count == 2
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.trips == 1
+        assert metrics.snapshot()["gauges"]["upstream.test_open.breaker_state"] == 2
+
+    def test_half_open_trial_closes_circuit(self):
+        """After the reset timeout a successful trial call closes the circuit"""
+        breaker = CircuitBreaker("test_half_open", failure_threshold=1, reset_timeout=0.01)
+        with pytest.raises(ValueError):
+            breaker.call(MagicMock(side_effect=ValueError("boom")))
+        time.sleep(0.02)
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.call(lambda: "ok") == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_client_errors_do_not_trip(self):
+        """Errors the predicate rejects (e.g. 404) count as healthy responses"""
+        breaker = CircuitBreaker("test_404", failure_threshold=1, is_failure=is_upstream_failure)
+        with pytest.raises(requests.exceptions.HTTPError):
+            breaker.call(MagicMock(side_effect=_http_error(404)))
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestRetries:
+    """Test suite for retries and hedging"""
+
+    @patch('utils.resilience.time.sleep')
+    def test_retries_transient_errors(self, mock_sleep):
+        """Transient failures are retried with a bounded, jittered delay"""
+        func = MagicMock(side_effect=[requests.exceptions.Timeout("slow"), "ok"])
+
+        assert retry_with_backoff(func, attempts=3, base_delay=0.5, retry_if=is_transient_error) == "ok"
+        assert func.call_count == 2
+        delay = mock_sleep.call_args[0][0]
+        assert 0 <= delay <= 0.5
+
+    @patch('utils.resilience.time.sleep')
+    def test_does_not_retry_client_errors(self, mock_sleep):
+        """Non-transient errors are raised immediately"""
+        func = MagicMock(side_effect=_http_error(404))
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            retry_with_backoff(func, attempts=3, retry_if=is_transient_error)
+        assert func.call_count == 1
+        mock_sleep.assert_not_called()
+
+    def test_hedged_call_returns_fastest(self):
+        """A slow primary is hedged and the faster duplicate wins"""
+        calls = []
+        release = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(timeout=2)
+                return "slow"
+            return "fast"
+
+        try:
+            assert hedged_call(fetch, hedge_after=0.05) == "fast"
+        finally:
+            release.set()
+        assert len(calls) == 2
+
+    def test_hedging_disabled(self):
+        """hedge_after=0 calls the function directly"""
+        assert hedged_call(lambda: "direct", hedge_after=0) == "direct"
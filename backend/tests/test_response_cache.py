@@ -0,0 +1,56 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.response_cache import (
+    is_context_dependent, get_cached_answer, cache_answer, predict_cache_hit, general_answers
+)
+
+
+class TestResponseCache:
+    """Test suite for response_cache.py"""
+
+    def setup_method(self):
+        general_answers.clear()
+
+    def test_first_turn_is_never_context_dependent(self):
+        assert not is_context_dependent("Why is it like that?", 0)
+
+    @pytest.mark.parametrize("message", [
+        "Why?", "Tell me more about it", "And what about France?", "What did they say", "Explain that again please",
+    ])
+    def test_follow_ups_are_context_dependent(self, message):
+        assert is_context_dependent(message, 2)
+
+    def test_standalone_question_after_history(self):
+        assert not is_context_dependent("What is the capital of Australia?", 2)
+
+    @patch('services.response_cache.SEMANTIC_CACHE_MAX_HISTORY_TURNS', 3)
+    def test_long_history_is_context_dependent(self):
+        assert is_context_dependent("What is the capital of Australia?", 3)
+
+    @patch('services.response_cache.SEMANTIC_CACHE_ENABLED', False)
+    def test_disabled_by_default(self):
+        cache_answer("What can you do?", 0, "Lots")
+        assert get_cached_answer("What can you do?", 0) is None
+        assert len(general_answers) == 0
+
+    @patch('services.response_cache.SEMANTIC_CACHE_ENABLED', True)
+    def test_round_trip_when_enabled(self):
+        cache_answer("What can you do?", 0, "Lots")
+        assert get_cached_answer("what can you do", 1) == "Lots"
+        # Follow-ups neither read nor fill the cache
+        assert get_cached_answer("What can you do with it?", 1) is None
+        cache_answer("And then?", 1, "More")
+        assert len(general_answers) == 1
+
+    @patch('services.response_cache.SEMANTIC_CACHE_ENABLED', True)
+    def test_predict_cache_hit(self):
+        cache_answer("What can you do?", 0, "Lots")
+        assert predict_cache_hit("what can you do", 0)
+        assert not predict_cache_hit("What can you do with it?", 1)
+        assert not predict_cache_hit("Tell me about the moon", 0)
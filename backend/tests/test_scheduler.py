@@ -0,0 +1,57 @@
+import pytest
+import asyncio
+import os
+import sys
+import threading
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.admission import OverloadedError
+from utils.scheduler import Lane, PriorityScheduler
+
+
+class TestPriorityScheduler:
+    """Test suite for scheduler.py"""
+
+    def setup_method(self):
+        self.scheduler = PriorityScheduler([
+            Lane("test-cheap", workers=2, max_queue=4),
+            Lane("test-expensive", workers=1, max_queue=1),
+        ], default="test-expensive")
+
+    def test_run_returns_result(self):
+        result = asyncio.run(self.scheduler.run("test-cheap", lambda a, b=0: a + b, 1, b=2))
+        assert result == 3
+
+    def test_cheap_lane_not_blocked_by_expensive(self):
+        """A busy expensive lane does not delay cheap requests"""
+        release = threading.Event()
+        expensive = self.scheduler.lanes["test-expensive"]
+        blocked = expensive.submit(release.wait, 2)
+
+        result = asyncio.run(asyncio.wait_for(self.scheduler.run("test-cheap", lambda: "fast"), timeout=1))
+
+        assert result == "fast"
+        assert not blocked.done()
+        release.set()
+        blocked.result(1)
+
+    def test_full_lane_refuses(self):
+        """Beyond its workers and queue, a lane refuses requests with a Retry-After"""
+        release = threading.Event()
+        expensive = self.scheduler.lanes["test-expensive"]
+        running = [expensive.submit(release.wait, 2), expensive.submit(release.wait, 2)]
+
+        with pytest.raises(OverloadedError) as excinfo:
+            expensive.submit(lambda: None)
+
+        assert excinfo.value.retry_after >= 1
+        release.set()
+        for future in running:
+            future.result(1)
+
+    def test_unknown_lane_uses_default(self):
+        result = asyncio.run(self.scheduler.run("missing", lambda: "ok"))
+        assert result == "ok"
+        assert self.scheduler.lanes["test-expensive"].latency is not None
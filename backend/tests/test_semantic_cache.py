@@ -0,0 +1,110 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.semantic_cache import SemanticCache, normalize_prompt, hashing_embedding, prompt_signature
+from utils.metrics import metrics
+
+
+class TestSemanticCache:
+    """Test suite for utils/semantic_cache.py"""
+
+    def setup_method(self):
+        metrics.reset()
+
+    def test_normalize_prompt(self):
+        assert normalize_prompt("  What CAN you do?! ") == "what can you do"
+
+    def test_embedding_is_unit_vector(self):
+        vector = hashing_embedding("tell me a joke")
+        assert abs(float((vector ** 2).sum()) - 1.0) < 1e-5
+        assert not hashing_embedding("").any()
+
+    def test_near_duplicate_hits(self):
+        """Punctuation, case and small wording changes still find the stored answer"""
+        cache = SemanticCache("t1", threshold=0.8)
+        cache.store("What can you do?", "I can check the weather, news and stocks.")
+        answer, similarity = cache.lookup("what can you do")
+        assert answer == "I can check the weather, news and stocks."
+        assert similarity > 0.99
+        assert cache.lookup("What can you do for me?")[0] == "I can check the weather, news and stocks."
+
+    @pytest.mark.parametrize("stored, asked", [
+        ("How does penicillin work when it fights a bacterial infection in the human body?",
+         "How does penicillin work when it fights a viral infection in the human body?"),
+        ("Give me a classic lasagna recipe with ricotta and beef for four people",
+         "Give me a classic lasagna recipe with ricotta and beef for eight people"),
+        ("What are the main differences between Python 2 and Python 3?",
+         "What are the main differences between Python 3 and Python 2?"),
+    ])
+    def test_near_miss_with_different_meaning(self, stored, asked):
+        """Prompts that embed close together but differ in a content word or number do not share answers"""
+        cache = SemanticCache("t8")
+        cache.store(stored, "answer")
+        assert float(hashing_embedding(normalize_prompt(stored)) @ hashing_embedding(normalize_prompt(asked))) >= 0.9
+        assert cache.lookup(asked) is None
+        assert not cache.contains(asked)
+        assert cache.lookup(stored)[0] == "answer"
+
+    def test_prompt_signature(self):
+        assert prompt_signature("what can you do for me") == ((), frozenset())
+        assert prompt_signature("python 3 and python 2") == (("3", "2"), frozenset({"python"}))
+        assert prompt_signature("lasagna for four people") == (("four",), frozenset({"lasagna", "people"}))
+
+    def test_unrelated_prompt_misses(self):
+        cache = SemanticCache("t2", threshold=0.8)
+        cache.store("What can you do?", "Lots")
+        assert cache.lookup("Explain the theory of relativity") is None
+        assert cache.stats()["hits"] == 0
+        assert cache.stats()["misses"] == 1
+
+    def test_contains_does_not_count(self):
+        """contains predicts a hit without touching the hit/miss statistics"""
+        cache = SemanticCache("t7", threshold=0.8)
+        cache.store("What can you do?", "Lots")
+        assert cache.contains("what can you do")
+        assert not cache.contains("Explain the theory of relativity")
+        assert cache.stats()["hits"] == 0
+        assert cache.stats()["misses"] == 0
+
+    def test_expired_entries_are_not_served(self):
+        cache = SemanticCache("t3", ttl=10)
+        cache.store("What can you do?", "Lots")
+        with patch('utils.semantic_cache.time.time', return_value=time.time() + 11):
+            assert cache.lookup("What can you do?") is None
+            assert len(cache) == 0
+
+    def test_lru_eviction_when_full(self):
+        cache = SemanticCache("t4", maxsize=2)
+        cache.store("first question here", "1")
+        cache.store("second question here", "2")
+        cache.lookup("first question here")
+        cache.store("third question here", "3")
+        assert len(cache) == 2
+        assert cache.lookup("second question here") is None
+        assert cache.lookup("first question here")[0] == "1"
+        assert cache.lookup("third question here")[0] == "3"
+
+    def test_same_prompt_replaces_entry(self):
+        cache = SemanticCache("t5")
+        cache.store("What can you do?", "old")
+        cache.store("what can you do", "new")
+        assert len(cache) == 1
+        assert cache.lookup("What can you do?")[0] == "new"
+
+    def test_metrics(self):
+        """Hit rate and the similarity distribution are exposed through the metrics registry"""
+        cache = SemanticCache("t6")
+        cache.store("What can you do?", "Lots")
+        cache.lookup("What can you do?")
+        cache.lookup("Something entirely different")
+        snapshot = metrics.snapshot()
+        assert snapshot["gauges"]["semantic_cache.t6.hit_rate"] == 0.5
+        assert snapshot["gauges"]["semantic_cache.t6.size"] == 1
+        assert snapshot["counters"]["semantic_cache.t6.similarity.le_1.0"] == 1
+        assert sum(v for k, v in snapshot["counters"].items() if k.startswith("semantic_cache.t6.similarity.")) == 2
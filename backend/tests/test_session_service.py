@@ -0,0 +1,48 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.session_service import get_session, sessions, conversation, add_exchange
+
+
+class TestSessionService:
+    """Test suite for session_service.py"""
+
+    def setup_method(self):
+        sessions.clear()
+
+    def test_same_id_same_session(self):
+        """A session is created once and returned for later messages"""
+        session = get_session("abc")
+        session.profile["name"] = "Sam"
+        assert get_session("abc") is session
+        assert get_session("abc").profile["name"] == "Sam"
+
+    def test_different_ids_are_separate(self):
+        assert get_session("abc") is not get_session("def")
+
+    def test_sessions_not_persistent_by_default(self):
+        assert not get_session("abc").persistent
+        assert get_session("def", persistent=True).persistent
+
+    def test_no_id_no_session(self):
+        assert get_session(None) is None
+        assert get_session("") is None
+
+    @patch('services.session_service.SESSION_HISTORY_TURNS', 2)
+    def test_add_exchange_keeps_pairs_and_recent_turns(self):
+        """Exchanges are stored as Human/AI pairs; only the most recent are kept but all are counted"""
+        session = get_session("abc")
+        for i in range(3):
+            add_exchange(session, f"question {i}", f"answer {i}")
+
+        assert [m.content for m in conversation(session)] == ["question 1", "answer 1", "question 2", "answer 2"]
+        assert session.turns == 3
+
+    def test_no_session_no_history(self):
+        add_exchange(None, "question", "answer")
+        assert conversation(None) == []
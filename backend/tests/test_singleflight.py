@@ -0,0 +1,77 @@
+import pytest
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.singleflight import SingleFlight, coalesce
+
+
+class TestSingleFlight:
+    """Test suite for request coalescing"""
+
+    def test_concurrent_identical_calls_share_one_execution(self):
+        """Concurrent callers with the same key get the leader's result"""
+        flight = SingleFlight("test")
+        calls = []
+        release = threading.Event()
+
+        def slow_fetch():
+            calls.append(1)
+            release.wait(timeout=2)
+            return {"temp": 72}
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "phoenix", slow_fetch) for _ in range(5)]
+            # Give followers time to join the in-flight call
+            deadline = time.time() + 2
+            while flight.shared < 4 and time.time() < deadline:
+                time.sleep(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert len(calls) == 1
+        assert all(r == {"temp": 72} for r in results)
+        assert flight.stats()["executed"] == 1
+        assert flight.stats()["shared"] == 4
+        assert flight.in_flight() == 0
+
+    def test_errors_are_shared_with_waiters(self):
+        """Followers see the same exception as the leader"""
+        flight = SingleFlight("test")
+        release = threading.Event()
+
+        def failing_fetch():
+            release.wait(timeout=2)
+            raise ValueError("upstream down")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(flight.do, "key", failing_fetch) for _ in range(3)]
+            deadline = time.time() + 2
+            while flight.shared < 2 and time.time() < deadline:
+                time.sleep(0.01)
+            release.set()
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+
+    def test_sequential_calls_are_not_cached(self):
+        """Once a call completes the next one executes again"""
+        flight = SingleFlight("test")
+        counter = iter(range(10))
+
+        assert flight.do("key", lambda: next(counter)) == 0
+        assert flight.do("key", lambda: next(counter)) == 1
+
+    def test_coalesce_decorator_uses_key_function(self):
+        """The decorator normalizes keys and exposes its group"""
+        @coalesce(key=lambda city: city.lower())
+        def lookup(city):
+            return city
+
+        assert lookup("Phoenix") == "Phoenix"
+        assert lookup.flight.stats()["executed"] == 1
@@ -0,0 +1,78 @@
+import pytest
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import AIMessage
+from utils.speculation import Speculation, SpeculationCancelled
+
+
+class TestSpeculation:
+    """Test suite for speculation.py"""
+
+    def setup_method(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def teardown_method(self):
+        self.executor.shutdown(wait=True)
+
+    def test_result_joins_chunks(self):
+        """Streamed chunks, as text or messages, are joined into the result"""
+        speculation = Speculation("test", lambda: iter([AIMessage(content="Hello, "), "world"]), self.executor)
+
+        assert speculation.result(timeout=1) == "Hello, world"
+        assert speculation.chunks == 2
+
+    def test_cancel_stops_stream_and_closes_it(self):
+        """Cancelling mid-stream stops reading and closes the stream"""
+        first_chunk = threading.Event()
+        resume = threading.Event()
+        closed = threading.Event()
+
+        def stream():
+            try:
+                yield "partial"
+                first_chunk.set()
+                resume.wait(1)
+                yield "never read"
+            finally:
+                closed.set()
+
+        speculation = Speculation("test", stream, self.executor)
+        assert first_chunk.wait(1)
+        speculation.cancel()
+        resume.set()
+
+        with pytest.raises(SpeculationCancelled):
+            speculation.result(timeout=1)
+        assert closed.wait(1)
+        assert speculation.chunks == 1
+
+    def test_cancel_before_start_never_streams(self):
+        """Work cancelled while queued is never started"""
+        blocker = threading.Event()
+        self.executor.submit(blocker.wait, 1)
+        stream = MagicMock(return_value=iter(["unused"]))
+        done = threading.Event()
+
+        speculation = Speculation("test", stream, self.executor)
+        speculation.add_done_callback(lambda _: done.set())
+        speculation.cancel()
+        blocker.set()
+
+        with pytest.raises(SpeculationCancelled):
+            speculation.result(timeout=1)
+        assert done.wait(1)
+        stream.assert_not_called()
+
+    def test_stream_errors_are_raised(self):
+        """An error while streaming is raised by result"""
+        speculation = Speculation("test", MagicMock(side_effect=RuntimeError("boom")), self.executor)
+
+        with pytest.raises(RuntimeError):
+            speculation.result(timeout=1)
@@ -0,0 +1,118 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.stock_service import (
+    QuoteProvider, FakeQuoteProvider, FMPQuoteProvider, set_quote_provider, get_quotes, get_stock_quotes,
+    find_stock_symbols, format_quote, quote_cache, MARKET_INDEX_SYMBOLS
+)
+from utils.rate_limiter import QuotaExceededError
+
+
+class TestStockService:
+    """Test suite for stock quotes"""
+
+    def setup_method(self):
+        """Serve deterministic local quotes and start with an empty cache"""
+        self.provider = FakeQuoteProvider()
+        set_quote_provider(self.provider)
+
+    def test_provider_must_implement_get_quotes(self):
+        class IncompleteProvider(QuoteProvider):
+            pass
+
+        with pytest.raises(TypeError):
+            IncompleteProvider()
+
+    @pytest.mark.parametrize("message", [
+        "How is the stock market today?",
+        "What's happening on Wall Street?",
+        "Are the markets up?",
+    ])
+    def test_market_wide_questions_get_indices(self, message):
+        assert find_stock_symbols(message) == MARKET_INDEX_SYMBOLS
+
+    def test_named_companies_take_precedence_over_indices(self):
+        assert find_stock_symbols("How is Apple doing in this market?") == ["AAPL"]
+        assert find_stock_symbols("Any good stocks to buy?") == []
+
+    def test_fake_provider_is_deterministic(self):
+        """The same symbol always gets the same quote; unknown symbols are left out"""
+        first = FakeQuoteProvider().get_quotes(["AAPL", "ZZZZ"])
+        second = FakeQuoteProvider().get_quotes(["AAPL"])
+
+        assert first == second
+        assert first["AAPL"]["name"] == "Apple Inc."
+
+    def test_quotes_are_cached(self):
+        """A second request within the TTL makes no provider call"""
+        get_quotes(["AAPL", "MSFT"])
+        get_quotes(["MSFT", "AAPL"])
+
+        assert self.provider.calls == [["AAPL", "MSFT"]]
+
+    def test_only_missing_symbols_are_fetched(self):
+        """Cached symbols are not requested again"""
+        get_quotes(["AAPL"])
+        get_quotes(["AAPL", "NVDA"])
+
+        assert self.provider.calls == [["AAPL"], ["NVDA"]]
+
+    def test_burst_of_requests_is_batched(self):
+        """Concurrent requests for different symbols share one provider call"""
+        with patch('services.stock_service.quote_batcher.window', 0.1):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda symbol: get_quotes([symbol]), ["AAPL", "MSFT", "NVDA", "TSLA"]))
+
+        assert len(self.provider.calls) == 1
+        assert sorted(self.provider.calls[0]) == ["AAPL", "MSFT", "NVDA", "TSLA"]
+        assert all(len(result) == 1 for result in results)
+
+    def test_stale_quotes_served_when_quota_exhausted(self):
+        """Recently expired quotes are used when the provider refuses the call"""
+        quote_cache.set("AAPL", {"symbol": "AAPL", "name": "Apple Inc.", "price": 100.0, "change": 1.0, "change_percent": 1.0}, ttl=-1)
+        self.provider.get_quotes = MagicMock(side_effect=QuotaExceededError("limit"))
+
+        assert get_quotes(["AAPL"])["AAPL"]["price"] == 100.0
+        assert "quote limit" in get_stock_quotes(["MSFT"])
+
+    def test_format_quote(self):
+        """Stocks are priced in dollars, indices in points"""
+        assert format_quote({"symbol": "AAPL", "name": "Apple Inc.", "price": 189.84, "change": 1.23, "change_percent": 0.65}) == \
+            "Apple Inc. (AAPL): $189.84, up $1.23 (+0.65%)"
+        assert format_quote({"symbol": "^DJI", "name": "Dow Jones Industrial Average", "price": 39000.5, "change": -120.0, "change_percent": -0.31}) == \
+            "Dow Jones Industrial Average (^DJI): 39,000.50, down 120.00 (-0.31%)"
+
+    def test_get_stock_quotes_lists_missing_symbols(self):
+        """Symbols without a quote are named in the answer"""
+        set_quote_provider(FakeQuoteProvider(quotes={
+            "AAPL": {"symbol": "AAPL", "name": "Apple Inc.", "price": 189.84, "change": 0, "change_percent": 0.0}
+        }))
+
+        result = get_stock_quotes(["AAPL", "MSFT"])
+
+        assert result.startswith("Here are the latest quotes:")
+        assert "Apple Inc. (AAPL): $189.84, unchanged (+0.00%)" in result
+        assert "No quote is available for MSFT." in result
+
+    @patch('services.stock_service.requests.get')
+    def test_fmp_provider_batches_symbols(self, mock_get):
+        """The FMP provider asks for every symbol in one request"""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = [
+            {"symbol": "AAPL", "name": "Apple Inc.", "price": 189.84, "change": 1.23, "changesPercentage": 0.65},
+            {"symbol": "MSFT", "name": "Microsoft Corporation", "price": 410.0, "change": -2.0, "changesPercentage": -0.49},
+        ]
+        mock_get.return_value = mock_response
+
+        quotes = FMPQuoteProvider(api_key="test").get_quotes(["AAPL", "MSFT"])
+
+        mock_get.assert_called_once()
+        assert mock_get.call_args[0][0].endswith("/quote/AAPL,MSFT")
+        assert quotes["MSFT"]["change_percent"] == -0.49
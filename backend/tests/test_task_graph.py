@@ -0,0 +1,79 @@
+import pytest
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.task_graph import TaskGraph, TaskTimeout
+
+
+class TestTaskGraph:
+    """Test suite for concurrent task graphs"""
+
+    def setup_method(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def teardown_method(self):
+        self.executor.shutdown(wait=False)
+
+    def test_independent_tasks_run_concurrently(self):
+        """Independent tasks finish in about the time of the slowest one"""
+        graph = TaskGraph("test")
+        for name in ["a", "b", "c"]:
+            graph.add(name, lambda name=name: time.sleep(0.2) or name)
+
+        start = time.perf_counter()
+        results = graph.run(self.executor)
+
+        assert time.perf_counter() - start < 0.5
+        assert results == {"a": "a", "b": "b", "c": "c"}
+
+    def test_slow_task_is_dropped_without_delaying_others(self):
+        """A task past its timeout is reported as TaskTimeout while the rest complete"""
+        release = threading.Event()
+        graph = TaskGraph("test")
+        graph.add("slow", lambda: release.wait(timeout=2), timeout=0.1)
+        graph.add("fast", lambda: "done", timeout=1)
+
+        start = time.perf_counter()
+        results = graph.run(self.executor)
+        release.set()
+
+        assert time.perf_counter() - start < 0.5
+        assert isinstance(results["slow"], TaskTimeout)
+        assert results["fast"] == "done"
+
+    def test_failures_are_returned(self):
+        """A failing task's exception is its result and the other tasks still complete"""
+        graph = TaskGraph("test")
+        graph.add("lookup", lambda: 1 / 0)
+        graph.add("format", lambda: "done")
+
+        results = graph.run(self.executor)
+
+        assert isinstance(results["lookup"], ZeroDivisionError)
+        assert results["format"] == "done"
+
+    def test_timeout_includes_wait_for_worker(self):
+        """A task still queued behind busy workers when its timeout passes is cancelled, never run"""
+        release = threading.Event()
+        calls = []
+        executor = ThreadPoolExecutor(max_workers=1)
+        graph = TaskGraph("test")
+        graph.add("busy", lambda: release.wait(timeout=2), timeout=0.3)
+        graph.add("queued", lambda: calls.append("queued"), timeout=0.1)
+
+        results = graph.run(executor)
+        release.set()
+        executor.shutdown(wait=True)
+
+        assert isinstance(results["queued"], TaskTimeout)
+        assert calls == []
+
+    def test_duplicate_name_rejected(self):
+        with pytest.raises(ValueError):
+            TaskGraph("test").add("answer", lambda: 1).add("answer", lambda: 2)
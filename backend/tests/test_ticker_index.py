@@ -0,0 +1,78 @@
+import pytest
+import os
+import sys
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.ticker_index import TickerIndex, get_ticker_index, load_symbols, normalize_company
+
+
+class TestTickerIndex:
+    """Test suite for local ticker and company name resolution"""
+
+    def test_normalize_company(self):
+        """Corporate suffixes, punctuation and possessives are dropped"""
+        assert normalize_company("The Coca-Cola Company") == "coca-cola"
+        assert normalize_company("Apple Inc.") == "apple"
+        assert normalize_company("McDonald's") == "mcdonald"
+        assert normalize_company("Johnson & Johnson") == "johnson johnson"
+
+    def test_lookup_names_aliases_and_symbols(self):
+        """Names, aliases and symbols in any case resolve to the symbol"""
+        index = TickerIndex([("GOOGL", "Alphabet Inc.", ["google"]), ("AAPL", "Apple Inc.", [])])
+
+        assert index.lookup("Apple Inc") == "AAPL"
+        assert index.lookup("Google") == "GOOGL"
+        assert index.lookup("aapl") == "AAPL"
+        assert index.lookup("Pear") is None
+        assert index.name("aapl") == "Apple Inc."
+
+    def test_complete_prefix(self):
+        """Prefix completion walks the sorted key array"""
+        index = TickerIndex([("GE", "General Electric", []), ("GM", "General Motors", []), ("GS", "Goldman Sachs", [])])
+
+        assert index.complete("gen") == [("general electric", "GE"), ("general motors", "GM")]
+        assert index.complete("") == []
+
+    def test_find_symbols_in_messages(self):
+        """Companies and tickers are found in mention order, longest name first"""
+        index = get_ticker_index()
+
+        assert index.find_symbols("How are Apple stocks doing?") == ["AAPL"]
+        assert index.find_symbols("price of MSFT and $nvda") == ["MSFT", "NVDA"]
+        assert index.find_symbols("Johnson & Johnson vs Bank of America") == ["JNJ", "BAC"]
+        assert index.find_symbols("how is the Dow and the S&P 500 today") == ["^DJI", "^GSPC"]
+        assert index.find_symbols("Apple, apple and AAPL") == ["AAPL"]
+
+    def test_lowercase_words_are_not_symbols(self):
+        """Words that are also tickers only count in capitals or with a $"""
+        index = TickerIndex([("ALL", "Allstate Corporation", ["allstate"]), ("T", "AT&T Inc.", ["at&t"])])
+
+        assert index.find_symbols("show me all the quotes") == []
+        assert index.find_symbols("ALL and $t") == ["ALL", "T"]
+
+    @pytest.mark.parametrize("message", [
+        "is my savings target realistic in this market",
+        "zoom in on the tech stocks",
+        "should I chase the rally or buy a square deal",
+        "do I need a visa to trade abroad",
+    ])
+    def test_everyday_words_are_not_companies(self, message):
+        """Names that are also everyday words do not match in ordinary lowercase text"""
+        assert get_ticker_index().find_symbols(message) == []
+
+    def test_everyday_word_names_with_capital_or_cue(self):
+        """Those names count when capitalized or followed by a ticker cue"""
+        index = get_ticker_index()
+
+        assert index.find_symbols("How are Target and Zoom doing?") == ["TGT", "ZM"]
+        assert index.find_symbols("visa shares and chase stock") == ["V", "JPM"]
+        assert index.find_symbols("jpmorgan chase") == ["JPM"]
+
+    def test_bundled_symbols_file(self):
+        """The bundled file loads with names and aliases"""
+        entries = load_symbols()
+
+        assert len(entries) > 50
+        assert ("AAPL", "Apple Inc.", ["apple"]) in entries
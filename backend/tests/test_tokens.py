@@ -0,0 +1,33 @@
+import pytest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.tokens import count_tokens, truncate_tokens
+
+
+class TestTokens:
+    """Test suite for utils/tokens.py"""
+
+    def test_count_grows_with_text(self):
+        assert count_tokens("") == 0
+        assert 0 < count_tokens("hello world") < count_tokens("hello world " * 20)
+
+    def test_short_text_unchanged(self):
+        assert truncate_tokens("It's sunny.", 50) == "It's sunny."
+
+    def test_long_text_truncated_within_budget(self):
+        text = "The forecast for Seattle calls for rain all week. " * 20
+        truncated = truncate_tokens(text, 20)
+        assert truncated.endswith("...")
+        assert truncated.startswith("The forecast for Seattle")
+        assert count_tokens(truncated) <= 21
+
+    @patch('utils.tokens._get_encoding', return_value=None)
+    def test_estimate_without_tokenizer(self, mock_get_encoding):
+        """Without tiktoken data, counts are estimated at four characters per token"""
+        assert count_tokens("abcdefgh") == 2
+        assert truncate_tokens("abcdefghijklmnop", 3) == "abcdefgh..."
@@ -0,0 +1,62 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
+from services.tool_context import compact_result, record_tool_result, fresh_tool_results, with_tool_context
+from services.session_service import Session
+
+
+class TestToolContext:
+    """Test suite for tool_context.py"""
+
+    def setup_method(self):
+        self.session = Session("tools")
+
+    def test_compact_result_drops_links_and_layout(self):
+        text = "Top headlines:\n\n1. Rates cut\n   https://example.com/a\n2. Markets rally"
+        assert compact_result(text) == "Top headlines: 1. Rates cut 2. Markets rally"
+
+    @patch('services.tool_context.TOOL_RESULT_MAX_TOKENS', 5)
+    def test_compact_result_is_token_capped(self):
+        assert compact_result("word " * 100).endswith("...")
+
+    def test_record_and_fresh_results(self):
+        record_tool_result(self.session, "weather", "Weather in Seattle", "It's rainy.")
+        record_tool_result(None, "weather", "Weather in Denver", "It's sunny.")
+        results = fresh_tool_results(self.session)
+        assert [(r.tool, r.request, r.result) for r in results] == [("weather", "Weather in Seattle", "It's rainy.")]
+        assert fresh_tool_results(None) == []
+
+    @patch('services.tool_context.TOOL_CONTEXT_MAX_RESULTS', 2)
+    def test_oldest_results_dropped(self):
+        for i in range(3):
+            record_tool_result(self.session, "stocks", f"quote {i}", f"result {i}")
+        assert [r.request for r in self.session.tool_results] == ["quote 1", "quote 2"]
+
+    def test_old_results_left_out(self):
+        record_tool_result(self.session, "weather", "Weather in Seattle", "It's rainy.")
+        with patch('services.tool_context.time.time', return_value=time.time() + 7200):
+            assert fresh_tool_results(self.session) == []
+        assert self.session.tool_results == []
+
+    @patch('services.tool_context.TOOL_CONTEXT_MAX_TOKENS', 60)
+    def test_token_budget_keeps_newest(self):
+        record_tool_result(self.session, "news", "news", "headline " * 30)
+        record_tool_result(self.session, "weather", "weather", "It's rainy.")
+        assert [r.tool for r in fresh_tool_results(self.session)] == ["weather"]
+
+    def test_with_tool_context_inserts_before_newest_message(self):
+        record_tool_result(self.session, "weather", "Weather in Seattle", "It's rainy.")
+        messages = [HumanMessage(content="Hi"), AIMessage(content="Hello!"), HumanMessage(content="Is that cold?")]
+        result = with_tool_context(messages, fresh_tool_results(self.session))
+        assert result[:2] == messages[:2]
+        assert isinstance(result[2], SystemMessage)
+        assert '"request": "Weather in Seattle"' in result[2].content
+        assert result[3] is messages[2]
+        assert with_tool_context(messages, []) is messages
@@ -0,0 +1,123 @@
+import pytest
+import os
+import sys
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    """Test suite for the TTL cache"""
+
+    def test_get_or_load_caches_value(self):
+        """A loaded value is served from memory on the next read"""
+        cache = TTLCache("test", ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return "value"
+
+        assert cache.get_or_load("key", loader) == "value"
+        assert cache.get_or_load("key", loader) == "value"
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_entries_expire(self):
+        """Entries past their TTL are treated as misses"""
+        cache = TTLCache("test", ttl=10)
+        with patch('utils.ttl_cache.time.time', return_value=1000.0):
+            cache.set("key", "value")
+        with patch('utils.ttl_cache.time.time', return_value=1011.0):
+            assert cache.get("key") is None
+            # The expired entry is still visible for refresh decisions
+            assert cache.get_entry("key").value == "value"
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when full"""
+        cache = TTLCache("test", ttl=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_lfu_eviction(self):
+        """The least requested entry is evicted when full under the lfu policy"""
+        cache = TTLCache("test", ttl=60, maxsize=2, eviction="lfu")
+        cache.set("a", 1)
+        cache.set("b", 2)
+        for _ in range(3):
+            cache.get("a")
+        cache.get("b")
+        cache.set("c", 3)
+
+        assert cache.get_entry("a") is not None
+        assert cache.get_entry("b") is None
+        assert cache.get_entry("c") is not None
+
+    def test_ttl_eviction(self):
+        """The entry closest to expiry is evicted when full under the ttl policy"""
+        cache = TTLCache("test", ttl=60, maxsize=2, eviction="ttl")
+        cache.set("a", 1, ttl=300)
+        cache.set("b", 2, ttl=30)
+        cache.set("c", 3, ttl=120)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_unknown_eviction_policy(self):
+        """An unknown policy is rejected up front"""
+        with pytest.raises(ValueError):
+            TTLCache("test", ttl=60, eviction="random")
+
+    def test_cacheable_predicate(self):
+        """Values rejected by the predicate are returned but not stored"""
+        cache = TTLCache("test", ttl=60, cacheable=lambda v: "error" not in v)
+
+        assert cache.get_or_load("key", lambda: {"error": "boom"}) == {"error": "boom"}
+        assert len(cache) == 0
+
+    def test_popular_keys(self):
+        """Keys are ranked by recent request volume"""
+        cache = TTLCache("test", ttl=60)
+        for _ in range(3):
+            cache.get("phoenix")
+        cache.get("tucson")
+
+        assert cache.popular_keys(2) == ["phoenix", "tucson"]
+        assert cache.popular_keys(1) == ["phoenix"]
+
+    def test_stale_served_on_configured_errors(self):
+        """Loader errors listed in stale_on fall back to the expired entry"""
+        cache = TTLCache("test", ttl=10, max_stale=100, stale_on=(RuntimeError,))
+        with patch('utils.ttl_cache.time.time', return_value=1000.0):
+            cache.set("key", "old")
+
+        def failing_loader():
+            raise RuntimeError("quota")
+
+        with patch('utils.ttl_cache.time.time', return_value=1050.0):
+            assert cache.get_or_load("key", failing_loader) == "old"
+            assert cache.stats()["stale_hits"] == 1
+        with patch('utils.ttl_cache.time.time', return_value=1200.0):
+            # Too old to serve even as stale
+            with pytest.raises(RuntimeError):
+                cache.get_or_load("key", failing_loader)
+
+    def test_prefer_stale_skips_loader(self):
+        """prefer_stale serves an expired entry without calling upstream"""
+        cache = TTLCache("test", ttl=10, max_stale=100)
+        with patch('utils.ttl_cache.time.time', return_value=1000.0):
+            cache.set("key", "old")
+        with patch('utils.ttl_cache.time.time', return_value=1050.0):
+            assert cache.get_or_load("key", lambda: "new", prefer_stale=True) == "old"
+            assert cache.get_or_load("key", lambda: "new") == "new"
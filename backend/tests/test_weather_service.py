@@ -3,12 +3,18 @@ import os
 import sys
 from unittest.mock import patch, MagicMock
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Add the parent directory to the path to import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from services.weather_service import get_weather
+from services.weather_service import (
+    get_weather, get_weather_for_cities, current_weather_cache, forecast_cache, unknown_city_cache,
+    city_id_cache, openweather_budget, openweather_breaker
+)
 from utils.logging_config import get_logger
 
 # Get logger for this test module
@@ -17,6 +23,15 @@ logger = get_logger(__name__)
 class TestWeatherService:
     """Test suite for weather service functions"""
 
+    def setup_method(self):
+        """Clear cached weather payloads, quota and breaker state before each test"""
+        current_weather_cache.clear()
+        forecast_cache.clear()
+        unknown_city_cache.clear()
+        city_id_cache.clear()
+        openweather_budget.reset()
+        openweather_breaker.reset()
+
     @patch('services.weather_service.requests.get')
     def test_get_weather_success(self, mock_get):
         """Test successful API call to get weather data"""
@@ -330,3 +345,228 @@ class TestWeatherService:
         args, kwargs = mock_get.call_args
         assert "api.openweathermap.org/data/2.5/forecast" in args[0]
         assert "Chicago" in args[0]
+
+    @patch('services.weather_service.requests.get')
+    def test_concurrent_forecasts_share_one_request(self, mock_get):
+        """Test that concurrent forecasts for the same city coalesce into one API call"""
+        from services.weather_service import fetch_forecast_weather_data
+
+        release = threading.Event()
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "list": [
+                {
+                    "dt": int((datetime.now() + timedelta(days=1)).timestamp()),
+                    "main": {"temp": 72.5},
+                    "weather": [{"main": "Clear", "description": "clear sky"}]
+                }
+            ]
+        }
+        mock_response.raise_for_status = MagicMock()
+
+        def slow_get(*args, **kwargs):
+            release.wait(timeout=2)
+            return mock_response
+        mock_get.side_effect = slow_get
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [
+                pool.submit(get_weather, city, "imperial", period)
+                for city, period in [("Denver", "tomorrow"), ("denver", "week"), ("Denver ", "tomorrow")]
+            ]
+            # Let the followers join before the leader returns
+            deadline = time.time() + 2
+            while fetch_forecast_weather_data.flight.in_flight() == 0 and time.time() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert mock_get.call_count == 1
+        assert all("forecast" in r.lower() for r in results)
+
+    @patch('services.weather_service.requests.get')
+    def test_current_weather_served_from_cache(self, mock_get):
+        """Test that repeated lookups for the same city hit the cache"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "weather": [{"description": "clear sky"}],
+            "main": {"temp": 90.1, "feels_like": 88.0, "humidity": 10}
+        }
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        first = get_weather("Phoenix", "imperial")
+        second = get_weather("phoenix", "imperial")
+
+        assert mock_get.call_count == 1
+        assert "Phoenix" in first
+        assert "phoenix" in second
+        assert current_weather_cache.stats()["hits"] == 1
+
+    @patch('services.weather_service.requests.get')
+    def test_city_not_found_is_negatively_cached(self, mock_get):
+        """Test that a 404 is remembered so repeat lookups skip the API"""
+        mock_response = MagicMock()
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Client Error")
+        mock_response.status_code = 404
+        mock_get.return_value = mock_response
+
+        first = get_weather("Atlantis")
+        second = get_weather("atlantis", "metric", "tomorrow")
+
+        assert mock_get.call_count == 1
+        assert "Could not find weather data for 'Atlantis'" in first
+        assert "Could not find forecast data for 'atlantis'" in second
+        assert len(current_weather_cache) == 0
+
+    @patch('services.weather_service.requests.get')
+    def test_misspelled_city_is_corrected_before_lookup(self, mock_get):
+        """Test that near-miss city names are resolved locally before calling the API"""
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "weather": [{"description": "light rain"}],
+            "main": {"temp": 55.0, "feels_like": 53.0, "humidity": 80}
+        }
+        mock_response.raise_for_status = MagicMock()
+        mock_get.return_value = mock_response
+
+        result = get_weather("Seatle")
+
+        assert "q=Seattle" in mock_get.call_args[0][0]
+        assert "The current weather in Seattle" in result
+
+    @patch('services.weather_service.requests.get')
+    def test_rate_limited_serves_stale_data(self, mock_get):
+        """Test that an upstream 429 falls back to the expired cached payload"""
+        current_weather_cache.set(("phoenix", "imperial"), {
+            "weather": [{"description": "haze"}],
+            "main": {"temp": 101.0, "feels_like": 99.0, "humidity": 8}
+        }, ttl=-1)
+        mock_response = MagicMock()
+        mock_response.status_code = 429
+        mock_response.headers = {"Retry-After": "30"}
+        mock_get.return_value = mock_response
+
+        result = get_weather("Phoenix")
+
+        assert "haze" in result
+        assert "101.0°F" in result
+        assert not openweather_budget.try_acquire()
+
+    @patch('services.weather_service.requests.get')
+    def test_quota_exhausted_without_cache(self, mock_get):
+        """Test a friendly message instead of a raw error when quota is gone and nothing is cached"""
+        openweather_budget.exhaust(retry_after=30)
+
+        result = get_weather("Boise")
+
+        mock_get.assert_not_called()
+        assert "busy right now" in result
+
+    @patch('services.weather_service.requests.get')
+    def test_server_errors_are_retried(self, mock_get):
+        """Test that a transient 5xx is retried and the second attempt succeeds"""
+        failing = MagicMock()
+        failing.raise_for_status.side_effect = requests.exceptions.HTTPError("503 Server Error")
+        failing.status_code = 503
+        ok = MagicMock()
+        ok.status_code = 200
+        ok.json.return_value = {
+            "weather": [{"description": "clear sky"}],
+            "main": {"temp": 80.0, "feels_like": 79.0, "humidity": 20}
+        }
+        mock_get.side_effect = [failing, ok]
+
+        with patch('utils.resilience.time.sleep'):
+            result = get_weather("Tucson")
+
+        assert mock_get.call_count == 2
+        assert "clear sky" in result
+
+    @patch('services.weather_service.requests.get')
+    def test_open_circuit_fails_fast_and_serves_stale(self, mock_get):
+        """Test that repeated connection failures open the circuit and stale data is served"""
+        mock_get.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        current_weather_cache.set(("flagstaff", "imperial"), {
+            "weather": [{"description": "light snow"}],
+            "main": {"temp": 28.0, "feels_like": 20.0, "humidity": 70}
+        }, ttl=-1)
+
+        with patch('utils.resilience.time.sleep'):
+            for _ in range(3):
+                get_weather("Prescott")
+        calls_before = mock_get.call_count
+
+        assert openweather_breaker.state == "open"
+        assert "issue connecting" in get_weather("Prescott")
+        assert "light snow" in get_weather("Flagstaff")
+        assert mock_get.call_count == calls_before
+
+    @patch('services.weather_service.requests.get')
+    def test_multiple_cities_fetched_concurrently(self, mock_get):
+        """Test that several cities are looked up side by side and answered together"""
+        def slow_response(url, timeout=None):
+            time.sleep(0.2)
+            city = url.split("q=")[1].split("&")[0]
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {
+                "id": len(city), "name": city,
+                "weather": [{"description": f"sky over {city}"}],
+                "main": {"temp": 70.0, "feels_like": 70.0, "humidity": 10}
+            }
+            return response
+        mock_get.side_effect = slow_response
+
+        start = time.perf_counter()
+        result = get_weather_for_cities(["Phoenix", "Seattle", "Denver", "phoenix"])
+        elapsed = time.perf_counter() - start
+
+        assert mock_get.call_count == 3
+        assert elapsed < 0.5
+        assert result.index("Phoenix") < result.index("Seattle") < result.index("Denver")
+        assert len(result.split("\n\n")) == 3
+
+    @patch('services.weather_service.requests.get')
+    def test_known_cities_use_group_endpoint(self, mock_get):
+        """Test that cities with learned ids share one group call"""
+        city_id_cache.set("phoenix", 5308655)
+        city_id_cache.set("seattle", 5809844)
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"cnt": 2, "list": [
+            {"id": 5308655, "weather": [{"description": "clear sky"}], "main": {"temp": 95.0, "feels_like": 93.0, "humidity": 8}},
+            {"id": 5809844, "weather": [{"description": "light rain"}], "main": {"temp": 55.0, "feels_like": 53.0, "humidity": 80}},
+        ]}
+        mock_get.return_value = mock_response
+
+        result = get_weather_for_cities(["Phoenix", "Seattle"])
+
+        mock_get.assert_called_once()
+        assert "group?id=5308655,5809844" in mock_get.call_args[0][0]
+        assert "The current weather in Phoenix is clear sky" in result
+        assert "The current weather in Seattle is light rain" in result
+        assert current_weather_cache.get(("seattle", "imperial")) is not None
+
+    @patch('services.weather_service.requests.get')
+    def test_group_failure_falls_back_to_single_lookups(self, mock_get):
+        """Test that a failed group call does not fail the whole answer"""
+        city_id_cache.set("phoenix", 5308655)
+        city_id_cache.set("seattle", 5809844)
+        ok = MagicMock()
+        ok.status_code = 200
+        ok.json.return_value = {"weather": [{"description": "clear sky"}], "main": {"temp": 70.0, "feels_like": 70.0, "humidity": 10}}
+        def respond(url, timeout=None):
+            if "/group?" in url:
+                failing = MagicMock()
+                failing.status_code = 400
+                failing.raise_for_status.side_effect = requests.exceptions.HTTPError("400 Bad Request")
+                return failing
+            return ok
+        mock_get.side_effect = respond
+
+        result = get_weather_for_cities(["Phoenix", "Seattle"])
+
+        assert mock_get.call_count == 3
+        assert result.count("clear sky") == 2
@@ -0,0 +1,239 @@
+import re
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Weight of the newest call in the average call duration used for Retry-After estimates
+DURATION_SMOOTHING = 0.2
+
+# Remaining fraction of the upstream's request or token allowance below which concurrency is halved,
+# and above which it may grow again
+RATE_LIMIT_LOW_WATER = 0.1
+RATE_LIMIT_HIGH_WATER = 0.5
+
+class OverloadedError(Exception):
+    """Raised when a call is refused because the upstream is saturated"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def parse_reset_duration(value):
+    """
+    Read a rate-limit reset duration such as "1s", "6m0s" or "250ms".
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float or None: Seconds, or None if the value cannot be read
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    scale = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+class AdmissionController:
+    """
+    Limits how many calls to an upstream run at once, queueing the rest.
+
+    Up to `limit` calls run concurrently; the next `max_queue` callers wait
+    in arrival order for at most `queue_timeout` seconds. Anyone beyond that
+    is refused at once with OverloadedError, which carries a Retry-After
+    estimate, instead of piling more load onto a saturated upstream.
+
+    The limit adapts between `min_in_flight` and `max_in_flight` from the
+    upstream's rate-limit headers: it is halved when the remaining
+    allowance runs low and grows by one while there is plenty left. A rate
+    limit error halves it too and holds new calls until the upstream's
+    Retry-After has passed.
+    """
+
+    def __init__(self, name, max_in_flight, max_queue, queue_timeout, min_in_flight=1):
+        """
+        Args:
+            name (str): Upstream name used in logs and metrics
+            max_in_flight (int): Most concurrent calls
+            max_queue (int): Most callers waiting for a slot
+            queue_timeout (float): Seconds a caller waits before giving up
+            min_in_flight (int): Concurrency never adapts below this
+        """
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.min_in_flight = min(min_in_flight, max_in_flight)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limit = max_in_flight
+        self.in_flight = 0
+        self._waiting = deque()
+        self._paused_until = 0.0
+        self._duration = None
+        self._cond = threading.Condition()
+
+        metrics.register_gauge(f"admission.{name}.in_flight", lambda: self.in_flight)
+        metrics.register_gauge(f"admission.{name}.queued", lambda: len(self._waiting))
+        metrics.register_gauge(f"admission.{name}.limit", lambda: self.limit)
+
+    def retry_after(self):
+        """Seconds a refused caller should wait before trying again (at least 1)."""
+        with self._cond:
+            return self._retry_after(time.monotonic())
+
+    def _retry_after(self, now):
+        # Caller holds the lock
+        pause = self._paused_until - now
+        if pause > 0:
+            return max(1, math.ceil(pause))
+        # Time for the calls ahead of a new caller to drain through the current limit
+        backlog = (self.in_flight + len(self._waiting)) / max(self.limit, 1)
+        return max(1, math.ceil(backlog * (self._duration or 1.0)))
+
+    def _refuse(self, reason, now):
+        # Caller holds the lock
+        retry_after = self._retry_after(now)
+        metrics.increment(f"admission.{self.name}.rejected")
+        logger.warning(f"{self.name} admission refused a call ({reason}), retry after {retry_after}s")
+        return OverloadedError(f"{self.name} is overloaded: {reason}", retry_after)
+
+    def try_acquire(self):
+        """Take a slot only if one is free right now, without queueing."""
+        with self._cond:
+            if self._waiting or self.in_flight >= self.limit or time.monotonic() < self._paused_until:
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self, timeout=None):
+        """
+        Take a slot, waiting in line if none is free.
+
+        Args:
+            timeout (float, optional): Longest wait (defaults to queue_timeout)
+
+        Raises:
+            OverloadedError: If the queue is full or no slot frees up in time
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._cond:
+            now = time.monotonic()
+            if not self._waiting and self.in_flight < self.limit and now >= self._paused_until:
+                self.in_flight += 1
+                return
+            if len(self._waiting) >= self.max_queue:
+                raise self._refuse("queue full", now)
+            if self._paused_until - now > timeout:
+                raise self._refuse("rate limited upstream", now)
+
+            ticket = object()
+            self._waiting.append(ticket)
+            deadline = now + timeout
+            metrics.increment(f"admission.{self.name}.queued_calls")
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._waiting[0] is ticket and self.in_flight < self.limit and now >= self._paused_until:
+                        break
+                    if now >= deadline:
+                        raise self._refuse("queue timeout", now)
+                    wake = deadline if now >= self._paused_until else min(deadline, self._paused_until)
+                    self._cond.wait(wake - now)
+            finally:
+                self._waiting.remove(ticket)
+                self._cond.notify_all()
+            self.in_flight += 1
+
+    def release(self, duration=None):
+        """
+        Give a slot back.
+
+        Args:
+            duration (float, optional): How long the call took, for Retry-After estimates
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if duration is not None:
+                self._duration = duration if self._duration is None else (
+                    DURATION_SMOOTHING * duration + (1 - DURATION_SMOOTHING) * self._duration
+                )
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, timeout=None):
+        """Hold a slot for the duration of a with block."""
+        self.acquire(timeout)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def observe_headers(self, headers):
+        """
+        Adapt the concurrency limit to the upstream's rate-limit headers.
+
+        Reads the OpenAI-style x-ratelimit-limit-*, x-ratelimit-remaining-* and
+        x-ratelimit-reset-* headers for requests and tokens; once an allowance
+        is spent, calls are held until it resets. Missing headers change nothing.
+
+        Args:
+            headers (Mapping): Response headers
+        """
+        if not headers:
+            return
+        fractions = []
+        for kind in ("requests", "tokens"):
+            try:
+                limit = float(headers.get(f"x-ratelimit-limit-{kind}"))
+                remaining = float(headers.get(f"x-ratelimit-remaining-{kind}"))
+            except (TypeError, ValueError):
+                continue
+            if limit > 0:
+                fractions.append(remaining / limit)
+            reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if remaining <= 0 and reset:
+                # The allowance is spent: hold calls until it refills rather than collect 429s
+                with self._cond:
+                    self._paused_until = max(self._paused_until, time.monotonic() + reset)
+        if not fractions:
+            return
+        fraction = min(fractions)
+        if fraction <= RATE_LIMIT_LOW_WATER:
+            self._adjust_limit(lambda limit: limit // 2, f"{fraction:.0%} of the rate limit left")
+        elif fraction >= RATE_LIMIT_HIGH_WATER:
+            self._adjust_limit(lambda limit: limit + 1, f"{fraction:.0%} of the rate limit left")
+
+    def rate_limited(self, retry_after):
+        """
+        Record that the upstream refused a call for rate limiting.
+
+        Args:
+            retry_after (float): Seconds before the upstream accepts calls again
+        """
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        metrics.increment(f"admission.{self.name}.rate_limited")
+        self._adjust_limit(lambda limit: limit // 2, f"rate limited for {retry_after}s")
+
+    def _adjust_limit(self, adjust, reason):
+        """Apply adjust(current limit) under the lock, within min_in_flight..max_in_flight."""
+        with self._cond:
+            limit = max(self.min_in_flight, min(self.max_in_flight, adjust(self.limit)))
+            if limit == self.limit:
+                return
+            logger.info(f"{self.name} concurrency limit {self.limit} -> {limit} ({reason})")
+            self.limit = limit
+            self._cond.notify_all()
@@ -0,0 +1,102 @@
+import threading
+import time
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class _Batch:
+    """Keys collected for one upstream call and the outcome every waiter receives"""
+
+    def __init__(self):
+        self.keys = []
+        self.done = threading.Event()
+        self.results = {}
+        self.error = None
+
+class BatchLoader:
+    """
+    Merges keys requested by concurrent callers into shared bulk loads.
+
+    The first caller to ask for keys opens a batch and waits `window` seconds;
+    keys requested by other callers meanwhile join it, and the opener then
+    loads them all with one call to `load_many` (split into chunks of at most
+    `max_batch`). A batch that fills up is closed early so later callers start
+    a new one. Every caller gets the entries for its own keys, or the
+    exception the load raised.
+    """
+
+    def __init__(self, name, load_many, max_batch=50, window=0.02):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+            load_many (callable): Function taking a list of keys and returning a dict of results
+            max_batch (int): Most keys passed to one load_many call
+            window (float): Seconds a new batch waits for more keys
+        """
+        self.name = name
+        self.load_many = load_many
+        self.max_batch = max_batch
+        self.window = window
+        self._lock = threading.Lock()
+        self._open = None
+        self.batches = 0
+        self.keys_loaded = 0
+
+    def load(self, keys):
+        """
+        Load keys, sharing the upstream call with other callers in the same window.
+
+        Args:
+            keys (iterable): Hashable keys
+
+        Returns:
+            dict: Results for the requested keys that load_many returned
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        batches, leading = [], []
+        with self._lock:
+            for key in keys:
+                if self._open is None or len(self._open.keys) >= self.max_batch:
+                    self._open = _Batch()
+                    leading.append(self._open)
+                if key not in self._open.keys:
+                    self._open.keys.append(key)
+                if not batches or batches[-1] is not self._open:
+                    batches.append(self._open)
+
+        for batch in leading:
+            self._run(batch)
+        results = {}
+        for batch in batches:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            results.update({key: batch.results[key] for key in keys if key in batch.results})
+        return results
+
+    def _run(self, batch):
+        """Wait for the window to collect keys, close the batch and load it."""
+        if self.window:
+            time.sleep(self.window)
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+            keys = list(batch.keys)
+        try:
+            for start in range(0, len(keys), self.max_batch):
+                batch.results.update(self.load_many(keys[start:start + self.max_batch]))
+            self.batches += 1
+            self.keys_loaded += len(keys)
+            metrics.increment(f"batch.{self.name}.calls")
+            logger.debug(f"{self.name} loaded {len(keys)} key(s) in one batch")
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    def stats(self):
+        return {"batches": self.batches, "keys_loaded": self.keys_loaded}
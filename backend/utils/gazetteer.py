@@ -0,0 +1,198 @@
+import mmap
+import os
+import struct
+import tempfile
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# File layout (little-endian):
+#   header   - magic, version, entry count, bucket count
+#   buckets  - open-addressing hash table of (entry index + 1), 0 = empty
+#   entries  - (string offset, key length, display length), sorted by key
+#   strings  - key bytes immediately followed by display-name bytes
+MAGIC = b"GAZT"
+VERSION = 1
+HEADER = struct.Struct("<4sIII")
+BUCKET = struct.Struct("<I")
+ENTRY = struct.Struct("<IHH")
+
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK_64 = 0xffffffffffffffff
+
+def normalize_name(name):
+    """
+    Normalize a place name for lookups: lowercase, single spaces, no surrounding punctuation.
+
+    Args:
+        name (str): Raw place name
+
+    Returns:
+        str: Normalized name
+    """
+    return " ".join(name.lower().strip(" \t\n.,!?;:'\"").split())
+
+def _fnv1a(data):
+    h = _FNV_OFFSET
+    for byte in data:
+        h = ((h ^ byte) * _FNV_PRIME) & _MASK_64
+    return h
+
+def build_gazetteer(names, path):
+    """
+    Write a gazetteer file for the given place names.
+
+    Names are de-duplicated by their normalized form (the first spelling wins)
+    and the file is written atomically, so readers never see a partial file.
+
+    Args:
+        names (iterable): Place names in their display form
+        path (str): Destination file
+
+    Returns:
+        int: Number of names written
+    """
+    records = {}
+    for name in names:
+        key = normalize_name(name)
+        if key and key not in records:
+            records[key] = name.strip()
+    ordered = sorted((key.encode("utf-8"), display.encode("utf-8")) for key, display in records.items())
+
+    nbuckets = 1
+    while nbuckets < max(len(ordered) * 2, 8):
+        nbuckets <<= 1
+    buckets = [0] * nbuckets
+    for index, (key, _) in enumerate(ordered):
+        slot = _fnv1a(key) & (nbuckets - 1)
+        while buckets[slot]:
+            slot = (slot + 1) & (nbuckets - 1)
+        buckets[slot] = index + 1
+
+    strings = bytearray()
+    entries = bytearray()
+    for key, display in ordered:
+        entries += ENTRY.pack(len(strings), len(key), len(display))
+        strings += key + display
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(ordered), nbuckets))
+            f.write(struct.pack(f"<{nbuckets}I", *buckets))
+            f.write(entries)
+            f.write(strings)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logger.info(f"Wrote gazetteer with {len(ordered)} names to {path}")
+    return len(ordered)
+
+class Gazetteer:
+    """
+    Read-only, memory-mapped place-name table.
+
+    Opening only maps the file, so startup cost does not depend on its size and
+    every worker process shares the same pages. Exact lookups hash the name and
+    probe the bucket table, costing O(len(name)) regardless of how many names the
+    file holds; prefix queries binary-search the sorted entry table.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Gazetteer file written by build_gazetteer
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} gazetteer file")
+        magic, version, self._count, self._nbuckets = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} gazetteer file")
+        self._buckets_off = HEADER.size
+        self._entries_off = self._buckets_off + self._nbuckets * BUCKET.size
+        self._strings_off = self._entries_off + self._count * ENTRY.size
+
+    def _entry(self, index):
+        offset, key_len, display_len = ENTRY.unpack_from(self._mm, self._entries_off + index * ENTRY.size)
+        start = self._strings_off + offset
+        return start, key_len, display_len
+
+    def _key(self, index):
+        start, key_len, _ = self._entry(index)
+        return self._mm[start:start + key_len]
+
+    def _display(self, index):
+        start, key_len, display_len = self._entry(index)
+        return self._mm[start + key_len:start + key_len + display_len].decode("utf-8")
+
+    def get(self, name):
+        """
+        Look up a place name.
+
+        Args:
+            name (str): Place name in any case or spacing
+
+        Returns:
+            str or None: The stored display form, or None if unknown
+        """
+        key = normalize_name(name).encode("utf-8")
+        if not key or not self._count:
+            return None
+        mask = self._nbuckets - 1
+        slot = _fnv1a(key) & mask
+        while True:
+            (stored,) = BUCKET.unpack_from(self._mm, self._buckets_off + slot * BUCKET.size)
+            if not stored:
+                return None
+            if self._key(stored - 1) == key:
+                return self._display(stored - 1)
+            slot = (slot + 1) & mask
+
+    def with_prefix(self, prefix, limit=10):
+        """
+        List names whose normalized form starts with prefix, in sorted order.
+
+        Args:
+            prefix (str): Beginning of a place name
+            limit (int): Maximum number of names to return
+
+        Returns:
+            list: Display forms of the matching names
+        """
+        key = normalize_name(prefix).encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._key(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        matches = []
+        while low < self._count and len(matches) < limit and self._key(low).startswith(key):
+            matches.append(self._display(low))
+            low += 1
+        return matches
+
+    def names(self):
+        """Yield every display name in sorted key order."""
+        for index in range(self._count):
+            yield self._display(index)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._mm.close()
@@ -0,0 +1,143 @@
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class MessageAnalysis:
+    """
+    Analysis outputs for one message, each computed on first use and then reused.
+
+    Inputs (the message, the detected intent, the client IP...) are given up
+    front; every other output comes from an analyzer, a function taking this
+    object, so analyzers can build on each other ("location" on "entities")
+    and only what is actually read gets computed.
+    """
+
+    def __init__(self, analyzers, **inputs):
+        """
+        Args:
+            analyzers (dict): Output name -> function(analysis) computing it
+            **inputs: Values known before analysis starts
+        """
+        self._analyzers = analyzers
+        self._inputs = set(inputs)
+        self._values = dict(inputs)
+
+    def get(self, name):
+        """
+        Return an input or analysis output, computing it if needed.
+
+        Raises:
+            KeyError: If name is neither an input nor an analyzer
+        """
+        if name not in self._values:
+            if name not in self._analyzers:
+                raise KeyError(name)
+            self._values[name] = self._analyzers[name](self)
+            logger.debug(f"Computed analysis output '{name}'")
+        return self._values[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(f"No analysis output named '{name}'") from None
+
+    def computed(self):
+        """Names of the analysis outputs computed so far (inputs excluded)."""
+        return set(self._values) - self._inputs
+
+    def restricted(self, names):
+        """A view exposing the inputs and only the named analysis outputs."""
+        return _RestrictedAnalysis(self, names)
+
+class _RestrictedAnalysis:
+    """What a handler sees: its declared outputs, so undeclared work cannot creep in."""
+
+    def __init__(self, analysis, names):
+        self._analysis = analysis
+        self._names = frozenset(names)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name not in self._names and name not in self._analysis._inputs:
+            raise AttributeError(f"Handler did not declare analysis output '{name}'")
+        return getattr(self._analysis, name)
+
+class IntentHandler:
+    def __init__(self, intent, func, needs):
+        self.intent = intent
+        self.func = func
+        self.needs = tuple(needs)
+
+class HandlerRegistry:
+    """
+    Maps intents to handlers, each declaring the analysis outputs it reads.
+
+    Handlers receive a view of the message analysis limited to their declared
+    outputs, which are computed lazily when first read. Adding a handler that
+    needs an expensive output (entities, say) therefore adds nothing to the
+    cost of routing other intents.
+    """
+
+    def __init__(self, analyzers, default_intent="general"):
+        """
+        Args:
+            analyzers (dict): Output name -> function(analysis) computing it
+            default_intent (str): Intent whose handler answers unregistered intents
+        """
+        self.analyzers = analyzers
+        self.default_intent = default_intent
+        self._handlers = {}
+
+    def register(self, intent, needs=()):
+        """
+        Decorator registering func(analysis) as the handler for an intent.
+
+        Args:
+            intent (str): Intent name
+            needs (iterable): Analysis outputs the handler reads
+
+        Raises:
+            ValueError: If a need has no analyzer
+        """
+        unknown = [need for need in needs if need not in self.analyzers]
+        if unknown:
+            raise ValueError(f"Handler for '{intent}' needs unknown analysis output(s): {unknown}")
+
+        def decorator(func):
+            self._handlers[intent] = IntentHandler(intent, func, needs)
+            return func
+        return decorator
+
+    def handler_for(self, intent):
+        """Return the IntentHandler for an intent, falling back to the default intent's."""
+        handler = self._handlers.get(intent) or self._handlers.get(self.default_intent)
+        if handler is None:
+            raise LookupError(f"No handler registered for '{intent}' or '{self.default_intent}'")
+        return handler
+
+    def analyze(self, **inputs):
+        """Start a lazy MessageAnalysis with this registry's analyzers."""
+        return MessageAnalysis(self.analyzers, **inputs)
+
+    def dispatch(self, intent, analysis):
+        """
+        Run the handler for an intent.
+
+        Args:
+            intent (str): Detected intent
+            analysis (MessageAnalysis): Analysis of the message
+
+        Returns:
+            The handler's response
+        """
+        handler = self.handler_for(intent)
+        logger.debug(f"Routing '{intent}' to {handler.func.__name__} (needs: {handler.needs})")
+        return handler.func(analysis.restricted(handler.needs))
+
+    def __contains__(self, intent):
+        return intent in self._handlers
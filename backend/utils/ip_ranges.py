@@ -0,0 +1,179 @@
+import csv
+import ipaddress
+import mmap
+import os
+import socket
+import struct
+import tempfile
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# File layout (big-endian so byte order matches numeric order):
+#   header    - magic, version, range count, record count
+#   ranges    - (first address, last address, record index), sorted by first address;
+#               addresses are 16 bytes, with IPv4 stored as IPv4-mapped IPv6 (::ffff:a.b.c.d)
+#   offsets   - (offset, length) of each record in the record table
+#   records   - UTF-8 "city\x1fregion\x1fcountry\x1floc" strings, shared by ranges
+MAGIC = b"IPRT"
+VERSION = 1
+HEADER = struct.Struct(">4sIII")
+RANGE = struct.Struct(">16s16sI")
+OFFSET = struct.Struct(">II")
+FIELDS = ("city", "region", "country", "loc")
+SEPARATOR = "\x1f"
+
+_IPV4_MAPPED_PREFIX = b"\0" * 10 + b"\xff\xff"
+
+def _address_bytes(address):
+    """16-byte big-endian form of an address, mapping IPv4 into ::ffff:0:0/96."""
+    if not isinstance(address, str):
+        address = str(address)
+    # inet_pton is much cheaper than ipaddress parsing on the lookup path
+    try:
+        return _IPV4_MAPPED_PREFIX + socket.inet_pton(socket.AF_INET, address)
+    except OSError:
+        pass
+    try:
+        return socket.inet_pton(socket.AF_INET6, address.split("%", 1)[0])
+    except OSError:
+        raise ValueError(f"{address!r} is not a valid IP address") from None
+
+def _parse_row(row):
+    """Return (first, last, record) for one CSV row."""
+    if row.get("network"):
+        network = ipaddress.ip_network(row["network"].strip(), strict=False)
+        first, last = network.network_address, network.broadcast_address
+    else:
+        first = ipaddress.ip_address(row["start_ip"].strip())
+        last = ipaddress.ip_address(row["end_ip"].strip())
+    loc = row.get("loc") or ""
+    if not loc and row.get("latitude") and row.get("longitude"):
+        loc = f"{row['latitude'].strip()},{row['longitude'].strip()}"
+    record = SEPARATOR.join((row.get(field) or "").strip() for field in ("city", "region", "country")) + SEPARATOR + loc.strip()
+    return _address_bytes(first), _address_bytes(last), record
+
+def build_ip_table(csv_path, path):
+    """
+    Compile a geolocation CSV into a memory-mappable range table.
+
+    The CSV needs a header row with either a `network` column (CIDR) or
+    `start_ip` and `end_ip` columns, plus `city`, `region`, `country` and
+    either `loc` ("lat,lon") or `latitude` and `longitude`. IPv4 and IPv6 rows
+    can be mixed. Ranges must not overlap; rows that fail to parse are skipped.
+
+    Args:
+        csv_path (str): Source CSV file
+        path (str): Destination table file
+
+    Returns:
+        int: Number of ranges written
+    """
+    ranges = []
+    records = {}
+    skipped = 0
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                first, last, record = _parse_row(row)
+            except (ValueError, KeyError, AttributeError):
+                skipped += 1
+                continue
+            if last < first:
+                skipped += 1
+                continue
+            ranges.append((first, last, records.setdefault(record, len(records))))
+    ranges.sort()
+    if skipped:
+        logger.warning(f"Skipped {skipped} unparseable row(s) in {csv_path}")
+
+    encoded = [record.encode("utf-8") for record in records]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(ranges), len(encoded)))
+            for first, last, index in ranges:
+                f.write(RANGE.pack(first, last, index))
+            offset = 0
+            for data in encoded:
+                f.write(OFFSET.pack(offset, len(data)))
+                offset += len(data)
+            for data in encoded:
+                f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logger.info(f"Wrote IP range table with {len(ranges)} ranges to {path}")
+    return len(ranges)
+
+class IPRangeTable:
+    """
+    Read-only, memory-mapped table of IP ranges with their locations.
+
+    Opening only maps the file. A lookup binary-searches the sorted range array
+    directly in the mapped pages (about 20 probes for a million ranges), so no
+    per-process parsing or index building is needed.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Table file written by build_ip_table
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < HEADER.size:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} IP range table")
+        magic, version, self._count, self._records = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} IP range table")
+        self._ranges_off = HEADER.size
+        self._offsets_off = self._ranges_off + self._count * RANGE.size
+        self._data_off = self._offsets_off + self._records * OFFSET.size
+
+    def lookup(self, ip_address):
+        """
+        Find the location for an address.
+
+        Args:
+            ip_address (str): IPv4 or IPv6 address
+
+        Returns:
+            dict or None: city, region, country and loc, or None if no range covers it
+
+        Raises:
+            ValueError: If ip_address is not a valid address
+        """
+        key = _address_bytes(ip_address)
+        mm, base, size = self._mm, self._ranges_off, RANGE.size
+        # Last range whose first address is <= key
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            start = base + mid * size
+            if mm[start:start + 16] <= key:
+                low = mid + 1
+            else:
+                high = mid
+        if low == 0:
+            return None
+        _, last, index = RANGE.unpack_from(mm, base + (low - 1) * size)
+        if key > last:
+            return None
+        offset, length = OFFSET.unpack_from(mm, self._offsets_off + index * OFFSET.size)
+        start = self._data_off + offset
+        values = mm[start:start + length].decode("utf-8").split(SEPARATOR)
+        return {field: value or None for field, value in zip(FIELDS, values)}
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._mm.close()
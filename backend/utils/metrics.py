@@ -0,0 +1,68 @@
+import threading
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics registry.
+
+    Counters are incremented by the code that observes an event; gauges are
+    either set directly or registered as callables that are read at snapshot
+    time, so values like remaining quota are always current.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+
+    def increment(self, name, amount=1):
+        """Add `amount` to the counter `name`."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        """Set gauge `name` to a fixed value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_gauge(self, name, func):
+        """Register a callable evaluated whenever gauge `name` is read."""
+        with self._lock:
+            self._gauges[name] = func
+
+    def counter(self, name):
+        """Return the current value of counter `name` (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self):
+        """
+        Return the current value of every counter and gauge.
+
+        Returns:
+            dict: {"counters": {...}, "gauges": {...}}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        values = {}
+        for name, gauge in gauges.items():
+            try:
+                values[name] = gauge() if callable(gauge) else gauge
+            except Exception as e:
+                logger.warning(f"Failed to read gauge {name}: {str(e)}")
+                values[name] = None
+        return {"counters": counters, "gauges": values}
+
+    def reset(self):
+        """Drop all counters and fixed-value gauges (registered callables are kept)."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges = {name: g for name, g in self._gauges.items() if callable(g)}
+
+# Shared registry for the application
+metrics = MetricsRegistry()
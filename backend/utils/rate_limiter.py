@@ -0,0 +1,164 @@
+import threading
+import time
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Request priorities: user-facing cache misses may spend the whole budget,
+# background refreshes only what is left above the reserve
+USER = "user"
+BACKGROUND = "background"
+
+class QuotaExceededError(Exception):
+    """Raised when an upstream call would exceed its quota budget"""
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def available(self, now=None):
+        """Return the number of tokens currently available."""
+        self._refill(now if now is not None else time.monotonic())
+        return self.tokens
+
+    def take(self, amount=1):
+        self.tokens -= amount
+
+    def drain(self):
+        """Empty the bucket (e.g. after the upstream reports a rate limit)."""
+        self.tokens = 0.0
+
+class UpstreamBudget:
+    """
+    Per-minute and per-day token buckets for one upstream API.
+
+    User-facing requests may use every remaining token. Background refreshes
+    are refused once the remaining fraction of either bucket drops to the
+    reserve, so cache warming never starves real users. When the remaining
+    fraction falls to the low-water mark, callers should prefer stale cached
+    data over spending another call.
+    """
+
+    def __init__(self, name, per_minute, per_day, background_reserve=0.25, low_water=0.1):
+        """
+        Args:
+            name (str): Upstream name used in logs and metrics
+            per_minute (int): Calls allowed per minute
+            per_day (int): Calls allowed per day
+            background_reserve (float): Fraction of budget kept back from background refreshes
+            low_water (float): Fraction at or below which the budget counts as nearly exhausted
+        """
+        self.name = name
+        self.background_reserve = background_reserve
+        self.low_water = low_water
+        self._lock = threading.Lock()
+        self._minute = TokenBucket(per_minute, per_minute / 60.0)
+        self._day = TokenBucket(per_day, per_day / 86400.0)
+        self._blocked_until = 0.0
+
+        metrics.register_gauge(f"upstream.{name}.remaining_minute", lambda: round(self.remaining()["minute"], 2))
+        metrics.register_gauge(f"upstream.{name}.remaining_day", lambda: round(self.remaining()["day"], 2))
+
+    def remaining(self):
+        """Return the tokens left in the minute and day buckets."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return {"minute": 0.0, "day": self._day.available(now)}
+            return {"minute": self._minute.available(now), "day": self._day.available(now)}
+
+    def remaining_fraction(self):
+        """Return the smaller of the two buckets' remaining fractions."""
+        remaining = self.remaining()
+        return min(remaining["minute"] / self._minute.capacity, remaining["day"] / self._day.capacity)
+
+    def near_exhaustion(self):
+        """True when callers should serve stale data instead of calling upstream."""
+        return self.remaining_fraction() <= self.low_water
+
+    def try_acquire(self, priority=USER):
+        """
+        Take one token from both buckets if the priority allows it.
+
+        Args:
+            priority (str): USER or BACKGROUND
+
+        Returns:
+            bool: True if the call may proceed
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                granted = False
+            else:
+                # Background calls must leave the reserve untouched after spending their token
+                reserve = self.background_reserve if priority == BACKGROUND else 0.0
+                granted = (
+                    self._minute.available(now) - 1 >= reserve * self._minute.capacity
+                    and self._day.available(now) - 1 >= reserve * self._day.capacity
+                )
+                if granted:
+                    self._minute.take()
+                    self._day.take()
+
+        if granted:
+            metrics.increment(f"upstream.{self.name}.calls.{priority}")
+        else:
+            metrics.increment(f"upstream.{self.name}.rejected.{priority}")
+            logger.warning(f"{self.name} budget refused a {priority} call")
+        return granted
+
+    def acquire(self, priority=USER):
+        """Like try_acquire, but raise QuotaExceededError when refused."""
+        if not self.try_acquire(priority):
+            raise QuotaExceededError(f"{self.name} quota exhausted")
+
+    def exhaust(self, retry_after=60):
+        """
+        Record that the upstream rejected us for rate limiting.
+
+        Args:
+            retry_after (float): Seconds before calls should resume
+        """
+        with self._lock:
+            self._minute.drain()
+            self._blocked_until = time.monotonic() + retry_after
+        metrics.increment(f"upstream.{self.name}.rate_limited")
+        logger.warning(f"{self.name} reported a rate limit, pausing calls for {retry_after}s")
+
+    def reset(self):
+        """Refill both buckets and clear any rate-limit block."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self._minute, self._day):
+                bucket.tokens = bucket.capacity
+                bucket.updated_at = now
+            self._blocked_until = 0.0
+
+def parse_retry_after(headers, default=60):
+    """
+    Read a Retry-After header given in seconds.
+
+    Args:
+        headers (Mapping): Response headers
+        default (float): Value used when the header is missing or not numeric
+
+    Returns:
+        float: Seconds to wait
+    """
+    try:
+        return float(headers.get("Retry-After", default))
+    except (TypeError, ValueError, AttributeError):
+        return default
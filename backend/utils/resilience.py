@@ -0,0 +1,214 @@
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, TimeoutError as FutureTimeoutError
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately with CircuitOpenError. Once `reset_timeout` has passed a
+    single trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+
+    # Numeric encoding of the state for the metrics gauge
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, is_failure=None):
+        """
+        Args:
+            name (str): Upstream name used in logs and metrics
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a trial call
+            is_failure (callable, optional): Decides whether an exception counts as
+                an upstream failure (defaults to every exception)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure or (lambda exc: True)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.trips = 0
+
+        metrics.register_gauge(f"upstream.{name}.breaker_state", lambda: self.STATE_VALUES[self.state])
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def _before_call(self):
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    metrics.increment(f"upstream.{self.name}.breaker_rejected")
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    metrics.increment(f"upstream.{self.name}.breaker_rejected")
+                    raise CircuitOpenError(f"{self.name} circuit is half-open, trial call in flight")
+                self._trial_in_flight = True
+
+    def _on_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"{self.name} circuit closed after successful trial call")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def _on_failure(self):
+        with self._lock:
+            self._trial_in_flight = False
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                    metrics.increment(f"upstream.{self.name}.breaker_trips")
+                    logger.warning(f"{self.name} circuit opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func through the breaker.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self._on_failure()
+            else:
+                # Not the upstream's fault (e.g. 404): counts as a healthy response
+                self._on_success()
+            raise
+        self._on_success()
+        return result
+
+    def reset(self):
+        """Close the circuit and clear failure counts."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = 0.0
+            self._trial_in_flight = False
+
+def retry_with_backoff(func, attempts=2, base_delay=0.2, max_delay=2.0, retry_if=None, name="upstream"):
+    """
+    Call func, retrying transient failures with full-jitter exponential backoff.
+
+    Args:
+        func (callable): Zero-argument function to call
+        attempts (int): Maximum number of attempts (1 disables retries)
+        base_delay (float): Backoff base in seconds
+        max_delay (float): Upper bound for a single backoff in seconds
+        retry_if (callable, optional): Decides whether an exception is worth retrying
+        name (str): Upstream name used in logs and metrics
+
+    Returns:
+        The result of the first successful attempt
+    """
+    retry_if = retry_if or (lambda exc: True)
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= attempts or not retry_if(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            metrics.increment(f"upstream.{name}.retries")
+            logger.warning(f"{name} attempt {attempt} failed ({str(e)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+def is_transient_error(exc):
+    """
+    True for failures worth retrying: connection errors, timeouts and 5xx responses.
+
+    Args:
+        exc (Exception): The raised exception
+
+    Returns:
+        bool
+    """
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return False
+
+def is_upstream_failure(exc):
+    """
+    True for failures that say the upstream is unhealthy (anything but a 4xx answer).
+
+    Args:
+        exc (Exception): The raised exception
+
+    Returns:
+        bool
+    """
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return isinstance(exc, requests.exceptions.RequestException)
+
+# Threads used to run primary and hedged attempts side by side
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hedge")
+
+def hedged_call(func, hedge_after, name="upstream"):
+    """
+    Call func; if it has not finished after `hedge_after` seconds, start a second
+    identical call and return whichever succeeds first. Only use for idempotent reads.
+
+    Args:
+        func (callable): Zero-argument function to call
+        hedge_after (float): Seconds to wait before hedging (0 or None disables hedging)
+        name (str): Upstream name used in logs and metrics
+
+    Returns:
+        The first successful result
+    """
+    if not hedge_after:
+        return func()
+
+    primary = _hedge_executor.submit(func)
+    try:
+        return primary.result(timeout=hedge_after)
+    except FutureTimeoutError:
+        pass
+
+    metrics.increment(f"upstream.{name}.hedged")
+    logger.info(f"{name} call slower than {hedge_after}s, sending hedged request")
+    pending = {primary, _hedge_executor.submit(func)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
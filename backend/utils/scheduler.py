@@ -0,0 +1,101 @@
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.admission import OverloadedError
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Weight of the newest request in a lane's latency average
+LATENCY_SMOOTHING = 0.2
+
+class Lane:
+    """
+    A class of requests with its own worker threads and queue limit.
+
+    Requests in one lane never wait for threads held by another, so a burst
+    of slow requests fills only its own lane.
+    """
+
+    def __init__(self, name, workers, max_queue):
+        """
+        Args:
+            name (str): Lane name used in logs and metrics
+            workers (int): Requests the lane runs at once
+            max_queue (int): Requests waiting for a worker before new ones are refused
+        """
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.latency = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"lane-{name}")
+
+        metrics.register_gauge(f"scheduler.{name}.pending", lambda: self.pending)
+        metrics.register_gauge(
+            f"scheduler.{name}.latency_avg", lambda: round(self.latency, 3) if self.latency else None
+        )
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Run func in the lane.
+
+        Returns:
+            Future: The call's result
+
+        Raises:
+            OverloadedError: If the lane's queue is full
+        """
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                backlog = (self.pending - self.workers + 1) / self.workers
+                retry_after = max(1, math.ceil(backlog * (self.latency or 1.0)))
+                metrics.increment(f"scheduler.{self.name}.rejected")
+                raise OverloadedError(f"{self.name} lane is full", retry_after)
+            self.pending += 1
+        metrics.increment(f"scheduler.{self.name}.requests")
+        submitted = time.perf_counter()
+        future = self._executor.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda _: self._finished(time.perf_counter() - submitted))
+        return future
+
+    def _finished(self, seconds):
+        with self._lock:
+            self.pending -= 1
+            self.latency = seconds if self.latency is None else (
+                LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * self.latency
+            )
+
+class PriorityScheduler:
+    """Runs blocking request handlers in the lane matching their expected cost."""
+
+    def __init__(self, lanes, default):
+        """
+        Args:
+            lanes (list): Lane objects
+            default (str): Lane used for unknown lane names
+        """
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.default = default
+
+    async def run(self, lane, func, *args, **kwargs):
+        """
+        Run a blocking function in a lane without blocking the event loop.
+
+        Args:
+            lane (str): Lane name
+            func (callable): Function to run
+
+        Returns:
+            The function's result
+
+        Raises:
+            OverloadedError: If the lane's queue is full
+        """
+        chosen = self.lanes.get(lane) or self.lanes[self.default]
+        return await asyncio.wrap_future(chosen.submit(func, *args, **kwargs))
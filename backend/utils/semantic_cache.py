@@ -0,0 +1,234 @@
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Upper edges of the similarity buckets reported per lookup
+SIMILARITY_BUCKETS = (0.5, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+# Words that carry no meaning a cached answer depends on; every other word must match for a hit
+STOPWORDS = frozenset("""
+a about above after again all am an and any are as at be been being below between both but by can
+could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it it's its just me more most my no nor not now of off on once only or
+other our ours out over own please same she should so some such tell than that that's the their them
+then there these they this those through to too under until up very was we were what what's whats
+when where which while who whom why will with would you your yours
+""".split())
+
+# Spelled-out numbers, compared like digits: "for four people" and "for eight people" differ
+NUMBER_WORDS = frozenset("""
+zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen sixteen
+seventeen eighteen nineteen twenty thirty forty fifty sixty seventy eighty ninety hundred thousand
+million billion half double twice first second third
+""".split())
+
+def prompt_signature(text):
+    """
+    The parts of a normalized prompt a cache hit must match exactly.
+
+    Hashed features are lexical, so two long prompts differing in one
+    meaning-changing word ("bacterial" / "viral") or in their numbers
+    ("for four" / "for eight", "Python 2 and 3" / "Python 3 and 2") still
+    score high; requiring the same numbers in the same order and the same
+    content words rules those out.
+
+    Args:
+        text (str): Normalized text
+
+    Returns:
+        tuple: (numbers in order, frozenset of content words)
+    """
+    words = text.split()
+    numbers = tuple(word for word in words if word.isdigit() or word in NUMBER_WORDS)
+    content = frozenset(word for word in words if word not in STOPWORDS and word not in numbers)
+    return numbers, content
+
+def normalize_prompt(text):
+    """Lowercase, drop punctuation and collapse whitespace, so trivial variants share a key."""
+    return " ".join(re.findall(r"[a-z0-9']+", text.lower()))
+
+def hashing_embedding(text, dim=512):
+    """
+    Embed text as a unit vector of hashed word, word-pair and character-trigram counts.
+
+    Runs on the CPU in microseconds without a model: near-duplicate prompts
+    (reordered words, typos, extra filler) land close together, unrelated
+    ones near zero.
+
+    Args:
+        text (str): Normalized text
+        dim (int): Vector size
+
+    Returns:
+        numpy.ndarray: float32 vector of length dim (all zeros for empty text)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    words = text.split()
+    features = [(f"w:{word}", 1.0) for word in words]
+    features += [(f"b:{a} {b}", 1.0) for a, b in zip(words, words[1:])]
+    padded = f" {text} "
+    features += [(f"c:{padded[i:i + 3]}", 0.5) for i in range(len(padded) - 2)]
+    for feature, weight in features:
+        vector[zlib.crc32(feature.encode("utf-8")) % dim] += weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticCache:
+    """
+    Cache of answers looked up by meaning rather than exact text.
+
+    Prompts are normalized and embedded; a lookup returns the stored answer
+    whose prompt embedding is most similar (cosine) to the new one, if that
+    similarity reaches `threshold` and both prompts have the same
+    prompt_signature (numbers and content words). Embeddings live in one preallocated
+    matrix searched with a single matrix-vector product, which is fast enough
+    for the few thousand entries a chat cache holds.
+
+    Entries expire after `ttl` seconds; when full, an expired slot is reused
+    first, otherwise the least recently used one.
+    """
+
+    def __init__(self, name, threshold=0.9, ttl=86400, maxsize=2048, embed=hashing_embedding, dim=512):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+            threshold (float): Minimum cosine similarity for a hit
+            ttl (float): Lifetime of an entry in seconds
+            maxsize (int): Maximum number of entries
+            embed (callable): Function(text, dim) returning a unit vector
+            dim (int): Embedding size
+        """
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.embed = embed
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._prompts = [None] * maxsize
+        self._signatures = [None] * maxsize
+        self._answers = [None] * maxsize
+        self._expires = np.zeros(maxsize)
+        self._used = np.zeros(maxsize)
+        self._slots = {}
+        self.hits = 0
+        self.misses = 0
+        metrics.register_gauge(f"semantic_cache.{name}.hit_rate", self.hit_rate)
+        metrics.register_gauge(f"semantic_cache.{name}.size", self.__len__)
+
+    def lookup(self, prompt):
+        """
+        Return the cached answer for the most similar stored prompt.
+
+        Args:
+            prompt (str): The user's prompt
+
+        Returns:
+            tuple or None: (answer, similarity) on a hit, None on a miss
+        """
+        text = normalize_prompt(prompt)
+        if not text:
+            return None
+        vector = self.embed(text, self.dim)
+        now = time.time()
+        with self._lock:
+            similarity, slot = self._best_match(vector, prompt_signature(text), now)
+            self._record_similarity(similarity)
+            if slot is None or similarity < self.threshold:
+                self.misses += 1
+                metrics.increment(f"semantic_cache.{self.name}.misses")
+                return None
+            self._used[slot] = now
+            self.hits += 1
+            answer = self._answers[slot]
+        metrics.increment(f"semantic_cache.{self.name}.hits")
+        logger.debug(f"[{self.name}] Hit for '{text}' (similarity {similarity:.3f})")
+        return answer, similarity
+
+    def contains(self, prompt):
+        """True if lookup would hit, without counting the lookup or refreshing the entry."""
+        text = normalize_prompt(prompt)
+        if not text:
+            return False
+        vector = self.embed(text, self.dim)
+        with self._lock:
+            similarity, slot = self._best_match(vector, prompt_signature(text), time.time())
+        return slot is not None and similarity >= self.threshold
+
+    def _best_match(self, vector, signature, now):
+        # Caller holds the lock: the most similar live entry with the same signature,
+        # or the highest similarity seen (for the metrics) and no slot
+        live = self._expires > now
+        if not live.any():
+            return 0.0, None
+        scores = np.where(live, self._vectors @ vector, -1.0)
+        candidates = np.flatnonzero(scores >= self.threshold)
+        for slot in candidates[np.argsort(-scores[candidates])]:
+            if self._signatures[slot] == signature:
+                return float(scores[slot]), int(slot)
+        return float(scores.max()), None
+
+    def store(self, prompt, answer):
+        """Store the answer for a prompt, replacing an entry with the same normalized prompt."""
+        text = normalize_prompt(prompt)
+        if not text:
+            return
+        vector = self.embed(text, self.dim)
+        now = time.time()
+        with self._lock:
+            slot = self._slots.get(text)
+            if slot is None:
+                slot = self._free_slot(now)
+                if self._prompts[slot] is not None:
+                    logger.debug(f"[{self.name}] Evicted '{self._prompts[slot]}'")
+                    del self._slots[self._prompts[slot]]
+                self._slots[text] = slot
+            self._vectors[slot] = vector
+            self._prompts[slot] = text
+            self._signatures[slot] = prompt_signature(text)
+            self._answers[slot] = answer
+            self._expires[slot] = now + self.ttl
+            self._used[slot] = now
+
+    def _free_slot(self, now):
+        # Caller holds the lock: an empty or expired slot, else the least recently used one
+        expired = np.flatnonzero(self._expires <= now)
+        if len(expired):
+            return int(expired[0])
+        return int(np.argmin(self._used))
+
+    def _record_similarity(self, similarity):
+        for edge in SIMILARITY_BUCKETS:
+            if similarity <= edge:
+                metrics.increment(f"semantic_cache.{self.name}.similarity.le_{edge}")
+                return
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._expires[:] = 0
+            self._used[:] = 0
+            self._prompts = [None] * self.maxsize
+            self._signatures = [None] * self.maxsize
+            self._answers = [None] * self.maxsize
+            self._slots.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        with self._lock:
+            return int((self._expires > time.time()).sum())
+
+    def stats(self):
+        return {"size": len(self), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate()}
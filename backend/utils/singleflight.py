@@ -0,0 +1,115 @@
+import functools
+import threading
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class _Call:
+    """An in-flight call whose result is shared by every waiter"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into a single execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is still running block until it finishes and receive the
+    same result (or the same exception). Nothing is remembered once the call
+    completes, so this is safe to put in front of a cache loader: when an entry
+    expires only one request goes upstream to refill it.
+    """
+
+    def __init__(self, name="singleflight"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) unless an identical call is already in flight.
+
+        Args:
+            key: Hashable key identifying identical calls
+            func: Callable to execute
+            *args, **kwargs: Arguments passed to func
+
+        Returns:
+            The result of the (possibly shared) call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            logger.debug(f"[{self.name}] Joining in-flight call for key {key!r}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+            if call.waiters:
+                logger.info(f"[{self.name}] Shared one upstream call for key {key!r} with {call.waiters} waiter(s)")
+
+    def in_flight(self):
+        """Return the number of keys currently being executed."""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """Return counters describing how much work was coalesced."""
+        return {
+            "executed": self.executed,
+            "shared": self.shared,
+            "in_flight": self.in_flight(),
+        }
+
+def coalesce(name=None, key=None):
+    """
+    Decorator that routes calls through a dedicated SingleFlight group.
+
+    Args:
+        name (str, optional): Name used in logs and stats (defaults to the function name)
+        key (callable, optional): Builds the coalescing key from the call arguments.
+            Defaults to the positional and keyword arguments as given.
+
+    Returns:
+        callable: Decorator; the wrapped function exposes its group as `.flight`
+    """
+    def decorator(func):
+        flight = SingleFlight(name or func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return flight.do(call_key, func, *args, **kwargs)
+
+        wrapper.flight = flight
+        return wrapper
+
+    return decorator
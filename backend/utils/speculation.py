@@ -0,0 +1,76 @@
+import threading
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class SpeculationCancelled(Exception):
+    """Raised by Speculation.result when the work was cancelled before finishing"""
+
+class Speculation:
+    """
+    Streamed work started before it is known to be needed.
+
+    The stream is consumed on an executor thread; cancelling stops it at the
+    next chunk and closes the stream, so a streamed LLM answer stops being
+    generated (and billed) as soon as it is no longer wanted. Work that has
+    not started yet is never started.
+    """
+
+    def __init__(self, name, stream, executor):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+            stream (callable): Function returning an iterator of chunks (strings or objects with .content)
+            executor (Executor): Where the stream is consumed
+        """
+        self.name = name
+        self._cancelled = threading.Event()
+        self.chunks = 0
+        metrics.increment(f"speculation.{name}.started")
+        self._future = executor.submit(self._run, stream)
+
+    def _run(self, stream):
+        if self._cancelled.is_set():
+            raise SpeculationCancelled(self.name)
+        iterator = stream()
+        parts = []
+        try:
+            for chunk in iterator:
+                if self._cancelled.is_set():
+                    logger.debug(f"Speculative {self.name} stopped after {self.chunks} chunk(s)")
+                    raise SpeculationCancelled(self.name)
+                parts.append(getattr(chunk, "content", chunk))
+                self.chunks += 1
+        finally:
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+        return "".join(parts)
+
+    def cancel(self):
+        """Stop the work; its result is discarded."""
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        self._future.cancel()
+        metrics.increment(f"speculation.{self.name}.cancelled")
+
+    def add_done_callback(self, fn):
+        """Call fn(future) once the work has finished, failed or been cancelled."""
+        self._future.add_done_callback(fn)
+
+    def result(self, timeout=None):
+        """
+        Wait for and return the streamed text.
+
+        Raises:
+            SpeculationCancelled: If the work was cancelled
+            Exception: Whatever the stream raised
+        """
+        if self._cancelled.is_set():
+            raise SpeculationCancelled(self.name)
+        text = self._future.result(timeout)
+        metrics.increment(f"speculation.{self.name}.used")
+        return text
@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from utils.logging_config import get_logger
+from utils.metrics import metrics
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class TaskTimeout(Exception):
+    """Raised for a task that did not finish within its timeout"""
+
+class _Task:
+    def __init__(self, name, func, timeout):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+
+class TaskGraph:
+    """
+    A set of independent callables run concurrently on a thread pool.
+
+    Each task's timeout counts from when it is submitted, so it covers any
+    wait for a free worker as well as the run itself and bounds how long the
+    caller waits for it. A task that outlives its timeout is dropped and its
+    result recorded as TaskTimeout, so one slow task never delays the others.
+    A dropped task that has not started is cancelled; threads cannot be
+    interrupted, so one already running keeps going in the background until
+    it returns and its result is discarded.
+    """
+
+    def __init__(self, name="tasks"):
+        """
+        Args:
+            name (str): Name used in logs and metrics
+        """
+        self.name = name
+        self._tasks = {}
+
+    def add(self, name, func, timeout=None):
+        """
+        Add a task.
+
+        Args:
+            name (str): Unique task name, used as its key in the results
+            func (callable): Called with no arguments
+            timeout (float, optional): Seconds from submission before the task is dropped
+
+        Returns:
+            TaskGraph: self, so calls can be chained
+        """
+        if name in self._tasks:
+            raise ValueError(f"Task {name!r} already added")
+        self._tasks[name] = _Task(name, func, timeout)
+        return self
+
+    def run(self, executor):
+        """
+        Run every task and wait until each has finished, failed or timed out.
+
+        Args:
+            executor (Executor): Pool the tasks are submitted to
+
+        Returns:
+            dict: Task name -> result, or the exception the task failed with
+                  (TaskTimeout included)
+        """
+        results = {}
+        running = {}
+        submitted = time.monotonic()
+        for task in self._tasks.values():
+            deadline = submitted + task.timeout if task.timeout is not None else None
+            running[executor.submit(task.func)] = (task, deadline)
+
+        while running:
+            deadlines = [deadline for _, deadline in running.values() if deadline is not None]
+            timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                task, _ = running.pop(future)
+                error = future.exception()
+                results[task.name] = error if error is not None else future.result()
+                if error is not None:
+                    logger.warning(f"{self.name} task {task.name} failed: {error}")
+
+            now = time.monotonic()
+            for future, (task, deadline) in list(running.items()):
+                if deadline is not None and now >= deadline:
+                    del running[future]
+                    future.cancel()
+                    results[task.name] = TaskTimeout(f"{task.name} did not finish within {task.timeout}s")
+                    metrics.increment(f"tasks.{self.name}.timeouts")
+                    logger.warning(f"{self.name} task {task.name} timed out after {task.timeout}s, dropping it")
+        return results
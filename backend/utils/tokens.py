@@ -0,0 +1,60 @@
+import math
+import threading
+from utils.logging_config import get_logger
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+# Rough size of a token in English text, used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+def _get_encoding(model):
+    """Return the tiktoken encoding for a model, or None if tiktoken or its data is unavailable."""
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                # tiktoken downloads its tables on first use; offline hosts fall back to estimates
+                logger.warning(f"No tokenizer for {model}, estimating token counts: {str(e)}")
+                _encodings[model] = None
+        return _encodings[model]
+
+def count_tokens(text, model="gpt-4"):
+    """
+    Count the tokens text takes up for a model.
+
+    Args:
+        text (str): Text to measure
+        model (str): Model whose tokenizer is used
+
+    Returns:
+        int: Exact count with tiktoken, otherwise an estimate from the length
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+def truncate_tokens(text, max_tokens, model="gpt-4"):
+    """
+    Cut text down to at most max_tokens tokens, marking the cut with "...".
+
+    Args:
+        text (str): Text to shorten
+        max_tokens (int): Token budget
+        model (str): Model whose tokenizer is used
+
+    Returns:
+        str: The text, shortened if it was over budget
+    """
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max(max_tokens - 1, 0) * CHARS_PER_TOKEN].rstrip() + "..."
+    return encoding.decode(encoding.encode(text)[:max(max_tokens - 1, 0)]).rstrip() + "..."
@@ -0,0 +1,241 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from utils.logging_config import get_logger
+from utils.singleflight import SingleFlight
+
+# Get logger for this module
+logger = get_logger(__name__)
+
+class CacheEntry:
+    """A cached value together with its freshness metadata"""
+
+    __slots__ = ("value", "stored_at", "expires_at")
+
+    def __init__(self, value, stored_at, expires_at):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def is_fresh(self, now=None):
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def age(self, now=None):
+        return (now if now is not None else time.time()) - self.stored_at
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiry and LRU eviction.
+
+    Misses are filled through a SingleFlight group, so when a popular entry
+    expires only one caller goes upstream while the others wait for its result.
+    Reads also feed an exponentially-decaying popularity score per key, which
+    the background cache warmer uses to decide what to keep hot.
+
+    Expired entries are kept (until evicted or older than `max_stale`) so they
+    can be served when the upstream is unavailable or its quota is running out.
+
+    When full, the cache evicts by one of the EVICTION_POLICIES: the least
+    recently used entry ("lru"), the least popular one by decayed request
+    count ("lfu"), or the one closest to expiry ("ttl").
+    """
+
+    EVICTION_POLICIES = ("lru", "lfu", "ttl")
+
+    def __init__(self, name, ttl, maxsize=1024, cacheable=None, popularity_half_life=600,
+                 max_stale=0, stale_on=(), eviction="lru"):
+        """
+        Args:
+            name (str): Name used in logs and stats
+            ttl (float): Default lifetime of an entry in seconds
+            maxsize (int): Maximum number of entries before evicting the least recently used
+            cacheable (callable, optional): Predicate deciding whether a loaded value is stored
+            popularity_half_life (float): Seconds for a key's popularity score to halve
+            max_stale (float): How long past expiry an entry may still be served as stale
+            stale_on (tuple): Exception types from the loader that fall back to a stale entry
+            eviction (str): Which entry to drop when full - "lru", "lfu" or "ttl"
+        """
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy '{eviction}', expected one of {self.EVICTION_POLICIES}")
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.cacheable = cacheable or (lambda value: True)
+        self.max_stale = max_stale
+        self.stale_on = tuple(stale_on)
+        self.eviction = eviction
+        self._decay = math.log(2) / popularity_half_life
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._popularity = {}
+        self._flight = SingleFlight(f"cache.{name}")
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key):
+        """
+        Return the fresh value for key, or None on a miss.
+
+        Args:
+            key: Hashable cache key
+
+        Returns:
+            The cached value or None
+        """
+        now = time.time()
+        with self._lock:
+            self._touch(key, now)
+            entry = self._entries.get(key)
+            if entry is not None and entry.is_fresh(now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return None
+
+    def get_entry(self, key):
+        """Return the CacheEntry for key (fresh or expired) without counting a read."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (defaults to the cache TTL)."""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = CacheEntry(value, now, now + (ttl if ttl is not None else self.ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted = self._victim(key, now)
+                del self._entries[evicted]
+                logger.debug(f"[{self.name}] Evicted {evicted!r}")
+
+    def _victim(self, keep, now):
+        # Caller holds the lock; never evicts the entry just stored
+        candidates = (k for k in self._entries if k != keep)
+        if self.eviction == "lfu":
+            return min(candidates, key=lambda k: self._score(self._popularity.get(k, (0.0, now)), now))
+        if self.eviction == "ttl":
+            return min(candidates, key=lambda k: self._entries[k].expires_at)
+        return next(candidates)
+
+    def get_stale(self, key):
+        """
+        Return the value for key if it is expired but within `max_stale`, else None.
+
+        Args:
+            key: Hashable cache key
+
+        Returns:
+            The stale value or None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry.expires_at + self.max_stale:
+                return None
+            self.stale_hits += 1
+            return entry.value
+
+    def get_or_load(self, key, loader, ttl=None, prefer_stale=False):
+        """
+        Return the fresh value for key, calling loader() once on a miss.
+
+        Concurrent misses for the same key share one loader call. If the loader
+        raises one of the `stale_on` exceptions, or `prefer_stale` is set (e.g.
+        the upstream quota is nearly spent), a stale entry is returned instead.
+
+        Args:
+            key: Hashable cache key
+            loader (callable): Zero-argument function producing the value
+            ttl (float, optional): Lifetime for the loaded entry
+            prefer_stale (bool): Serve a stale entry, if any, instead of loading
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        if prefer_stale:
+            stale = self.get_stale(key)
+            if stale is not None:
+                logger.info(f"[{self.name}] Serving stale entry for {key!r} to conserve upstream budget")
+                return stale
+        try:
+            return self._flight.do(key, self._load, key, loader, ttl)
+        except self.stale_on as e:
+            stale = self.get_stale(key)
+            if stale is None:
+                raise
+            logger.warning(f"[{self.name}] Serving stale entry for {key!r} after upstream failure: {str(e)}")
+            return stale
+
+    def refresh(self, key, loader, ttl=None):
+        """Reload key unconditionally (coalesced with any concurrent miss for the same key)."""
+        return self._flight.do(key, self._load, key, loader, ttl)
+
+    def _load(self, key, loader, ttl):
+        value = loader()
+        if value is not None and self.cacheable(value):
+            self.set(key, value, ttl)
+        return value
+
+    def _touch(self, key, now):
+        # Exponentially decayed request count; caller holds the lock
+        score, last = self._popularity.get(key, (0.0, now))
+        self._popularity[key] = (score * math.exp(-self._decay * (now - last)) + 1.0, now)
+        if len(self._popularity) > self.maxsize * 4:
+            self._prune_popularity(now)
+
+    def _prune_popularity(self, now):
+        ranked = sorted(self._popularity.items(), key=lambda kv: self._score(kv[1], now), reverse=True)
+        self._popularity = dict(ranked[:self.maxsize * 2])
+
+    def _score(self, record, now):
+        score, last = record
+        return score * math.exp(-self._decay * (now - last))
+
+    def popular_keys(self, limit):
+        """
+        Return up to `limit` keys ordered by recent request volume.
+
+        Args:
+            limit (int): Maximum number of keys to return
+
+        Returns:
+            list: Keys, most popular first
+        """
+        now = time.time()
+        with self._lock:
+            ranked = sorted(self._popularity.items(), key=lambda kv: self._score(kv[1], now), reverse=True)
+        return [key for key, _ in ranked[:limit]]
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry, popularity score and counter."""
+        with self._lock:
+            self._entries.clear()
+            self._popularity.clear()
+            self.hits = 0
+            self.misses = 0
+            self.stale_hits = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+        }